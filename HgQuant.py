@@ -1,20 +1,34 @@
 #!/usr/bin/env python3
 
+import time
+_START = time.perf_counter()
+
 import customtkinter as ctk
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from tkinter import messagebox, filedialog
-import matplotlib.pyplot as plt
-from PIL import Image, ImageTk
-import io
-from datetime import datetime
-from dateutil import parser
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 
+# pandas, matplotlib, openpyxl and dateutil are imported on first use (calculation
+# or export), so the window can appear before they are loaded.
+import bateman
+import equation
+import explorer
+import export
+import timepoints
+import tracing
+import uncertainty
+from decay_table import DecayTable, format_time
+from plot_canvas import DecayPlotCanvas
+from result_cache import ResultCache
+from results_table import TableColumn, VirtualTable
+from study import Study
+from tasks import BackgroundTask
+import live
+from bateman import activity_Hg197m, activity_Hg197g  # kept importable from HgQuant for existing scripts
+
 if sys.platform == "darwin":
 	from AppKit import NSApplication, NSImage
 	from Foundation import NSURL
@@ -31,17 +45,38 @@ MAIN_BG_COLOR = "#f4f4f4"
 LABEL_TEXT_COLOR = "#1e1e1e"
 TEXT ="#445463"
 
+# Per-user cache for rendered assets and computed decay tables
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hgquant")
+RESULT_CACHE = ResultCache(os.path.join(CACHE_DIR, "results"))
 
+ICON_FILES = {
+	"calculate": "icons/gear.png",
+	"xls": "icons/excel.png",
+	"info": "icons/info.png",
+	"settings": "icons/radio.png",
+	"app": "icons/HgQuant.png",
+}
+APP_ICON_SIZE = (120, 120)
 
+# Pause in typing (ms) before a live update
+LIVE_DEBOUNCE_MS = 50
 
-# Bateman calculation functions
-def activity_Hg197m(A0, lambda_m, t):
-	return A0 * np.exp(-lambda_m * t)
 
-def activity_Hg197g(A0_m, A0_g, lambda_ITm, lambda_m, lambda_g, t):
-	term1 = A0_g * np.exp(-lambda_g * t)
-	term2 = (lambda_ITm / (lambda_g - lambda_ITm)) * (lambda_g/lambda_m) * A0_m * (np.exp(-lambda_ITm * t) - np.exp(-lambda_g * t))
-	return term1 + term2
+def load_icon_images():
+	# Runs on a background thread: decode every icon (and resize the app icon) with PIL
+	from PIL import Image
+	
+	images = {}
+	for name, path in ICON_FILES.items():
+		try:
+			img = Image.open(path)
+			img = img.resize(APP_ICON_SIZE) if name == "app" else img
+			img.load()
+			images[name] = img
+		except Exception as e:
+			print(f"⚠️ Could not load icon image {path}: {e}")
+	return images
+
 
 
 
@@ -65,6 +100,7 @@ class RadioactiveDecayApp(ctk.CTk):
 		self.isotope_m = "Hg197m"
 		self.isotope_g = "Hg197g"
 		self.activity_unit = "KBq"
+		self.uncertainty = None  # uncertainty.UncertaintySpec when Monte Carlo is enabled
 		
 		self.title("HgQuant v.2025.01")
 		self.geometry("1000x800")
@@ -80,34 +116,52 @@ class RadioactiveDecayApp(ctk.CTk):
 		sidebar.pack(side="left", fill="y")
 		sidebar.pack_propagate(False)
 		
-		self.icon_calculate = ctk.CTkImage(Image.open("icons/gear.png"), size=(20, 20))
-		self.icon_xls = ctk.CTkImage(Image.open("icons/excel.png"), size=(20, 20))
-		self.icon_info = ctk.CTkImage(Image.open("icons/info.png"), size=(20, 20))
-		self.icon_settings = ctk.CTkImage(Image.open("icons/radio.png"), size=(20, 20))
+		# Icons are decoded on a background thread and attached once ready, so
+		# the window is painted without waiting for them
+		icon_executor = ThreadPoolExecutor(max_workers=1)
+		self._icon_future = icon_executor.submit(load_icon_images)
+		icon_executor.shutdown(wait=False)
+		self.icon_images = {}
 		
-		
-		# App icon
-		try:
-			icon_img = Image.open("icons/HgQuant.png").resize((120, 120))
-			self.icon_ctk = ctk.CTkImage(light_image=icon_img, dark_image=icon_img, size=(120, 120))
-			icon_label = ctk.CTkLabel(sidebar, image=self.icon_ctk, text="")
-			icon_label.pack(pady=(30, 10))
-		except Exception as e:
-			print(f"⚠️ Could not load icon image: {e}")
+		# App icon (placeholder keeps the layout stable until the image arrives)
+		self.app_icon_label = ctk.CTkLabel(sidebar, text="", width=APP_ICON_SIZE[0], height=APP_ICON_SIZE[1])
+		self.app_icon_label.pack(pady=(30, 10))
 			
 		# Top section buttons
-		ctk.CTkButton(sidebar, text="Calculate & Plot", command=self.calculate_and_plot, fg_color="#3E4A89", hover_color="#5C6BC0", text_color="white", image=self.icon_calculate,compound="left", anchor="w").pack(pady=(10, 5), padx=10, fill="x")
-		ctk.CTkButton(sidebar, text="Save Excel", command=self.save_excel, fg_color="#3E4A89", 
-			hover_color="#5C6BC0", text_color="white", image=self.icon_xls, compound="left",anchor="w").pack(pady=(10, 5), padx=10, fill="x")
+		self.button_calculate = ctk.CTkButton(sidebar, text="Calculate & Plot", command=self.calculate_and_plot, fg_color="#3E4A89", hover_color="#5C6BC0", text_color="white", compound="left", anchor="w")
+		self.button_calculate.pack(pady=(10, 5), padx=10, fill="x")
+		self.button_xls = ctk.CTkButton(sidebar, text="Save Excel", command=self.save_excel, fg_color="#3E4A89", 
+			hover_color="#5C6BC0", text_color="white", compound="left",anchor="w")
+		self.button_xls.pack(pady=(10, 5), padx=10, fill="x")
+		self.button_explorer = ctk.CTkButton(sidebar, text="Explorer", command=self.show_explorer, fg_color="#3E4A89",
+			hover_color="#5C6BC0", text_color="white", compound="left", anchor="w")
+		self.button_explorer.pack(pady=(10, 5), padx=10, fill="x")
+		
+		# Progress of the running calculation or export (shown only while one runs)
+		self.task = None
+		self.progress_frame = ctk.CTkFrame(sidebar, fg_color="transparent")
+		self.progress_label = ctk.CTkLabel(self.progress_frame, text="", text_color="white", anchor="w")
+		self.progress_label.pack(fill="x")
+		self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
+		self.progress_bar.pack(fill="x", pady=(2, 5))
+		ctk.CTkButton(self.progress_frame, text="Cancel", command=self.cancel_task, fg_color="#8B3A3A",
+			hover_color="#A94442", text_color="white").pack(fill="x")
 		
 		# Bottom section: Info and Settings
 		bottom_buttons = ctk.CTkFrame(sidebar, fg_color="transparent")
 		bottom_buttons.pack(side="bottom", fill="x", pady=(10, 20))
 		
-		ctk.CTkButton(bottom_buttons, text="Info", command=self.show_info, fg_color="#3E4A89",       # bluish
-			hover_color="#5C6BC0", text_color="white", image=self.icon_info, compound="left",anchor="w").pack(pady=(10, 5), padx=10, fill="x")
-		ctk.CTkButton(bottom_buttons, text="Settings", command=self.show_settings, fg_color="#3E4A89",       # bluish
-			hover_color="#5C6BC0", text_color="white", image=self.icon_settings, compound="left",anchor="w").pack(pady=(0, 5), padx=10, fill="x")
+		self.button_diagnostics = ctk.CTkButton(bottom_buttons, text="Diagnostics", command=self.show_diagnostics, fg_color="#3E4A89",
+			hover_color="#5C6BC0", text_color="white", compound="left",anchor="w")
+		self.button_diagnostics.pack(pady=(10, 0), padx=10, fill="x")
+		self.button_info = ctk.CTkButton(bottom_buttons, text="Info", command=self.show_info, fg_color="#3E4A89",       # bluish
+			hover_color="#5C6BC0", text_color="white", compound="left",anchor="w")
+		self.button_info.pack(pady=(10, 5), padx=10, fill="x")
+		self.button_settings = ctk.CTkButton(bottom_buttons, text="Settings", command=self.show_settings, fg_color="#3E4A89",       # bluish
+			hover_color="#5C6BC0", text_color="white", compound="left",anchor="w")
+		self.button_settings.pack(pady=(0, 5), padx=10, fill="x")
+		
+		self.after(20, self.apply_icons)
 		
 		# === Content Area ===
 		self.content_area = ctk.CTkFrame(main_frame, fg_color=MAIN_BG_COLOR)
@@ -193,10 +247,50 @@ class RadioactiveDecayApp(ctk.CTk):
 		self.timepoints_text = ctk.CTkTextbox(input_frame, border_width=1, height=150, width=300)
 		self.timepoints_text.grid(row=3, column=1, columnspan=3, padx=5, pady=5, sticky="ew")
 		
+		# Live mode: edits are debounced and only the changed lines are recomputed
+		self.live_state = None  # live.LiveTimepoints while live mode is on
+		self.live_table = None  # the DecayTable live mode last built, patched in place on small edits
+		self._live_after = None
+		self.live_switch = ctk.CTkSwitch(input_frame, text="Live update", command=self.toggle_live)
+		self.live_switch.grid(row=4, column=1, padx=5, pady=(0, 5), sticky="w")
+		self.live_status = ctk.CTkLabel(input_frame, text="", text_color="gray")
+		self.live_status.grid(row=4, column=2, columnspan=2, padx=5, pady=(0, 5), sticky="w")
+		self.timepoints_text.bind("<<Modified>>", self.on_inputs_modified)
+		for entry in (self.hg197g_initial, self.hg197m_initial, self.hg197g_halflife, self.hg197m_halflife, self.initial_datetime):
+			entry.bind("<KeyRelease>", self.on_inputs_modified, add="+")
+		
 		
 				
+	def apply_icons(self):
+		if not self.winfo_exists():
+			return
+		if not self._icon_future.done():
+			self.after(20, self.apply_icons)
+			return
+		self.icon_images = self._icon_future.result()
+		
+		buttons = {
+			"calculate": self.button_calculate,
+			"xls": self.button_xls,
+			"info": self.button_info,
+			"settings": self.button_settings,
+		}
+		for name, button in buttons.items():
+			if name in self.icon_images:
+				button.configure(image=ctk.CTkImage(self.icon_images[name], size=(20, 20)))
+		if "app" in self.icon_images:
+			icon_img = self.icon_images["app"]
+			self.icon_ctk = ctk.CTkImage(light_image=icon_img, dark_image=icon_img, size=APP_ICON_SIZE)
+			self.app_icon_label.configure(image=self.icon_ctk)
+			
 	def on_closing(self):
-		plt.close('all')  # close any matplotlib windows
+		# stop a running calculation or export at its next checkpoint
+		if self.task is not None:
+			self.task.cancel()
+			
+		# close any matplotlib windows (pyplot is only loaded if something used it)
+		if "matplotlib.pyplot" in sys.modules:
+			sys.modules["matplotlib.pyplot"].close('all')
 		
 		# Unbind any lingering focus callbacks
 		try:
@@ -209,6 +303,8 @@ class RadioactiveDecayApp(ctk.CTk):
 	
 		
 	def calculate_and_plot(self):
+		from dateutil import parser
+		
 		try:
 			A_Hg197g_0 = float(self.hg197g_initial.get())
 			A_Hg197m_0 = float(self.hg197m_initial.get())
@@ -218,11 +314,7 @@ class RadioactiveDecayApp(ctk.CTk):
 			# Get user input or use default
 			initial_raw = self.initial_datetime.get().strip()
 			
-			self.am0 = A_Hg197m_0
-			self.ag0 = A_Hg197g_0
-			self.t_half_m = T_half_m
-			self.t_half_g = T_half_g
-			self.measured_time = parser.parse(initial_raw)
+			measured_time = parser.parse(initial_raw)
 		
 			
 			if not initial_raw:
@@ -234,200 +326,339 @@ class RadioactiveDecayApp(ctk.CTk):
 			except Exception:
 				messagebox.showerror("Date Error", "Please enter a valid date in the format YYYY-MM-DD or YYYY-MM-DD HH:MM[:SS]")
 				return
+		except Exception as e:
+			messagebox.showerror("Error", f"An error occurred:\n{e}")
+			return
+		
+		# Widgets are read here; parsing and the model run on the worker thread
+		raw_timepoints = self.timepoints_text.get("1.0", "end").strip()
+		spec = self.uncertainty
+		isotope_m, isotope_g, activity_unit = self.isotope_m, self.isotope_g, self.activity_unit
+		study = Study(A_Hg197m_0, A_Hg197g_0, initial_dt, raw_timepoints.split("\n"), T_half_m, T_half_g,
+			activity_unit=activity_unit, isotope_m=isotope_m, isotope_g=isotope_g, uncertainty=spec)
+		
+		def work(task):
+			with tracing.span("calculate"):
+				# Same inputs as an earlier run (e.g. only the isotope names changed): load, don't compute
+				with tracing.span("cache lookup"):
+					table = RESULT_CACHE.get(study)
+				if table is not None:
+					task.report(1.0, "Drawing…")
+					return {"invalid": [], "hours": table.hours, "result": table.result(), "table": table}
+				
+				# Get and clean all timepoints, parsed in bulk (format detected once)
+				task.report(0.0, "Parsing timepoints…")
+				with tracing.span("parse timepoints"):
+					parsed = timepoints.parse_timepoints(raw_timepoints)
+				if not parsed.ok:
+					return {"invalid": parsed.invalid}
+				
+				# Compute elapsed time in hours (same formula as Excel)
+				task.report(0.3, "Calculating…")
+				with tracing.span("evaluate", rows=len(parsed.labels)):
+					time_elapsed_h = parsed.elapsed_hours(initial_dt)
+					
+					# All columns come from the headless engine in a single broadcast pass
+					result = bateman.evaluate_cached(A_Hg197m_0, A_Hg197g_0, T_half_m, T_half_g, time_elapsed_h)
+				
+				# Optional Monte Carlo percentiles (configured in Settings)
+				mc = None
+				if spec is not None:
+					task.report(0.5, "Monte Carlo…")
+					with tracing.span("monte carlo", samples=spec.samples):
+						mc = uncertainty.monte_carlo(spec, A_Hg197m_0, A_Hg197g_0, T_half_m, T_half_g, time_elapsed_h,
+							progress=task.progress_callback(0.5, 1.0, "Monte Carlo…"))
+				
+				# Timestamps and activities only; display strings are made per visible row
+				table = DecayTable.from_result(parsed.times, result, A_Hg197m_0, A_Hg197g_0, initial_dt,
+					isotope_m, isotope_g, activity_unit, mc, spec)
+				with tracing.span("cache store"):
+					RESULT_CACHE.put(study, table)
+				task.report(1.0, "Drawing…")
+			return {"invalid": [], "hours": time_elapsed_h, "result": result, "table": table}
+		
+		def done(outcome):
+			if outcome["invalid"]:
+				shown = "\n".join(f"line {n}: {tp}" for n, tp in outcome["invalid"][:20])
+				if len(outcome["invalid"]) > 20:
+					shown += f"\n… and {len(outcome['invalid']) - 20} more"
+				messagebox.showerror("Date Error", f"Invalid timepoint(s):\n{shown}")
+				return
+			self.am0 = A_Hg197m_0
+			self.ag0 = A_Hg197g_0
+			self.t_half_m = T_half_m
+			self.t_half_g = T_half_g
+			self.measured_time = measured_time
+			self.decay_table = outcome["table"]
+			try:
+				self.show_results(outcome["hours"], outcome["result"])
+			except Exception as e:
+				messagebox.showerror("Error", f"An error occurred:\n{e}")
+			self.refresh_diagnostics()
+		
+		self.run_task(work, done, lambda e: messagebox.showerror("Error", f"An error occurred:\n{e}"))
+		
+	def show_results(self, time_elapsed_h, result):
+		# Runs on the Tk thread once the worker has finished
+		with tracing.span("show results"):
+			self._show_results(time_elapsed_h, result)
 			
-				# Get and clean all timepoints
-			time_points_raw = self.timepoints_text.get("1.0", "end").strip().split("\n")
-			time_points = [tp.strip().split('.')[0] for tp in time_points_raw if tp.strip()]			
+	def _show_results(self, time_elapsed_h, result):
+		self.lambda_m = float(result.lambda_m)
+		self.lambda_ITm = float(result.lambda_ITm)
+		self.lambda_g = float(result.lambda_g)
+		
+		hg197m = result.activity_m
+		hg197g = result.activity_g
+		hg197m_pct = result.pct_m
+		hg197g_pct = result.pct_g
+		
+		# Plot activities and percentages on the embedded canvas (created once, updated in place)
+		with tracing.span("plot"):
+			if not hasattr(self, 'plot_canvas'):
+				self.plot_canvas = DecayPlotCanvas(self.content_area, fg_color=MAIN_BG_COLOR)
+				self.plot_canvas.pack(padx=30, pady=(0, 10), fill="both", expand=True)
+			self.plot_canvas.update_data(
+				time_elapsed_h, hg197m, hg197g, hg197m_pct, hg197g_pct,
+				self.isotope_m, self.isotope_g, self.activity_unit
+			)
+		
+		
+		# Clear old results section
+		if hasattr(self, 'results_container'):
+			self.results_container.destroy()
+		self.results_container = ctk.CTkFrame(self)
+		self.results_container.pack(pady=(10, 15), fill="both", expand=True)
+		
+		# LEFT side (constants + Bateman equations)
+		left_frame = ctk.CTkFrame(self.results_container, fg_color="transparent")
+		left_frame.pack(side="left", fill="y", padx=10)
+		
+		self.constants_table_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
+		self.constants_table_frame.pack(pady=(0, 10))
+		
+		headers = ["Decay Constant", "Value (h⁻¹)"]
+		values = [
+			[f"λm ({self.isotope_m})", f"{self.lambda_m:.8f}"],
+			[f"λ_ITm ({self.isotope_m} → {self.isotope_g})", f"{self.lambda_ITm:.8f}"],
+			[f"λg ({self.isotope_g})", f"{self.lambda_g:.8f}"]
+		]
+		
+		for col, header in enumerate(headers):
+			ctk.CTkLabel(self.constants_table_frame, text=header, font=("Helvetica", 13, "bold")).grid(row=0, column=col, padx=10, pady=4)
 			
-			self.lambda_g = round(np.log(2) / T_half_g, 8)
-			self.lambda_m = round(np.log(2) / T_half_m, 8)
-			self.lambda_ITm = round(0.914 * self.lambda_m, 8)
-			lambda_decay_to_g = self.lambda_ITm
+		for row, (name, val) in enumerate(values, start=1):
+			ctk.CTkLabel(self.constants_table_frame, fg_color ="transparent", text=name, font=("Helvetica", 13)).grid(row=row, column=0, padx=10, pady=2)
+			ctk.CTkLabel(self.constants_table_frame, text=val, font=("Helvetica", 13)).grid(row=row, column=1, padx=10, pady=2)
 			
-			# Parse timepoints and truncate to minute precision
-			time_points_dt = []
-			for tp in time_points:
-				try:
-					time_points_dt.append(parser.parse(tp.strip()))
-				except Exception:
-					messagebox.showerror("Date Error", f"Invalid timepoint:\n{tp}")
-					return			
-			# Compute elapsed time in hours (same formula as Excel)
-			time_elapsed_h = [(tp - initial_dt).total_seconds() / 3600 for tp in time_points_dt]
-			
-			hg197m = np.array([activity_Hg197m(A_Hg197m_0, self.lambda_m, t) for t in time_elapsed_h])
-			hg197g = np.array([
-				activity_Hg197g(A_Hg197m_0, A_Hg197g_0, lambda_decay_to_g, self.lambda_m, self.lambda_g, t)
-				for t in time_elapsed_h
-			])
-			
-			total_activity = hg197m + hg197g
-			hg197m_pct = hg197m / total_activity * 100
-			hg197g_pct = hg197g / total_activity * 100
-			
-			self.activities_df = pd.DataFrame({
-				"Time Point": time_points,
-				"Hours Elapsed": time_elapsed_h,
-				f"{self.isotope_m} ({self.activity_unit})": hg197m,
-				f"{self.isotope_g} ({self.activity_unit})": hg197g,
-				f"% {self.isotope_m}": hg197m_pct,
-				f"% {self.isotope_g}": hg197g_pct
-			})
-			self.activities_df["Decay Factor Hg-197m"] = hg197m / A_Hg197m_0
-			self.activities_df["Decay Factor Hg-197g"] = hg197g / (A_Hg197m_0 + A_Hg197g_0)
-			
-			# Plot activities
-			plt.figure(figsize=(10, 6))
-			plt.plot(time_elapsed_h, hg197m, 'o-', label=self.isotope_m)
-			plt.plot(time_elapsed_h, hg197g, 's-', label=self.isotope_g)
-			plt.xlabel('Hours Elapsed')
-			plt.ylabel(f'Activity ({self.activity_unit})')
-			plt.title('Radioactive Decay')
-			plt.grid()
-			plt.legend()
-			plt.show()
-			
-			
-			# Plot percentage over time
-			plt.figure(figsize=(10, 6))
-			plt.plot(time_elapsed_h, hg197m_pct, 'o-', label=f"% {self.isotope_m}")
-			plt.plot(time_elapsed_h, hg197g_pct, 's-', label=f"% {self.isotope_g}")
-			plt.xlabel('Hours Elapsed')
-			plt.ylabel('Percentage (%)')
-			plt.title(f'Percentage of {self.isotope_m} and {self.isotope_g} Over Time')
-			plt.grid()
-			plt.legend()
-			plt.show()
-			
-			
-			# Clear old results section
-			if hasattr(self, 'results_container'):
-				self.results_container.destroy()
-			self.results_container = ctk.CTkFrame(self)
-			self.results_container.pack(pady=(10, 15), fill="both", expand=True)
-			
-			# LEFT side (constants + Bateman equations)
-			left_frame = ctk.CTkFrame(self.results_container, fg_color="transparent")
-			left_frame.pack(side="left", fill="y", padx=10)
-			
-			self.constants_table_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
-			self.constants_table_frame.pack(pady=(0, 10))
-			
-			headers = ["Decay Constant", "Value (h⁻¹)"]
-			values = [
-				[f"λm ({self.isotope_m})", f"{self.lambda_m:.8f}"],
-				[f"λ_ITm ({self.isotope_m} → {self.isotope_g})", f"{self.lambda_ITm:.8f}"],
-				[f"λg ({self.isotope_g})", f"{self.lambda_g:.8f}"]
-			]
-			
-			for col, header in enumerate(headers):
-				ctk.CTkLabel(self.constants_table_frame, text=header, font=("Helvetica", 13, "bold")).grid(row=0, column=col, padx=10, pady=4)
-				
-			for row, (name, val) in enumerate(values, start=1):
-				ctk.CTkLabel(self.constants_table_frame, fg_color ="transparent", text=name, font=("Helvetica", 13)).grid(row=row, column=0, padx=10, pady=2)
-				ctk.CTkLabel(self.constants_table_frame, text=val, font=("Helvetica", 13)).grid(row=row, column=1, padx=10, pady=2)
-				
-			bateman_img = self.render_bateman_equation_image()
+		if not hasattr(self, 'bateman_img_ctk'):
+			with tracing.span("equation render"):
+				bateman_img = self.render_bateman_equation_image()
 			self.bateman_img_ctk = ctk.CTkImage(light_image=bateman_img, dark_image=bateman_img, size=(300, 130))
+		
+		# Frame to wrap image and title
+		equation_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
+		equation_frame.pack(pady=(15, 10), padx=5)
+		
+		# Optional title above the equation
+		ctk.CTkLabel(equation_frame, text="Bateman Equations", font=("Helvetica", 13, "italic")).pack(pady=(0, 5))
+		
+		# The equation image
+		self.bateman_label = ctk.CTkLabel(equation_frame, image=self.bateman_img_ctk, text="")
+		self.bateman_label.pack()
+		
+		# RIGHT side (results table)
+		right_frame = ctk.CTkFrame(self.results_container)
+		right_frame.pack(side="left", fill="both", expand=True, padx=10)
+		
+		# Virtualized table: only the visible rows are formatted, on demand
+		self.results_table = VirtualTable(right_frame, font=("Courier New", 11), locate=self.locate_timepoint, fg_color="transparent")
+		self.results_table.pack(fill="both", expand=True)
+		with tracing.span("table fill"):
+			self.results_table.set_data(self.results_table_columns(time_elapsed_h))
+		
+	# === Live update ===
+	def toggle_live(self):
+		self.live_state = None
+		self.live_status.configure(text="")
+		if self.live_switch.get():
+			self.schedule_live_update()
+		elif self._live_after is not None:
+			self.after_cancel(self._live_after)
+			self._live_after = None
 			
-			# Frame to wrap image and title
-			equation_frame = ctk.CTkFrame(left_frame, fg_color="transparent")
-			equation_frame.pack(pady=(15, 10), padx=5)
-			
-			# Optional title above the equation
-			ctk.CTkLabel(equation_frame, text="Bateman Equations", font=("Helvetica", 13, "italic")).pack(pady=(0, 5))
-			
-			# The equation image
-			self.bateman_label = ctk.CTkLabel(equation_frame, image=self.bateman_img_ctk, text="")
-			self.bateman_label.pack()
-			
-			# RIGHT side (results table)
-			right_frame = ctk.CTkFrame(self.results_container)
-			right_frame.pack(side="left", fill="both", expand=True, padx=10)
-			
-			if hasattr(self, 'results_textbox'):
-				self.results_textbox.destroy()
-			self.results_textbox = ctk.CTkTextbox(right_frame, width=400, height=220, font=("Courier New", 11), wrap="none")
-			self.results_textbox.pack(fill="both", expand=True)
-			
-			# Format each row with aligned, padded columns
-			m_col = f"{self.isotope_m} ({self.activity_unit})"
-			g_col = f"{self.isotope_g} ({self.activity_unit})"
-			m_pct_col = f"% {self.isotope_m}"
-			g_pct_col = f"% {self.isotope_g}"
-			
-			
-			# Insert results into textbox
-			# Format and align columns manually for readability
-			table_lines = []
-						# Header row with fixed-width column names
-			df_m = self.activities_df["Decay Factor Hg-197m"]
-			df_g = self.activities_df["Decay Factor Hg-197g"]
-			
-			header = f"{'Time Point':<20} {'Elapsed (h)':>12} {m_col:>15} {g_col:>15} {m_pct_col:>12} {g_pct_col:>12} {'DF m':>10} {'DF g':>10}"
-			table_lines.append(header)
-			table_lines.append("-" * len(header))
-			
-			for i, row in self.activities_df.iterrows():
-				line = (
-					f"{row['Time Point']:<20} "
-					f"{row['Hours Elapsed']:>12.3f} "
-					f"{row[m_col]:>15.3f} "
-					f"{row[g_col]:>15.3f} "
-					f"{row[m_pct_col]:>12.2f} "
-					f"{row[g_pct_col]:>12.2f} "
-					f"{row['Decay Factor Hg-197m']:>10.4f} "
-					f"{row['Decay Factor Hg-197g']:>10.4f}"
-				)
-				table_lines.append(line)				
-			# Join all lines into one string
-			table_str = "\n".join(table_lines)
-			self.results_textbox.insert("1.0", table_str)
-			self.results_textbox.configure(state="disabled", wrap="none")
-			
+	def on_inputs_modified(self, event=None):
+		if event is not None and event.widget is self.timepoints_text._textbox:
+			self.timepoints_text.edit_modified(False)
+		if self.live_switch.get():
+			self.schedule_live_update()
 			
-		except Exception as e:
-			messagebox.showerror("Error", f"An error occurred:\n{e}")
+	def schedule_live_update(self):
+		# Debounce: recompute once typing pauses
+		if self._live_after is not None:
+			self.after_cancel(self._live_after)
+		self._live_after = self.after(LIVE_DEBOUNCE_MS, self.live_update)
+		
+	def live_update(self):
+		with tracing.span("live update"):
+			self._live_update()
 			
+	def _live_update(self):
+		from dateutil import parser
+		
+		self._live_after = None
+		if self.task is not None and self.task.running:
+			self.schedule_live_update()
+			return
+		try:
+			A_Hg197g_0 = float(self.hg197g_initial.get())
+			A_Hg197m_0 = float(self.hg197m_initial.get())
+			T_half_g = float(self.hg197g_halflife.get())
+			T_half_m = float(self.hg197m_halflife.get())
+			measured_time = parser.parse(self.initial_datetime.get().strip())
+		except (ValueError, OverflowError):
+			self.live_status.configure(text="Waiting for valid inputs")
+			return
+		
+		if self.live_state is None:
+			self.live_state = live.LiveTimepoints(A_Hg197m_0, A_Hg197g_0, T_half_m, T_half_g, measured_time)
+			changed = True
+		else:
+			changed = self.live_state.set_parameters(A_Hg197m_0, A_Hg197g_0, T_half_m, T_half_g, measured_time)
+		rows = self.live_state.update(self.timepoints_text.get("1.0", "end-1c"))
+		if changed:
+			rows = None  # every row has new values
 			
-	def render_bateman_equation_image(self):
-		import matplotlib.pyplot as plt
-		from matplotlib import rcParams
-		
-		rcParams.update({
-			"text.usetex": False,
-			"font.size": 16,
-			"mathtext.fontset": "stix",  # or "cm"
-		})
-		
-		equation_text = (
-			r"$A_m(t) = A_{m0} \cdot e^{-\lambda_m t}$" "\n\n"
-			r"$A_g(t) = A_{g0} \cdot e^{-\lambda_g t} + \left("
-			r"\frac{\lambda_{ITm}}{\lambda_g - \lambda_{ITm}} \cdot \frac{\lambda_g}{\lambda_m} \cdot A_{m0} \cdot "
-			r"\left(e^{-\lambda_{ITm} t} - e^{-\lambda_g t}\right)"
-			r"\right)$"
+		invalid = self.live_state.invalid_lines()
+		self.live_status.configure(text=f"{len(invalid)} invalid line(s), first: line {invalid[0][0]}" if invalid else "")
+		if rows is not None and not len(rows):
+			return
+		if rows is not None and self._live_patch(rows):
+			return
+		
+		times, result = self.live_state.result()
+		if not len(times):
+			return
+		self.am0 = A_Hg197m_0
+		self.ag0 = A_Hg197g_0
+		self.t_half_m = T_half_m
+		self.t_half_g = T_half_g
+		self.measured_time = measured_time
+		
+		self.decay_table = self.live_table = DecayTable.from_result(times, result, A_Hg197m_0, A_Hg197g_0, measured_time,
+			self.isotope_m, self.isotope_g, self.activity_unit)
+		
+		panel_shown = hasattr(self, 'results_table') and self.results_table.winfo_exists()
+		constants = (float(result.lambda_m), float(result.lambda_ITm), float(result.lambda_g))
+		if not panel_shown or constants != (self.lambda_m, self.lambda_ITm, self.lambda_g):
+			self.show_results(result.hours, result)
+			return
+		# Update the plot and the table in place
+		self.plot_canvas.update_data(
+			result.hours, result.activity_m, result.activity_g, result.pct_m, result.pct_g,
+			self.isotope_m, self.isotope_g, self.activity_unit
 		)
+		self.results_table.set_data(self.results_table_columns(result.hours))
 		
-		fig, ax = plt.subplots(figsize=(6, 2))
-		ax.text(0.5, 0.5, equation_text, fontsize=16, ha='center', va='center')
-		ax.axis("off")
+	def _live_patch(self, rows):
+		# An edit within existing timepoints: recompute, store and redraw only those rows.
+		# Returns False when the whole table has to be rebuilt instead.
+		table = getattr(self, 'decay_table', None)
+		if (table is None or table is not self.live_table or not hasattr(self, 'results_table')
+				or not self.results_table.winfo_exists()
+				or (table.isotope_m, table.isotope_g, table.activity_unit) != (self.isotope_m, self.isotope_g, self.activity_unit)):
+			return False
+		times, result = self.live_state.result(self.live_state.changed_lines)
+		if (np.array_equal(times, table.times[rows]) and np.array_equal(result.activity_m, table.activity_m[rows])
+				and np.array_equal(result.activity_g, table.activity_g[rows])):
+			return True  # same values (e.g. a timestamp rewritten in another notation)
+		table.patch(rows, times, result.activity_m, result.activity_g)
 		
-		buf = io.BytesIO()
-		plt.savefig(buf, format='png', dpi=250, bbox_inches='tight', transparent=True)
-		buf.seek(0)
-		plt.close(fig)
+		patched = table.take(rows)
+		self.results_table.patch_rows(rows, self.results_table_columns(patched.hours, patched))
+		if not self.plot_canvas.patch(rows, patched.hours, patched.activity_m, patched.activity_g, patched.pct_m, patched.pct_g):
+			self.plot_canvas.update_data(
+				table.hours, table.activity_m, table.activity_g, table.pct_m, table.pct_g,
+				self.isotope_m, self.isotope_g, self.activity_unit
+			)
+		return True
+		
+	# === Background tasks (calculation and export) ===
+	def run_task(self, work, on_done, on_error, on_cancelled=None):
+		if self.task is not None and self.task.running:
+			return
+		self.button_calculate.configure(state="disabled")
+		self.button_xls.configure(state="disabled")
+		self.progress_bar.set(0)
+		self.progress_label.configure(text="")
+		self.progress_frame.pack(after=self.button_xls, pady=(10, 5), padx=10, fill="x")
 		
-		return Image.open(buf)
+		def finish(callback):
+			def handler(*args):
+				self.task = None
+				self.progress_frame.pack_forget()
+				self.button_calculate.configure(state="normal")
+				self.button_xls.configure(state="normal")
+				if callback:
+					callback(*args)
+			return handler
+		
+		self.task = BackgroundTask(
+			self, work, finish(on_done), on_error=finish(on_error),
+			on_progress=self.show_progress, on_cancelled=finish(on_cancelled),
+		).start()
+		
+	def show_progress(self, fraction, message):
+		self.progress_bar.set(fraction)
+		self.progress_label.configure(text=message)
+		
+	def cancel_task(self):
+		if self.task is not None:
+			self.task.cancel()
+			self.progress_label.configure(text="Cancelling…")
+			
+	def results_table_columns(self, hours, table=None):
+		table = self.decay_table if table is None else table
+		headers = table.headers()
+		total = table.total
+		
+		# Same fixed-width layout the textbox used; Time Point sorts chronologically
+		# and is formatted only for the rows on screen
+		return [
+			TableColumn("Time Point", table.times, "<20", 20, sort_key=hours, display=format_time),
+			TableColumn("Elapsed (h)", hours, ">12.3f", 12),
+			TableColumn(headers["activity_m"], table.activity_m, ">15.3f", 15),
+			TableColumn(headers["activity_g"], table.activity_g, ">15.3f", 15),
+			TableColumn(headers["pct_m"], table.activity_m / total * 100, ">12.2f", 12),
+			TableColumn(headers["pct_g"], table.activity_g / total * 100, ">12.2f", 12),
+			TableColumn("DF m", table.decay_factor_m, ">10.4f", 10),
+			TableColumn("DF g", table.decay_factor_g, ">10.4f", 10),
+		]
+		
+	def locate_timepoint(self, query):
+		# Accept elapsed hours ("26.5") or a timestamp; jump to the nearest row
+		hours = self.decay_table.hours
+		try:
+			target = float(query)
+		except ValueError:
+			parsed = timepoints.parse_timepoints([query])
+			if not parsed.ok:
+				messagebox.showerror("Date Error", f"Invalid timepoint:\n{query}")
+				return None
+			target = float(parsed.elapsed_hours(self.measured_time)[0])
+		return int(np.nanargmin(np.abs(hours - target)))
+		
+	def render_bateman_equation_image(self):
+		# Rendered once and memoized (in memory and in the user cache folder)
+		return equation.render_bateman_equation(fontset="stix", fontsize=16, cache_dir=CACHE_DIR)
 	
 			
 	def save_excel(self):
 		import os
-		import pandas as pd
 		from tkinter import filedialog, messagebox
 		from datetime import datetime
-		from openpyxl.styles import Font
 		
-		if not hasattr(self, 'activities_df'):
+		if not hasattr(self, 'decay_table'):
 			messagebox.showwarning("Warning", "Please run 'Calculate & Plot' before saving.")
 			return
 		
@@ -435,7 +666,10 @@ class RadioactiveDecayApp(ctk.CTk):
 			default_filename = f"BatemanDecay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
 			filepath = os.path.join(self.save_path, default_filename)
 		else:
-			filepath = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+			filepath = filedialog.asksaveasfilename(
+				defaultextension=".xlsx",
+				filetypes=[(f"{name} files", f"*{ext}") for ext, name in export.EXPORT_FORMATS.items()]
+			)
 			
 		if not filepath:
 			return
@@ -445,121 +679,139 @@ class RadioactiveDecayApp(ctk.CTk):
 			messagebox.showwarning("Missing Data", "Please run 'Calculate & Plot' before saving.")
 			return
 		
-		# === Prepare DataFrames ===
-		df_metadata = pd.DataFrame([
-			["Report generated by", "HgQuant v.2025.01"],
-			["on", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-			["User-defined Isotopes", f"{self.isotope_m} → {self.isotope_g}"],
-			["GitHub", "https://github.com/cristinarod2/HgQuant"]
-		], columns=["Report", "Value"])
-		
-		df_inputs = pd.DataFrame({
-			"Parameter": [
-				f"Initial Activity ({self.isotope_m})",
-				f"Initial Activity ({self.isotope_g})",
-				f"Half-life ({self.isotope_m})",
-				f"Half-life ({self.isotope_g})",
-				"Activity Units",
-				"Measured Timestamp"
-			],
-			"Value": [
-				self.am0,
-				self.ag0,
-				f"{self.t_half_m:.4f} h",
-				f"{self.t_half_g:.4f} h",
-				self.activity_unit,
-				self.measured_time.strftime("%Y-%m-%d %H:%M:%S")
-			]
-		})		
-		df_constants = pd.DataFrame({
-			"Decay Constant": ["λm (Hg-197m)", "λ_ITm (Hg-197m → Hg-197g)", "λg (Hg-197g)"],
-			"Value (h⁻¹)": [
-				f"{self.lambda_m:.8f}",
-				f"{self.lambda_ITm:.8f}",
-				f"{self.lambda_g:.8f}"
-			]
-		})
-		
-		# === Write to Excel ===
-		try:
-			with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
-				sheet = "Input and Decay Constants"
-				
-				# Write all dataframes with spacing
-				df_metadata.to_excel(writer, index=False, sheet_name=sheet, startrow=0)
-				df_inputs.to_excel(writer, index=False, sheet_name=sheet, startrow=len(df_metadata) + 2)
-				df_constants.to_excel(writer, index=False, sheet_name=sheet, startrow=len(df_metadata) + len(df_inputs) + 5)
-				self.activities_df.to_excel(writer, index=False, sheet_name="Decay Table")
-				
-				ws = writer.sheets[sheet]
-				
-				# === Style: Fonts ===
-				font_regular = Font(name="Calibri", size=12)
-				font_bold = Font(name="Calibri", size=16, bold=True)
-				
-				# Apply font to metadata table
-				for row in ws.iter_rows(min_row=1, max_row=len(df_metadata), min_col=1, max_col=2):
-					for cell in row:
-						cell.font = font_regular
-						
-				for cell in ws[f"A1:B1"]:
-					for c in cell:
-						c.font = font_bold
-					
-				# Bold parameter + constant headers
-				inputs_start = len(df_metadata) + 3
-				constants_start = len(df_metadata) + len(df_inputs) + 6
-				
-				for cell in ws[f"A{inputs_start}:B{inputs_start}"][0]:
-					cell.font = font_bold
-					
-				for cell in ws[f"A{constants_start}:B{constants_start}"][0]:
-					cell.font = font_bold
-					
-				# Hyperlink the GitHub row in metadata
-				ws["B5"].hyperlink = "https://github.com/cristinarod2/HgQuant"
-				ws["B5"].style = "Hyperlink"
-				
-				# Optional: Freeze top row to keep metadata visible
-				#ws.freeze_panes = f"A{len(df_metadata) + 2}"
+		study = Study(
+			A0_m=self.am0,
+			A0_g=self.ag0,
+			measured_time=self.measured_time,
+			timepoints=[],
+			t_half_m=self.t_half_m,
+			t_half_g=self.t_half_g,
+			activity_unit=self.activity_unit,
+			isotope_m=self.isotope_m,
+			isotope_g=self.isotope_g,
+			uncertainty=self.uncertainty,
+		)
+		
+		# === Write to Excel (or CSV/Parquet, by extension) on the worker thread ===
+		table = self.decay_table
+		
+		def work(task):
+			task.report(0.0, "Saving…")
+			with tracing.span("save", path=filepath):
+				activities_df = table.to_frame()
+				export.write_report(filepath, study, activities_df, progress=task.progress_callback(0.0, 1.0, "Saving…"))
+			
+		def cancelled():
+			# Don't leave a half-written report behind
+			if os.path.exists(filepath):
+				os.remove(filepath)
 				
-				# Auto-adjust column widths
-				for sheetname in writer.sheets:
-					ws_auto = writer.sheets[sheetname]
-					if sheetname == sheet:
-						dfs_to_check = [df_metadata, df_inputs, df_constants]
-					else:
-						dfs_to_check = [self.activities_df]
-						
-					for df in dfs_to_check:
-						for i, column in enumerate(df.columns):
-							col_letter = get_column_letter(i + 1)
-							column_name = str(df.columns[i])
-							
-							try:
-								content_len = df[column].astype(str).map(len).max()
-							except Exception:
-								content_len = 0  # fallback if column data is missing or empty
-								
-							header_len = len(column_name)
-							max_len = max(header_len, content_len) + 4
-							ws_auto.column_dimensions[col_letter].width = max_len
-							
-			messagebox.showinfo("Saved", f"Excel file saved successfully:\n{filepath}")
+		def saved(_):
+			self.refresh_diagnostics()
+			messagebox.showinfo("Saved", f"File saved successfully:\n{filepath}")
 			
-		except Exception as e:
-			messagebox.showerror("Save Error", f"Could not save Excel file:\n{e}")
+		self.run_task(
+			work,
+			saved,
+			lambda e: messagebox.showerror("Save Error", f"Could not save file:\n{e}"),
+			cancelled,
+		)
+			
+	def show_explorer(self):
+		# Sliders over the current inputs; redrawn by blitting, see explorer.py
+		from matplotlib.figure import Figure
+		from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+		
+		try:
+			A0_g = float(self.hg197g_initial.get())
+			A0_m = float(self.hg197m_initial.get())
+			t_half_g = float(self.hg197g_halflife.get())
+			t_half_m = float(self.hg197m_halflife.get())
+		except ValueError as e:
+			messagebox.showerror("Error", f"An error occurred:\n{e}")
+			return
+		
+		win = ctk.CTkToplevel(self)
+		win.title("Explorer")
+		win.geometry("1200x650")
+		figure = Figure(figsize=(12, 6), dpi=100)
+		canvas = FigureCanvasTkAgg(figure, master=win)
+		try:
+			win.explorer = explorer.ExplorerFigure(figure, explorer.SweepModel(), A0_m, A0_g, t_half_m, t_half_g,
+				self.isotope_m, self.isotope_g, self.activity_unit)
+		except ValueError as e:
+			win.destroy()
+			messagebox.showerror("Error", f"An error occurred:\n{e}")
+			return
+		canvas.get_tk_widget().pack(fill="both", expand=True)
+		canvas.draw()
+		
+	def show_diagnostics(self):
+		# Stage timings of the recorded calculations and exports
+		if getattr(self, 'diagnostics_window', None) is not None and self.diagnostics_window.winfo_exists():
+			self.diagnostics_window.focus()
+			return
+		win = self.diagnostics_window = ctk.CTkToplevel(self)
+		win.title("Diagnostics")
+		win.geometry("560x420")
+		
+		def toggle():
+			tracing.enable(switch.get())
+			self.refresh_diagnostics()
+			
+		switch = ctk.CTkSwitch(win, text="Record stage timings", command=toggle)
+		switch.pack(anchor="w", padx=15, pady=(15, 5))
+		if tracing.enabled():
+			switch.select()
 			
+		self.diagnostics_text = ctk.CTkTextbox(win, font=("Courier New", 11), wrap="none")
+		self.diagnostics_text.pack(fill="both", expand=True, padx=15, pady=5)
+		
+		def clear():
+			tracing.clear()
+			self.refresh_diagnostics()
+			
+		def export_trace():
+			filepath = filedialog.asksaveasfilename(
+				parent=win, defaultextension=".json", filetypes=[("Chrome trace", "*.json")],
+				initialfile=f"HgQuant_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+			)
+			if not filepath:
+				return
+			try:
+				tracing.write_chrome_trace(filepath)
+			except OSError as e:
+				messagebox.showerror("Save Error", f"Could not save trace:\n{e}", parent=win)
+				
+		buttons = ctk.CTkFrame(win, fg_color="transparent")
+		buttons.pack(fill="x", padx=15, pady=(5, 15))
+		ctk.CTkButton(buttons, text="Clear", width=100, command=clear).pack(side="left")
+		ctk.CTkButton(buttons, text="Export Trace…", width=120, command=export_trace).pack(side="left", padx=10)
+		ctk.CTkButton(buttons, text="Close", width=100, command=win.destroy).pack(side="right")
+		self.refresh_diagnostics()
+		
+	def refresh_diagnostics(self):
+		if getattr(self, 'diagnostics_window', None) is None or not self.diagnostics_window.winfo_exists():
+			return
+		if tracing.enabled() or tracing.spans():
+			text = tracing.format_summary()
+		else:
+			text = "Stage timing is off. Turn it on, then run Calculate & Plot or Save."
+		self.diagnostics_text.configure(state="normal")
+		self.diagnostics_text.delete("1.0", "end")
+		self.diagnostics_text.insert("1.0", text)
+		self.diagnostics_text.configure(state="disabled")
+		
 	def show_info(self):
 		info_win = ctk.CTkToplevel(self)
 		info_win.title("About HgQuant")
 		info_win.geometry("600x750")
 		info_win.resizable(False, False)
 		
-		# Load and set the icon
+		# Load and set the icon (preloaded at startup)
 		try:
-			icon_img = Image.open("icons/HgQuant.png").resize((120, 120))
-			self.icon_ctk = ctk.CTkImage(light_image=icon_img, dark_image=icon_img, size=(120, 120))
+			icon_img = self.icon_images.get("app") or load_icon_images()["app"]
+			self.icon_ctk = ctk.CTkImage(light_image=icon_img, dark_image=icon_img, size=APP_ICON_SIZE)
 			icon_label = ctk.CTkLabel(info_win, image=self.icon_ctk, text="")
 			icon_label.pack(pady=(25, 10))
 		except Exception as e:
@@ -629,7 +881,7 @@ class RadioactiveDecayApp(ctk.CTk):
 	def show_settings(self):
 		settings_window = ctk.CTkToplevel(self)
 		settings_window.title("Settings")
-		settings_window.geometry("300x500")
+		settings_window.geometry("300x760")
 		
 		ctk.CTkLabel(settings_window, text="Folder to Save Files", font=("Helvetica", 14, "bold")).pack(pady=(10, 5))
 		self.path_display = ctk.CTkLabel(settings_window, text=self.save_path or "No folder selected", wraplength=480)
@@ -679,8 +931,42 @@ class RadioactiveDecayApp(ctk.CTk):
 		halflife_g_entry.insert(0, self.hg197g_halflife.get())
 		halflife_g_entry.grid(row=1, column=1)
 		
+		# --- Uncertainty (Monte Carlo) ---
+		ctk.CTkLabel(settings_window, text="Uncertainties (1σ)").pack(pady=(10, 2))
+		uncertainty_var = ctk.BooleanVar(value=self.uncertainty is not None)
+		ctk.CTkCheckBox(settings_window, text="Report Monte Carlo percentiles", variable=uncertainty_var).pack(pady=(0, 5))
+		uncertainty_frame = ctk.CTkFrame(settings_window)
+		uncertainty_frame.pack(pady=5)
 		
+		spec = self.uncertainty or uncertainty.UncertaintySpec()
+		uncertainty_fields = [
+			("sigma_A0_m", f"Initial {self.isotope_m}:"),
+			("sigma_A0_g", f"Initial {self.isotope_g}:"),
+			("sigma_t_half_m", f"Half-life {self.isotope_m} (h):"),
+			("sigma_t_half_g", f"Half-life {self.isotope_g} (h):"),
+			("sigma_branching", "IT branching:"),
+			("samples", "Samples:"),
+		]
+		uncertainty_entries = {}
+		for row, (key, label) in enumerate(uncertainty_fields):
+			ctk.CTkLabel(uncertainty_frame, text=label).grid(row=row, column=0, padx=5, pady=2, sticky="e")
+			entry = ctk.CTkEntry(uncertainty_frame, width=90)
+			entry.insert(0, str(getattr(spec, key)))
+			entry.grid(row=row, column=1, padx=5, pady=2)
+			uncertainty_entries[key] = entry
+			
 		def save_settings():
+			if uncertainty_var.get():
+				try:
+					values = {key: float(entry.get()) for key, entry in uncertainty_entries.items()}
+					values["samples"] = int(values["samples"])
+				except ValueError:
+					messagebox.showerror("Settings Error", "Uncertainties and sample count must be numbers.")
+					return
+				self.uncertainty = uncertainty.UncertaintySpec(**values)
+			else:
+				self.uncertainty = None
+				
 			self.isotope_m = isotope_m_entry.get()
 			self.isotope_g = isotope_g_entry.get()
 			self.activity_unit = unit_option.get()
@@ -746,7 +1032,29 @@ class RadioactiveDecayApp(ctk.CTk):
 			
 			
 			
+def report_first_paint(app):
+	# Startup probe for benchmarks/bench_startup.py: print time to first paint, then quit
+	def on_map(event):
+		if event.widget is not app:
+			return
+		app.unbind("<Map>")
+		app.after_idle(done)
+		
+	def done():
+		deferred = " ".join(f"{name}={int(name in sys.modules)}" for name in ("pandas", "matplotlib", "openpyxl"))
+		print(f"HGQUANT_FIRST_PAINT wall={time.time():.4f} in_process={time.perf_counter() - _START:.4f} {deferred}", flush=True)
+		app.on_closing()
+		
+	app.bind("<Map>", on_map)
+	
+	
 if __name__ == "__main__":
+	# "HgQuant.py batch ..." runs the headless batch mode (see batch.py); anything else opens the window
+	if sys.argv[1:2] == ["batch"]:
+		import batch
+		sys.exit(batch.main(sys.argv[2:]))
 	app = RadioactiveDecayApp()
+	if os.environ.get("HGQUANT_STARTUP_PROBE"):
+		report_first_paint(app)
 	app.mainloop()
 	
\ No newline at end of file
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Headless batch mode: decay-correct many studies in parallel.
+
+Usage:
+	python batch.py STUDIES [-o OUTPUT_DIR] [--format xlsx|csv|parquet] [--workers N]
+		[--profile] [--trace TRACE.json] [--cache CACHE_DIR [--cache-mb MB]]
+
+STUDIES is a directory of study JSON files (see ``study.py``), a text manifest
+listing one study file per line, or a CSV manifest with one study per row
+(columns named like the :class:`study.Study` fields, ``timepoints_file``
+relative to the manifest). One output per study, named after the study
+(numbered when names repeat), is written to OUTPUT_DIR together with
+``summary.csv``. ``--profile`` prints the time spent per stage
+and ``--trace`` saves the stage spans of every worker as a Chrome trace.
+With ``--cache`` computed tables are kept on disk (see ``result_cache.py``),
+so re-running unchanged studies only re-exports them.
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import export
+import tracing
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from study import Study
+
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+SUMMARY_FIELDS = ["name", "status", "timepoints", "cached", "output", "seconds", "error"]
+
+
+def discover_studies(source):
+	"""Return a list of (kind, payload) jobs from a directory or manifest."""
+	if os.path.isdir(source):
+		paths = sorted(
+			os.path.join(source, f) for f in os.listdir(source)
+			if f.lower().endswith(".json")
+		)
+		return [("file", path) for path in paths]
+
+	base_dir = os.path.dirname(os.path.abspath(source))
+	if source.lower().endswith(".csv"):
+		with open(source, newline="", encoding="utf-8") as f:
+			rows = [{k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(f)]
+		for i, row in enumerate(rows, start=1):
+			row.setdefault("name", f"study_{i:05d}")
+		return [("row", (row, base_dir)) for row in rows]
+
+	with open(source, encoding="utf-8") as f:
+		lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+	return [("file", os.path.join(base_dir, line)) for line in lines]
+
+
+def _load(job):
+	kind, payload = job
+	if kind == "file":
+		return Study.from_file(payload)
+	row, base_dir = payload
+	return Study.from_dict(row, base_dir=base_dir)
+
+
+def _job_name(job):
+	kind, payload = job
+	if kind == "file":
+		return os.path.splitext(os.path.basename(payload))[0]
+	return payload[0]["name"]
+
+
+def process_study(job, output_dir, fmt="xlsx", cache=None):
+	"""Worker entry point: load, compute (or fetch from ``cache``) and export one study, returning its summary row."""
+	start = time.perf_counter()
+	row = {"name": _job_name(job), "status": "ok", "timepoints": 0, "cached": False, "output": "", "seconds": 0.0, "error": ""}
+	try:
+		with tracing.span("study", name=row["name"]):
+			with tracing.span("load study"):
+				study = _load(job)
+			row["name"] = study.name or row["name"]
+			run = study.run(cache)
+			row["timepoints"] = len(run.table)
+			row["cached"] = run.parsed is None
+
+			# Written under a unique temporary name; run_batch gives it its final name
+			fd, path = tempfile.mkstemp(prefix=".study_", suffix=f".{fmt}", dir=output_dir)
+			os.close(fd)
+			row["output"] = path
+			export.write_report(path, study, run.frame)
+	except Exception as e:
+		row["status"] = "error"
+		row["error"] = f"{type(e).__name__}: {e}"
+		if row["output"]:
+			_remove(row["output"])
+			row["output"] = ""
+	row["seconds"] = round(time.perf_counter() - start, 4)
+	return row
+
+
+def output_stem(name):
+	"""A file name stem for study ``name`` that stays inside the output folder."""
+	stem = re.sub(r"[^\w\-. ]+", "_", str(name)).strip(" .")
+	return stem or "study"
+
+
+def finalize_outputs(rows, output_dir, fmt):
+	"""
+	Move each study's output to ``<study name>.<fmt>`` in ``output_dir``.
+
+	Names are made safe with :func:`output_stem` and studies sharing a name are
+	numbered in job order (``name``, ``name_2``, …), so no report overwrites
+	another or ``summary.csv``.
+	"""
+	taken = {"summary"} if fmt == "csv" else set()
+	for row in rows:
+		if row["status"] != "ok":
+			continue
+		stem = candidate = output_stem(row["name"])
+		n = 1
+		while candidate.lower() in taken:  # case-insensitive file systems
+			n += 1
+			candidate = f"{stem}_{n}"
+		taken.add(candidate.lower())
+		path = os.path.join(output_dir, f"{candidate}.{fmt}")
+		try:
+			os.replace(row["output"], path)
+		except OSError as e:
+			_remove(row["output"])
+			row.update(status="error", output="", error=f"{type(e).__name__}: {e}")
+			continue
+		row["output"] = path
+
+
+def _remove(path):
+	try:
+		os.remove(path)
+	except OSError:
+		pass
+
+
+def _process_chunk(jobs, output_dir, fmt, trace=False, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+	"""Process ``jobs`` in one worker; returns the summary rows and the spans recorded meanwhile."""
+	tracing.enable(trace)
+	cache = ResultCache(cache_dir, cache_bytes) if cache_dir else None
+	rows = [process_study(job, output_dir, fmt, cache) for job in jobs]
+	return rows, tracing.take()
+
+
+def run_batch(jobs, output_dir, fmt="xlsx", workers=None, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+	"""
+	Process ``jobs`` across a pool of ``workers`` processes (default: all cores).
+
+	Jobs are sent in chunks so per-task overhead stays small next to the work,
+	and each worker loads its own inputs, so throughput scales with cores.
+	When tracing is enabled the workers' spans are collected into this process.
+	With ``cache_dir`` every worker reads and stores results in that result cache.
+	"""
+	os.makedirs(output_dir, exist_ok=True)
+	workers = workers or os.cpu_count() or 1
+	trace = tracing.enabled()
+	if workers == 1 or len(jobs) <= 1:
+		chunks = [_process_chunk(jobs, output_dir, fmt, trace, cache_dir, cache_bytes)]
+	else:
+		chunksize = max(1, min(64, len(jobs) // (workers * 4)))
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			futures = [
+				pool.submit(_process_chunk, jobs[i:i + chunksize], output_dir, fmt, trace, cache_dir, cache_bytes)
+				for i in range(0, len(jobs), chunksize)
+			]
+			chunks = [future.result() for future in futures]
+
+	rows = []
+	for chunk_rows, spans in chunks:
+		rows.extend(chunk_rows)
+		tracing.extend(spans)
+	finalize_outputs(rows, output_dir, fmt)
+	return rows
+
+
+def write_summary(path, rows):
+	with open(path, "w", newline="", encoding="utf-8") as f:
+		writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+		writer.writeheader()
+		writer.writerows(rows)
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="batch.py", description="Decay-correct many HgQuant studies in parallel.")
+	parser.add_argument("studies", help="directory of study JSON files, or a .txt/.csv manifest")
+	parser.add_argument("-o", "--output-dir", default="hgquant_output", help="where per-study outputs and summary.csv go")
+	parser.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx", help="per-study output format")
+	parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of cores)")
+	parser.add_argument("--profile", action="store_true", help="print the time spent in each stage")
+	parser.add_argument("--trace", metavar="FILE", help="write the stage spans as Chrome trace-event JSON")
+	parser.add_argument("--cache", metavar="DIR", help="reuse and store computed tables in this result cache folder")
+	parser.add_argument("--cache-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, help="result cache size limit in MiB")
+	return parser
+
+
+def main(argv=None):
+	args = build_parser().parse_args(argv)
+	jobs = discover_studies(args.studies)
+	if not jobs:
+		print(f"No studies found in {args.studies}", file=sys.stderr)
+		return 1
+
+	if args.profile or args.trace:
+		tracing.enable()
+	start = time.perf_counter()
+	rows = run_batch(jobs, args.output_dir, args.format, args.workers, args.cache, int(args.cache_mb * 2**20))
+	elapsed = time.perf_counter() - start
+
+	summary_path = os.path.join(args.output_dir, "summary.csv")
+	write_summary(summary_path, rows)
+
+	failed = sum(row["status"] != "ok" for row in rows)
+	cached = sum(bool(row["cached"]) for row in rows)
+	print(f"Processed {len(rows)} studies in {elapsed:.2f} s ({len(rows) / elapsed:.1f} studies/s), {failed} failed"
+		+ (f", {cached} from the result cache" if args.cache else ""))
+	print(f"Summary written to {summary_path}")
+	if args.profile:
+		print()
+		print(tracing.format_summary())
+	if args.trace:
+		tracing.write_chrome_trace(args.trace)
+		print(f"Trace written to {args.trace}")
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmarks: Bateman kernels, timepoint parsing, rendering and export.
+
+Every stage runs headless (matplotlib's Agg backend) at a range of timepoint
+counts. Throughput is the best of several runs; peak memory is measured in a
+separate run under tracemalloc, which NumPy and pandas report their buffers to
+(Arrow's own memory pool, used by the Parquet export, is not traced).
+Records can be appended to a JSON-lines history and compared with the last
+recorded run of the same stage and size.
+
+Usage:
+	python benchmarks/bench_pipeline.py [--sizes 1e2,1e4,1e6] [--stages kernel,parse]
+		[--repeat N] [--json history.jsonl] [--compare]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import bateman      # noqa: E402
+import equation     # noqa: E402
+from decay_table import DecayTable  # noqa: E402
+import export       # noqa: E402
+import timepoints   # noqa: E402
+from study import Study  # noqa: E402
+
+DEFAULT_SIZES = [10**k for k in range(2, 8)]
+# Excel sheets hold at most 1,048,576 rows
+XLSX_MAX_ROWS = 1_048_575
+# Slower than the numeric stages by orders of magnitude; capped unless asked for
+DEFAULT_MAX_EXPORT = 10**6
+# Fast runs are looped until they take this long, and the mean per call is used
+MIN_RUN_S = 0.05
+
+MEASURED = np.datetime64("2025-01-01T08:00:00")
+A0_M, A0_G = 100.0, 10.0
+
+
+# === Inputs ===
+def make_hours(n):
+	return np.linspace(0.0, 500.0, n)
+
+
+def make_lines(n):
+	minutes = np.linspace(0, 500 * 60, n).astype("timedelta64[m]")
+	return np.datetime_as_string(MEASURED + minutes, unit="m").tolist()
+
+
+def make_study(n):
+	return Study(A0_M, A0_G, MEASURED.astype(object), [])
+
+
+def make_table(n):
+	times = (MEASURED + (make_hours(n) * 3600).astype("timedelta64[s]")).astype("datetime64[s]")
+	hours = timepoints.elapsed_hours(times, MEASURED)
+	result = bateman.evaluate(A0_M, A0_G, bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G, hours)
+	return DecayTable.from_result(times, result, A0_M, A0_G, MEASURED.astype(object))
+
+
+def make_frame(n):
+	return make_table(n).to_frame()
+
+
+# === Stages: setup(n) -> state, run(state) ===
+def _kernel_setup(n):
+	lambda_m, lambda_ITm, lambda_g = bateman.decay_constants(bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G)
+	return make_hours(n), lambda_m, lambda_ITm, lambda_g
+
+
+def _kernel(state):
+	hours, lambda_m, lambda_ITm, lambda_g = state
+	bateman.activity_Hg197g(A0_M, A0_G, lambda_ITm, lambda_m, lambda_g, hours)
+
+
+def _evaluate(hours):
+	bateman.evaluate(A0_M, A0_G, bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G, hours)
+
+
+def _evaluate_cached_setup(n):
+	hours = make_hours(n)
+	bateman.evaluate_cached(A0_M, A0_G, bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G, hours)
+	return hours
+
+
+def _evaluate_cached(hours):
+	bateman.evaluate_cached(2 * A0_M, A0_G, bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G, hours)
+
+
+def _fused_setup(dtype):
+	def setup(n):
+		return make_hours(n), bateman.allocate_result(n, dtype), dtype
+	return setup
+
+
+def _fused(state):
+	hours, out, dtype = state
+	bateman.evaluate_into(A0_M, A0_G, bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G, hours, out=out, dtype=dtype)
+
+
+def _parse(lines):
+	parsed = timepoints.parse_timepoints(lines)
+	if not parsed.ok:
+		raise RuntimeError("benchmark timepoints failed to parse")
+
+
+def _frame(table):
+	table.to_frame()
+
+
+def _equation_setup(n):
+	return equation.BATEMAN_EQUATION
+
+
+def _equation(text):
+	# Uncached render, the cost the memoization avoids
+	equation.render_png(text, fontset="stix", fontsize=16)
+
+
+def _plot_setup(n):
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+	import plot_canvas
+
+	fig = Figure(figsize=(8, 4), dpi=100)
+	FigureCanvasAgg(fig)
+	ax = fig.add_subplot()
+	r = bateman.evaluate(A0_M, A0_G, bateman.HALFLIFE_HG197M, bateman.HALFLIFE_HG197G, make_hours(n))
+	lines = [ax.plot([], [])[0] for _ in range(2)]
+	return fig, ax, lines, r, plot_canvas
+
+
+def _plot(state):
+	# Decimate to the axes width and draw, as DecayPlotCanvas.update_data does
+	fig, ax, lines, r, plot_canvas = state
+	width = int(ax.get_window_extent().width)
+	keep = plot_canvas.decimate(r.hours, [r.activity_m, r.activity_g], width * plot_canvas.POINTS_PER_PIXEL)
+	for line, y in zip(lines, (r.activity_m, r.activity_g)):
+		line.set_data(r.hours[keep], y[keep])
+	ax.relim()
+	ax.autoscale_view()
+	fig.canvas.draw()
+
+
+def _export_setup(ext):
+	def setup(n):
+		fd, path = tempfile.mkstemp(suffix=ext)
+		os.close(fd)
+		return path, make_study(n), make_frame(n)
+	return setup
+
+
+def _export(state):
+	path, study, frame = state
+	export.write_report(path, study, frame)
+
+
+def _export_teardown(state):
+	os.remove(state[0])
+
+
+# name: (setup, run, teardown, largest size)
+STAGES = {
+	"kernel": (_kernel_setup, _kernel, None, None),
+	"evaluate": (make_hours, _evaluate, None, None),
+	"evaluate_cached": (_evaluate_cached_setup, _evaluate_cached, None, None),
+	"evaluate_fused": (_fused_setup(np.float64), _fused, None, None),
+	"evaluate_fused_f32": (_fused_setup(np.float32), _fused, None, None),
+	"parse": (make_lines, _parse, None, None),
+	"frame": (make_table, _frame, None, None),
+	"equation": (_equation_setup, _equation, None, None),
+	"plot": (_plot_setup, _plot, None, None),
+	"export_csv": (_export_setup(".csv"), _export, _export_teardown, DEFAULT_MAX_EXPORT),
+	"export_parquet": (_export_setup(".parquet"), _export, _export_teardown, DEFAULT_MAX_EXPORT),
+	"export_xlsx": (_export_setup(".xlsx"), _export, _export_teardown, DEFAULT_MAX_EXPORT),
+}
+# Stages whose cost does not depend on the number of timepoints
+SIZE_INDEPENDENT = {"equation"}
+
+
+# === Measurement ===
+def measure(stage, n, repeat):
+	setup, run, teardown, _ = STAGES[stage]
+	times = []
+	for _ in range(repeat):
+		state = setup(n)
+		try:
+			calls = 0
+			start = time.perf_counter()
+			while True:
+				run(state)
+				calls += 1
+				elapsed = time.perf_counter() - start
+				if elapsed >= MIN_RUN_S:
+					break
+			times.append(elapsed / calls)
+		finally:
+			if teardown:
+				teardown(state)
+
+	state = setup(n)
+	try:
+		tracemalloc.start()
+		run(state)
+		_, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+		if teardown:
+			teardown(state)
+
+	best = min(times)
+	return {
+		"stage": stage,
+		"size": n,
+		"best_s": round(best, 6),
+		"median_s": round(float(np.median(times)), 6),
+		"throughput_per_s": round(n / best, 1) if stage not in SIZE_INDEPENDENT else None,
+		"peak_mb": round(peak / 2**20, 3),
+	}
+
+
+def git_revision():
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True,
+		).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def load_history(path):
+	history = {}
+	if path and os.path.exists(path):
+		with open(path, encoding="utf-8") as f:
+			for line in f:
+				record = json.loads(line)
+				if record.get("benchmark") == "pipeline":
+					history[(record["stage"], record["size"])] = record
+	return history
+
+
+def parse_sizes(text):
+	return [int(float(s)) for s in text.split(",") if s.strip()]
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--sizes", type=parse_sizes, default=DEFAULT_SIZES, help="comma-separated timepoint counts, e.g. 1e2,1e5")
+	parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated subset of: {', '.join(STAGES)}")
+	parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage and size (best is reported)")
+	parser.add_argument("--max-export", type=float, default=DEFAULT_MAX_EXPORT, help="largest size for the export stages")
+	parser.add_argument("--json", help="append result records to this JSON-lines file")
+	parser.add_argument("--compare", action="store_true", help="compare with the last records in --json")
+	args = parser.parse_args(argv)
+
+	stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+	unknown = set(stages) - set(STAGES)
+	if unknown:
+		parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+	previous = load_history(args.json) if args.compare else {}
+
+	common = {
+		"benchmark": "pipeline",
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"version": export.APP_VERSION,
+		"revision": git_revision(),
+		"python": sys.version.split()[0],
+		"numpy": np.__version__,
+		"platform": sys.platform,
+		"repeat": args.repeat,
+	}
+	records = []
+	print(f"{'stage':<20} {'size':>10} {'best (ms)':>10} {'items/s':>14} {'peak MB':>10}  vs last")
+	for stage in stages:
+		limit = STAGES[stage][3]
+		if limit is not None:
+			limit = int(args.max_export)
+		if stage == "export_xlsx":
+			limit = min(limit, XLSX_MAX_ROWS)
+		sizes = args.sizes[:1] if stage in SIZE_INDEPENDENT else args.sizes
+		for n in sizes:
+			if limit is not None and n > limit:
+				continue
+			record = dict(common, **measure(stage, n, args.repeat))
+			records.append(record)
+
+			change = ""
+			last = previous.get((stage, n))
+			if last and last.get("best_s"):
+				ratio = record["best_s"] / last["best_s"]
+				change = f"{ratio:.2f}x ({last.get('revision') or last['timestamp']})"
+				if ratio > 1.1:
+					change += "  SLOWER"
+			throughput = f"{record['throughput_per_s']:,.0f}" if record["throughput_per_s"] else "-"
+			print(f"{stage:<20} {n:>10,} {record['best_s'] * 1e3:>10.3f} {throughput:>14} {record['peak_mb']:>10.1f}  {change}")
+			sys.stdout.flush()
+
+	if args.json:
+		with open(args.json, "a", encoding="utf-8") as f:
+			for record in records:
+				f.write(json.dumps(record) + "\n")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
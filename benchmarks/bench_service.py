@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Service benchmark: latency and throughput of ``service.py`` on localhost.
+
+Starts the service in this process on a free port (or targets a running one
+with ``--url``) and sends ``/evaluate`` requests from several concurrent
+clients, each on its own keep-alive connection. Reports latency percentiles
+and request/study/timepoint throughput.
+
+Usage:
+	python benchmarks/bench_service.py [--clients 4] [--requests 200] [--studies 10]
+		[--timepoints 100] [--url http://127.0.0.1:8765] [--json history.jsonl]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import export   # noqa: E402
+import service  # noqa: E402
+
+MEASURED = np.datetime64("2025-01-01T08:00:00")
+
+
+def make_payload(studies, n_timepoints):
+	minutes = np.linspace(0, 500 * 60, n_timepoints).astype("timedelta64[m]")
+	lines = np.datetime_as_string(MEASURED + minutes, unit="m").tolist()
+	return {"studies": [
+		{
+			"name": f"study_{i}",
+			"A0_m": 100.0 + i,
+			"A0_g": 10.0,
+			"measured_time": str(MEASURED),
+			"timepoints": lines,
+		}
+		for i in range(studies)
+	]}
+
+
+def start_local_service():
+	server = service.make_server("127.0.0.1", 0)
+	service.warm_up()
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	host, port = server.server_address[:2]
+	return server, f"http://{host}:{port}"
+
+
+def run_client(url, body, count):
+	"""Send ``count`` requests on one connection; returns the latency of each in seconds."""
+	parts = urlsplit(url)
+	conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+	headers = {"Content-Type": "application/json"}
+	latencies = []
+	try:
+		for _ in range(count):
+			start = time.perf_counter()
+			conn.request("POST", "/evaluate", body=body, headers=headers)
+			response = conn.getresponse()
+			reply = response.read()
+			latencies.append(time.perf_counter() - start)
+			if response.status != 200:
+				raise RuntimeError(f"HTTP {response.status}: {reply[:200]!r}")
+	finally:
+		conn.close()
+	return latencies
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--clients", type=int, default=4, help="concurrent connections")
+	parser.add_argument("--requests", type=int, default=200, help="requests in total")
+	parser.add_argument("--studies", type=int, default=10, help="studies per request")
+	parser.add_argument("--timepoints", type=int, default=100, help="timepoints per study")
+	parser.add_argument("--url", help="benchmark a running service instead of an in-process one")
+	parser.add_argument("--json", help="append a result record to this JSON-lines file")
+	args = parser.parse_args(argv)
+
+	server = None
+	url = args.url
+	if url is None:
+		server, url = start_local_service()
+	body = json.dumps(make_payload(args.studies, args.timepoints)).encode("utf-8")
+	per_client = [args.requests // args.clients + (i < args.requests % args.clients) for i in range(args.clients)]
+
+	try:
+		run_client(url, body, 1)  # connection and first-request warm-up
+		start = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=args.clients) as pool:
+			latencies = np.concatenate([
+				np.asarray(lat) for lat in pool.map(lambda count: run_client(url, body, count), per_client)
+			])
+		elapsed = time.perf_counter() - start
+	finally:
+		if server is not None:
+			server.shutdown()
+			server.server_close()
+
+	p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+	record = {
+		"benchmark": "service",
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"version": export.APP_VERSION,
+		"python": sys.version.split()[0],
+		"platform": sys.platform,
+		"clients": args.clients,
+		"requests": len(latencies),
+		"studies_per_request": args.studies,
+		"timepoints_per_study": args.timepoints,
+		"request_bytes": len(body),
+		"p50_ms": round(p50 * 1e3, 3),
+		"p95_ms": round(p95 * 1e3, 3),
+		"p99_ms": round(p99 * 1e3, 3),
+		"requests_per_s": round(len(latencies) / elapsed, 1),
+		"studies_per_s": round(len(latencies) * args.studies / elapsed, 1),
+		"timepoints_per_s": round(len(latencies) * args.studies * args.timepoints / elapsed, 1),
+	}
+	print(f"{record['requests']} requests from {args.clients} clients "
+		f"({args.studies} studies x {args.timepoints} timepoints each) in {elapsed:.2f} s")
+	print(f"latency p50 {record['p50_ms']:.1f} ms, p95 {record['p95_ms']:.1f} ms, p99 {record['p99_ms']:.1f} ms")
+	print(f"{record['requests_per_s']:,.1f} requests/s, {record['studies_per_s']:,.1f} studies/s, "
+		f"{record['timepoints_per_s']:,.0f} timepoints/s")
+
+	if args.json:
+		with open(args.json, "a", encoding="utf-8") as f:
+			f.write(json.dumps(record) + "\n")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
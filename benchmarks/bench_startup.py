@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: time from launching HgQuant.py to the first painted window.
+
+Launches the GUI several times with HGQUANT_STARTUP_PROBE set; the app prints
+a marker once its main window has been mapped and drawn, then quits. Needs a
+display (on a headless Linux box run it under xvfb-run).
+
+Usage:
+	python benchmarks/bench_startup.py [--runs N] [--json results.jsonl]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "HGQUANT_FIRST_PAINT"
+
+
+def measure_once(timeout=60):
+	env = dict(os.environ, HGQUANT_STARTUP_PROBE="1")
+	launched = time.time()
+	proc = subprocess.run(
+		[sys.executable, "HgQuant.py"], cwd=REPO_DIR, env=env,
+		capture_output=True, text=True, timeout=timeout,
+	)
+	for line in proc.stdout.splitlines():
+		if line.startswith(MARKER):
+			fields = dict(item.split("=", 1) for item in line.split()[1:])
+			return {
+				"first_paint_s": float(fields.pop("wall")) - launched,
+				"in_process_s": float(fields.pop("in_process")),
+				"loaded_at_first_paint": [name for name, flag in fields.items() if flag == "1"],
+			}
+	raise RuntimeError(f"HgQuant did not report first paint:\n{proc.stderr.strip()}")
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--json", help="append a result record to this JSON-lines file")
+	args = parser.parse_args(argv)
+
+	if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+		print("No DISPLAY available; run under xvfb-run to benchmark startup.", file=sys.stderr)
+		return 2
+
+	runs = [measure_once() for _ in range(args.runs)]
+	first_paint = [r["first_paint_s"] for r in runs]
+	record = {
+		"benchmark": "startup",
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+		"python": sys.version.split()[0],
+		"platform": sys.platform,
+		"runs": args.runs,
+		"first_paint_min_s": round(min(first_paint), 4),
+		"first_paint_median_s": round(statistics.median(first_paint), 4),
+		"in_process_median_s": round(statistics.median(r["in_process_s"] for r in runs), 4),
+		"loaded_at_first_paint": runs[-1]["loaded_at_first_paint"],
+	}
+	print(f"Time to first paint: median {record['first_paint_median_s']:.3f} s, "
+		f"min {record['first_paint_min_s']:.3f} s over {args.runs} runs")
+	if record["loaded_at_first_paint"]:
+		print(f"Loaded before first paint (should be deferred): {', '.join(record['loaded_at_first_paint'])}")
+
+	if args.json:
+		with open(args.json, "a", encoding="utf-8") as f:
+			f.write(json.dumps(record) + "\n")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
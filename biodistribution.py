@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Ex vivo biodistribution: bulk gamma-counter import, decay correction and %ID/g.
+
+Gamma-counter export files (CSV or Excel, one row per tube) are read in bulk
+and concatenated. Each tube has a count time, counts (CPM or any activity
+unit), an organ, an animal and a tissue weight. Every tube is decay-corrected
+to its animal's reference (injection) time in one broadcast Bateman pass, with
+the HgQuant decay factor of the counted photopeak; the corrected counts are
+then expressed as % injected dose and % injected dose per gram.
+
+The injected dose of an animal comes from an animals file (columns
+``animal``, ``dose`` in the same units as the corrected counts, and optionally
+``injection_time``), or from dose standard tubes: tubes whose organ is
+``--standard-label`` each hold ``--standard-fraction`` of the injected dose.
+
+Usage:
+	python biodistribution.py COUNTER_FILES... -o OUTPUT_DIR --A0-m 100 --A0-g 10 \\
+		--reference-time "2025-01-01 08:00" [--animals animals.csv] [--isotope m|g|total]
+		[--standard-fraction 0.01] [--column counts="Net CPM"] [--format csv|xlsx]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import bateman
+import timepoints
+
+# Standard field -> accepted column headers (compared case-insensitively)
+COLUMN_ALIASES = {
+	"sample": ("sample", "sample id", "tube", "tube id", "position", "rack/pos"),
+	"time": ("count time", "count_time", "time", "date/time", "datetime", "measurement time"),
+	"counts": ("cpm", "net cpm", "counts", "net counts", "activity"),
+	"organ": ("organ", "tissue", "sample type"),
+	"animal": ("animal", "animal id", "mouse", "rat", "subject"),
+	"weight": ("weight", "weight (g)", "mass", "mass (g)", "tissue weight"),
+}
+REQUIRED = ("time", "counts", "organ", "animal")
+ISOTOPES = ("m", "g", "total")
+STANDARD_LABEL = "standard"
+OUTPUT_FORMATS = ("csv", "xlsx")
+COUNTER_EXTENSIONS = (".csv", ".txt", ".xlsx", ".xls")
+
+
+# === Import ===
+def _read_table(path):
+	import pandas as pd
+
+	if path.lower().endswith((".xlsx", ".xls")):
+		return pd.read_excel(path)
+	# sep=None sniffs commas, semicolons and tabs, which counters all use
+	return pd.read_csv(path, sep=None, engine="python")
+
+
+def counter_files(sources):
+	"""Expand directories into the counter export files they contain."""
+	paths = []
+	for source in sources:
+		if os.path.isdir(source):
+			paths.extend(sorted(
+				os.path.join(source, f) for f in os.listdir(source) if f.lower().endswith(COUNTER_EXTENSIONS)
+			))
+		else:
+			paths.append(source)
+	return paths
+
+
+def resolve_columns(headers, overrides=None):
+	"""Map each standard field to a column of ``headers``; ``overrides`` maps fields to exact headers."""
+	overrides = overrides or {}
+	by_name = {str(h).strip().lower(): h for h in headers}
+	mapping = {}
+	for key, aliases in COLUMN_ALIASES.items():
+		if key in overrides:
+			if overrides[key] not in headers:
+				raise ValueError(f"Column {overrides[key]!r} for {key} not found")
+			mapping[key] = overrides[key]
+			continue
+		for alias in aliases:
+			if alias in by_name:
+				mapping[key] = by_name[alias]
+				break
+	missing = [key for key in REQUIRED if key not in mapping]
+	if missing:
+		raise ValueError(f"No column for {', '.join(missing)} (columns: {', '.join(map(str, headers))})")
+	return mapping
+
+
+def read_counter_files(paths, columns=None):
+	"""
+	Read and concatenate gamma-counter exports into one table with the
+	standard columns ``file, sample, time, counts, organ, animal, weight``.
+	"""
+	import pandas as pd
+
+	frames = []
+	for path in paths:
+		raw = _read_table(path)
+		mapping = resolve_columns(list(raw.columns), columns)
+		frame = pd.DataFrame({key: raw[header] for key, header in mapping.items()})
+		frame.insert(0, "file", os.path.basename(path))
+		frame["row"] = np.arange(2, len(frame) + 2)  # as numbered in a spreadsheet, header on row 1
+		frames.append(frame)
+	if not frames:
+		raise ValueError("No gamma-counter files given")
+	samples = pd.concat(frames, ignore_index=True)
+	if "sample" not in samples:
+		samples["sample"] = np.arange(1, len(samples) + 1)
+	if "weight" not in samples:
+		samples["weight"] = np.nan
+
+	samples["counts"] = _parse_numbers(samples, "counts", "count")
+	samples["weight"] = _parse_numbers(samples, "weight", "weight")
+	samples = samples.dropna(subset=["time", "counts"]).reset_index(drop=True)
+	samples["organ"] = samples["organ"].astype(str).str.strip()
+	samples["animal"] = samples["animal"].astype(str).str.strip()
+	samples["time"] = _parse_times(samples["time"], "count time")
+	return samples.drop(columns="row")
+
+
+def _parse_numbers(samples, key, what):
+	"""Numeric column ``key``; blank cells become NaN, anything else unparseable is an error."""
+	import pandas as pd
+
+	values = samples[key]
+	blank = values.isna() | values.astype(str).str.strip().eq("")
+	numbers = pd.to_numeric(values.where(~blank), errors="coerce")
+	bad = np.flatnonzero((numbers.isna() & ~blank).to_numpy())
+	if len(bad):
+		first = bad[0]
+		raise ValueError(f"{len(bad)} invalid {what}(s), first in {samples['file'].iloc[first]} row "
+			f"{samples['row'].iloc[first]}: {values.iloc[first]!r}")
+	return numbers
+
+
+def _parse_times(values, what):
+	import pandas as pd
+
+	if pd.api.types.is_datetime64_any_dtype(values):
+		return values.to_numpy().astype(timepoints.DATETIME_UNIT)
+	# Blank cells stay NaT; parse_timepoints would drop them and shift the rows
+	text = values.astype(object).where(values.notna(), "").astype(str).str.strip()
+	present = np.flatnonzero((text != "").to_numpy())
+	times = np.full(len(values), np.datetime64("NaT"), dtype=timepoints.DATETIME_UNIT)
+	parsed = timepoints.parse_timepoints(text.iloc[present].tolist())
+	if not parsed.ok:
+		n, bad = parsed.invalid[0]
+		raise ValueError(f"{len(parsed.invalid)} invalid {what}(s), first in row {present[n - 1] + 1}: {bad!r}")
+	times[present] = parsed.times
+	return times
+
+
+def read_animals(path):
+	"""Per-animal ``dose`` and optional ``injection_time``, indexed by animal."""
+	frame = _read_table(path)
+	frame.columns = [str(c).strip().lower() for c in frame.columns]
+	if "animal" not in frame:
+		raise ValueError(f"Animals file '{path}' needs an 'animal' column")
+	frame["animal"] = frame["animal"].astype(str).str.strip()
+	if "injection_time" in frame:
+		frame["injection_time"] = _parse_times(frame["injection_time"], "injection time")
+	return frame.set_index("animal")
+
+
+# === Correction ===
+def decay_factors(hours, A0_m, A0_g, t_half_m, t_half_g, branching=bateman.IT_BRANCHING, isotope="m"):
+	"""HgQuant decay factor of every tube for the counted photopeak (``m``, ``g``) or both (``total``)."""
+	if isotope not in ISOTOPES:
+		raise ValueError(f"isotope must be one of {', '.join(ISOTOPES)}")
+	r = bateman.evaluate(A0_m, A0_g, t_half_m, t_half_g, hours, branching)
+	if isotope == "m":
+		return r.decay_factor_m
+	if isotope == "g":
+		return r.decay_factor_g
+	return r.total / (np.asarray(A0_m, dtype=float) + np.asarray(A0_g, dtype=float))
+
+
+def correct_samples(samples, reference_time=None, A0_m=100.0, A0_g=0.0, t_half_m=bateman.HALFLIFE_HG197M,
+		t_half_g=bateman.HALFLIFE_HG197G, branching=bateman.IT_BRANCHING, isotope="m", animals=None,
+		standard_label=STANDARD_LABEL, standard_fraction=None):
+	"""
+	Decay-correct every tube and compute %ID and %ID/g, returning a new table.
+
+	Reference times come from ``animals["injection_time"]`` where given,
+	otherwise ``reference_time``. Doses come from ``animals["dose"]`` where
+	given, otherwise from the animal's standard tubes (or, when an animal has
+	none, the mean of all standards), each holding ``standard_fraction`` of
+	the dose. Standard tubes are kept in the table with a NaN %ID.
+	"""
+	samples = samples.copy()
+	animal = samples["animal"].to_numpy()
+	n = len(samples)
+
+	reference = np.full(n, np.datetime64("NaT"), dtype=timepoints.DATETIME_UNIT)
+	if reference_time is not None:
+		reference[:] = np.datetime64(reference_time, "s")
+	if animals is not None and "injection_time" in animals:
+		injected = animals["injection_time"].reindex(animal).to_numpy().astype(timepoints.DATETIME_UNIT)
+		reference = np.where(np.isnat(injected), reference, injected)
+	if np.isnat(reference).any():
+		missing = sorted(set(animal[np.isnat(reference)]))
+		raise ValueError(f"No reference time for animal(s) {', '.join(missing[:10])}; give --reference-time")
+
+	hours = (samples["time"].to_numpy().astype(timepoints.DATETIME_UNIT) - reference) / np.timedelta64(1, "h")
+	factors = decay_factors(hours, A0_m, A0_g, t_half_m, t_half_g, branching, isotope)
+	corrected = samples["counts"].to_numpy(dtype=float) / factors
+	samples["hours"] = hours
+	samples["decay_factor"] = factors
+	samples["corrected"] = corrected
+
+	is_standard = (samples["organ"].str.lower() == standard_label.lower()).to_numpy()
+	dose = np.full(n, np.nan)
+	if animals is not None and "dose" in animals:
+		dose = animals["dose"].astype(float).reindex(animal).to_numpy()
+	if np.isnan(dose).any() and is_standard.any():
+		if not standard_fraction:
+			raise ValueError("Dose standards need --standard-fraction (the fraction of the dose in each standard)")
+		import pandas as pd
+
+		per_standard = pd.Series(corrected[is_standard] / standard_fraction)
+		by_animal = per_standard.groupby(animal[is_standard]).mean()
+		from_standards = by_animal.reindex(animal).to_numpy()
+		from_standards = np.where(np.isnan(from_standards), per_standard.mean(), from_standards)
+		dose = np.where(np.isnan(dose), from_standards, dose)
+
+	pct_id = np.where(is_standard, np.nan, corrected / dose * 100)
+	samples["dose"] = dose
+	samples["pct_id"] = pct_id
+	samples["pct_id_per_g"] = pct_id / samples["weight"].to_numpy()
+	return samples
+
+
+# === Tables ===
+def idg_table(samples):
+	"""%ID/g by organ (rows) and animal (columns), tubes of the same organ and animal averaged."""
+	tissue = samples.dropna(subset=["pct_id_per_g"])
+	return tissue.pivot_table(index="organ", columns="animal", values="pct_id_per_g", aggfunc="mean")
+
+
+def organ_summary(samples):
+	"""Mean, standard deviation and number of animals of %ID and %ID/g per organ."""
+	tissue = samples.dropna(subset=["pct_id"])
+	per_animal = tissue.groupby(["organ", "animal"])[["pct_id", "pct_id_per_g"]].mean()
+	summary = per_animal.groupby(level="organ").agg(["mean", "std", "count"])
+	summary.columns = [f"{value} {stat}" for value, stat in summary.columns]
+	return summary.reset_index()
+
+
+def write_outputs(output_dir, samples, fmt="csv"):
+	"""Write the per-tube table, the %ID/g table and the organ summary; returns the written paths."""
+	os.makedirs(output_dir, exist_ok=True)
+	tables = {
+		"samples": samples,
+		"idg_by_animal": idg_table(samples).reset_index(),
+		"organ_summary": organ_summary(samples),
+	}
+	if fmt == "xlsx":
+		import pandas as pd
+		import export
+
+		path = os.path.join(output_dir, "biodistribution.xlsx")
+		with pd.ExcelWriter(path, engine=export.excel_engine()) as writer:
+			for name, table in tables.items():
+				table.to_excel(writer, sheet_name=name, index=False)
+		return [path]
+	paths = []
+	for name, table in tables.items():
+		path = os.path.join(output_dir, f"{name}.csv")
+		table.to_csv(path, index=False)
+		paths.append(path)
+	return paths
+
+
+# === Command line ===
+def parse_column_overrides(items):
+	overrides = {}
+	for item in items or []:
+		key, sep, header = item.partition("=")
+		if not sep or key not in COLUMN_ALIASES:
+			raise ValueError(f"--column expects FIELD=HEADER with FIELD one of {', '.join(COLUMN_ALIASES)}")
+		overrides[key] = header
+	return overrides
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="biodistribution.py", description="Decay-correct gamma-counter biodistribution data to %ID/g.")
+	parser.add_argument("files", nargs="+", help="gamma-counter export files (CSV or Excel) or folders of them")
+	parser.add_argument("-o", "--output-dir", default="biodistribution_output")
+	parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv")
+	parser.add_argument("--A0-m", type=float, required=True, help="Hg197m activity at the reference time")
+	parser.add_argument("--A0-g", type=float, required=True, help="Hg197g activity at the reference time")
+	parser.add_argument("--reference-time", help="injection time, for animals without one in --animals")
+	parser.add_argument("--t-half-m", type=float, default=bateman.HALFLIFE_HG197M)
+	parser.add_argument("--t-half-g", type=float, default=bateman.HALFLIFE_HG197G)
+	parser.add_argument("--isotope", choices=ISOTOPES, default="m", help="photopeak the counts were taken in")
+	parser.add_argument("--animals", help="CSV/Excel with animal, dose and optionally injection_time")
+	parser.add_argument("--standard-label", default=STANDARD_LABEL, help="organ name of dose standard tubes")
+	parser.add_argument("--standard-fraction", type=float, help="fraction of the injected dose in each standard")
+	parser.add_argument("--column", action="append", metavar="FIELD=HEADER",
+		help=f"use HEADER for FIELD ({', '.join(COLUMN_ALIASES)}); repeatable")
+	return parser
+
+
+def main(argv=None):
+	args = build_parser().parse_args(argv)
+	try:
+		reference_time = None
+		if args.reference_time:
+			from dateutil import parser as date_parser
+			reference_time = date_parser.parse(args.reference_time)
+		paths = counter_files(args.files)
+		samples = read_counter_files(paths, parse_column_overrides(args.column))
+		animals = read_animals(args.animals) if args.animals else None
+		samples = correct_samples(
+			samples, reference_time, args.A0_m, args.A0_g, args.t_half_m, args.t_half_g,
+			isotope=args.isotope, animals=animals,
+			standard_label=args.standard_label, standard_fraction=args.standard_fraction,
+		)
+		written = write_outputs(args.output_dir, samples, args.format)
+	except (OSError, ValueError) as e:
+		print(f"Error: {e}", file=sys.stderr)
+		return 1
+
+	no_dose = samples["dose"].isna() & samples["pct_id"].isna()
+	print(f"Corrected {len(samples)} tubes from {len(paths)} file(s), "
+		f"{samples['animal'].nunique()} animals, {samples['organ'].nunique()} organs")
+	if no_dose.any():
+		print(f"Warning: no dose for {int(no_dose.sum())} tube(s); give --animals or dose standards", file=sys.stderr)
+	for path in written:
+		print(f"Written {path}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
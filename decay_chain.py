@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+General Bateman solver for linear decay chains with branching.
+
+A chain is a list of members in topological order (every parent before its
+daughters) with decay constants and branching ratios. Activities are evaluated
+for many parameter sets and timepoints in one vectorized call: batch shapes are
+(P, n) for per-member parameters, (P,) for branching ratios and (T,) or (P, T)
+for time, and results come back as (P, n, T) — or (n, T) when nothing is batched.
+
+The closed-form Bateman coefficients are used when all decay constants are
+distinct; otherwise the chain falls back to a batched matrix exponential.
+"""
+
+import numpy as np
+
+import bateman
+
+# Decay constants closer than this (relative) are treated as degenerate
+DEGENERATE_RTOL = 1e-9
+
+
+class DecayChain:
+	def __init__(self, names, decay_constants, branches=None):
+		"""
+		``decay_constants`` is (n,) or (P, n) in h⁻¹; ``branches`` maps
+		``(parent, daughter)`` (names or indices) to a branching ratio, scalar or (P,).
+		"""
+		self.names = list(names)
+		n = len(self.names)
+		self.decay_constants = np.asarray(decay_constants, dtype=float)
+		if self.decay_constants.shape[-1] != n:
+			raise ValueError(f"Expected {n} decay constants, got shape {self.decay_constants.shape}")
+
+		self.branches = {}
+		for (parent, daughter), ratio in (branches or {}).items():
+			i, j = self.index(parent), self.index(daughter)
+			if i >= j:
+				raise ValueError(f"Branch {self.names[i]} → {self.names[j]}: members must be in topological order")
+			self.branches[(i, j)] = np.asarray(ratio, dtype=float)
+
+	@classmethod
+	def from_half_lives(cls, names, half_lives, branches=None):
+		return cls(names, np.log(2) / np.asarray(half_lives, dtype=float), branches)
+
+	def index(self, member):
+		return member if isinstance(member, (int, np.integer)) else self.names.index(member)
+
+	def __len__(self):
+		return len(self.names)
+
+	# === Batched parameters ===
+	def _batched(self, A0, t):
+		"""Broadcast inputs to (P, n) constants and activities, (P, T) time and (P,) ratios."""
+		n = len(self)
+		A0 = np.asarray(A0, dtype=float)
+		t = np.asarray(t, dtype=float)
+		batched = (self.decay_constants.ndim > 1 or A0.ndim > 1 or t.ndim > 1
+			or any(r.ndim > 0 for r in self.branches.values()))
+
+		lam = np.atleast_2d(self.decay_constants)
+		A0 = np.atleast_2d(A0)
+		t2 = np.atleast_2d(t)
+		ratios = {key: np.atleast_1d(r) for key, r in self.branches.items()}
+
+		P = max([lam.shape[0], A0.shape[0], t2.shape[0] if t.ndim == 2 else 1] + [len(r) for r in ratios.values()])
+		lam = np.broadcast_to(lam, (P, n))
+		A0 = np.broadcast_to(A0, (P, n))
+		t2 = np.broadcast_to(t2, (P, t2.shape[-1]))
+		ratios = {key: np.broadcast_to(r, (P,)) for key, r in ratios.items()}
+		return lam, A0, t2, ratios, batched
+
+	def is_degenerate(self, lam):
+		lam = np.atleast_2d(lam)
+		diff = np.abs(lam[:, :, np.newaxis] - lam[:, np.newaxis, :])
+		scale = np.maximum(np.abs(lam[:, :, np.newaxis]), np.abs(lam[:, np.newaxis, :]))
+		off_diagonal = ~np.eye(lam.shape[1], dtype=bool)
+		return bool(np.any((diff <= DEGENERATE_RTOL * scale) & off_diagonal))
+
+	# === Solvers ===
+	def coefficients(self, lam, N0, ratios):
+		"""
+		Bateman coefficients c (P, n, n) with N_j(t) = Σ_k c[j, k] · exp(-λ_k t).
+
+		From dN_j/dt = -λ_j N_j + Σ_i b_ij λ_i N_i:
+		c[j, k] = Σ_i b_ij λ_i c[i, k] / (λ_j - λ_k) for k < j, and
+		c[j, j] = N0_j - Σ_{k<j} c[j, k].
+		"""
+		P, n = lam.shape
+		c = np.zeros((P, n, n))
+		for j in range(n):
+			feed = np.zeros((P, j))
+			for (i, daughter), b in ratios.items():
+				if daughter == j:
+					feed += (b * lam[:, i])[:, np.newaxis] * c[:, i, :j]
+			if j:
+				c[:, j, :j] = feed / (lam[:, j, np.newaxis] - lam[:, :j])
+			c[:, j, j] = N0[:, j] - c[:, j, :j].sum(axis=1)
+		return c
+
+	def rate_matrix(self, lam, ratios):
+		"""The (P, n, n) matrix M with dN/dt = M N."""
+		P, n = lam.shape
+		M = np.zeros((P, n, n))
+		idx = np.arange(n)
+		M[:, idx, idx] = -lam
+		for (i, j), b in ratios.items():
+			M[:, j, i] += b * lam[:, i]
+		return M
+
+	def atoms(self, A0, t, method="auto"):
+		"""Number of atoms (in activity·h units) of every member: (P, n, T) or (n, T)."""
+		lam, A0, t, ratios, batched = self._batched(A0, t)
+		N0 = A0 / lam
+		if method == "auto":
+			method = "expm" if self.is_degenerate(lam) else "bateman"
+
+		if method == "bateman":
+			c = self.coefficients(lam, N0, ratios)
+			basis = np.exp(-lam[:, :, np.newaxis] * t[:, np.newaxis, :])   # (P, n, T)
+			N = np.einsum("pjk,pkt->pjt", c, basis)
+		elif method == "expm":
+			M = self.rate_matrix(lam, ratios)
+			E = expm(M[:, np.newaxis] * t[:, :, np.newaxis, np.newaxis])   # (P, T, n, n)
+			N = np.einsum("ptjk,pk->pjt", E, N0)
+		else:
+			raise ValueError(f"Unknown method: {method}")
+		return N if batched else N[0]
+
+	def activities(self, A0, t, method="auto"):
+		"""Activities of every member for initial activities ``A0``: (P, n, T) or (n, T)."""
+		N = self.atoms(A0, t, method)
+		lam = np.atleast_2d(self.decay_constants)
+		lam = lam[:, :, np.newaxis] if N.ndim == 3 else lam[0][:, np.newaxis]
+		return lam * N
+
+
+def expm(A):
+	"""Batched matrix exponential over the last two axes (scaling and squaring, Taylor)."""
+	A = np.asarray(A, dtype=float)
+	norm = np.abs(A).sum(axis=-2).max(axis=-1)   # 1-norm per matrix
+	squarings = np.maximum(0, np.ceil(np.log2(np.maximum(norm, 1e-300) / 0.5))).astype(int)
+	s_max = int(squarings.max()) if squarings.size else 0
+	scaled = A / (2.0 ** squarings)[..., np.newaxis, np.newaxis]
+
+	n = A.shape[-1]
+	identity = np.broadcast_to(np.eye(n), A.shape)
+	result = identity.copy()
+	term = identity.copy()
+	for k in range(1, 19):
+		term = term @ scaled / k
+		result = result + term
+
+	# Square each matrix as many times as it was scaled
+	for step in range(s_max):
+		square = step < squarings
+		result = np.where(square[..., np.newaxis, np.newaxis], result @ result, result)
+	return result
+
+
+# === HgQuant's ¹⁹⁷mHg → ¹⁹⁷gHg model as a chain ===
+HG197_MEMBERS = ["Hg197m", "Hg197m (IT feed)", "Hg197g"]
+
+
+def hg197_chain(t_half_m=bateman.HALFLIFE_HG197M, t_half_g=bateman.HALFLIFE_HG197G, branching=bateman.IT_BRANCHING):
+	"""
+	The chain that reproduces :func:`bateman.evaluate`.
+
+	HgQuant's model feeds ¹⁹⁷gHg through the IT partial decay constant
+	λ_ITm = b·λm, i.e. as if from a feeder decaying with λ_ITm that starts with
+	the same atoms as ¹⁹⁷mHg; ¹⁹⁷mHg itself decays with λm. Use
+	:func:`hg197_initial_activities` for the matching initial activities.
+	"""
+	lambda_m, lambda_ITm, lambda_g = bateman.decay_constants(t_half_m, t_half_g, branching)
+	lam = np.stack(np.broadcast_arrays(lambda_m, lambda_ITm, lambda_g), axis=-1)
+	return DecayChain(HG197_MEMBERS, lam, {(1, 2): 1.0})
+
+
+def hg197_initial_activities(chain, A0_m, A0_g):
+	"""Initial activities for :func:`hg197_chain` from the ¹⁹⁷mHg/¹⁹⁷gHg activities."""
+	lam = np.atleast_2d(chain.decay_constants)
+	A0_m = np.asarray(A0_m, dtype=float)
+	A0_feed = A0_m * lam[..., 1] / lam[..., 0]   # same atoms as ¹⁹⁷mHg
+	A0 = np.stack(np.broadcast_arrays(A0_m, A0_feed, np.asarray(A0_g, dtype=float)), axis=-1)
+	return A0 if chain.decay_constants.ndim > 1 or A0.shape[0] > 1 else A0[0]
+
+
+def evaluate_hg197(A0_m, A0_g, t_half_m, t_half_g, hours, branching=bateman.IT_BRANCHING, method="auto"):
+	"""Hg-197 activities (¹⁹⁷mHg, ¹⁹⁷gHg) through the general solver; matches ``bateman.evaluate``."""
+	chain = hg197_chain(t_half_m, t_half_g, branching)
+	activities = chain.activities(hg197_initial_activities(chain, A0_m, A0_g), hours, method)
+	return activities[..., 0, :], activities[..., 2, :]
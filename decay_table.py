@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Compact, columnar decay table.
+
+A :class:`DecayTable` keeps the timepoints as ``datetime64[s]`` and only the
+two activity columns as float64; the isotope names, activity unit and model
+inputs are stored once for the whole table. Elapsed hours, totals, percentages
+and decay factors are recomputed from those on access with the same operations
+as :func:`bateman.evaluate`, so they are bit-identical to it. Column headers,
+timestamp strings and the pandas ``activities_df`` layout are produced only
+when a display or an export asks for them.
+
+Per row this is 24 bytes, against ~137 for a DataFrame holding the textbox
+strings as Python objects (~73 bytes each) and every output column.
+"""
+
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+
+import numpy as np
+
+import bateman
+import timepoints
+
+
+def format_time(value):
+	"""Display string of one ``datetime64`` timepoint, e.g. ``2025-01-01 08:00:00``."""
+	return str(value).replace("T", " ")
+
+
+def format_times(times):
+	"""Display strings of a ``datetime64`` array (NaT stays ``NaT``)."""
+	return np.char.replace(np.datetime_as_string(np.asarray(times, dtype=timepoints.DATETIME_UNIT), unit="s"), "T", " ")
+
+
+@dataclass
+class DecayTable:
+	times: np.ndarray             # datetime64[s], one per row
+	activity_m: np.ndarray
+	activity_g: np.ndarray
+	A0_m: float
+	A0_g: float
+	measured_time: datetime
+	lambda_m: float
+	lambda_ITm: float
+	lambda_g: float
+	isotope_m: str = "Hg197m"
+	isotope_g: str = "Hg197g"
+	activity_unit: str = "KBq"
+	percentiles: dict = None      # uncertainty.monte_carlo() output, if any
+	spec: object = field(default=None, repr=False)  # its UncertaintySpec
+
+	@classmethod
+	def from_result(cls, times, result, A0_m, A0_g, measured_time, isotope_m="Hg197m", isotope_g="Hg197g",
+			activity_unit="KBq", percentiles=None, spec=None):
+		"""Keep the timestamps and activities of a single-study :class:`bateman.BatemanResult`."""
+		return cls(
+			times=np.asarray(times, dtype=timepoints.DATETIME_UNIT),
+			activity_m=np.ascontiguousarray(result.activity_m, dtype=float),
+			activity_g=np.ascontiguousarray(result.activity_g, dtype=float),
+			A0_m=float(A0_m),
+			A0_g=float(A0_g),
+			measured_time=measured_time,
+			lambda_m=float(result.lambda_m),
+			lambda_ITm=float(result.lambda_ITm),
+			lambda_g=float(result.lambda_g),
+			isotope_m=isotope_m,
+			isotope_g=isotope_g,
+			activity_unit=activity_unit,
+			percentiles=percentiles,
+			spec=spec,
+		)
+
+	def take(self, rows):
+		"""A table of only ``rows``, sharing the scalar inputs; its derived columns use the same formulas."""
+		return replace(self, times=self.times[rows], activity_m=self.activity_m[rows], activity_g=self.activity_g[rows],
+			percentiles=None, spec=None)
+
+	def patch(self, rows, times, activity_m, activity_g):
+		"""Overwrite ``rows`` in place, e.g. after a live edit of some timepoints."""
+		self.times[rows] = times
+		self.activity_m[rows] = activity_m
+		self.activity_g[rows] = activity_g
+
+	def __len__(self):
+		return len(self.times)
+
+	@property
+	def nbytes(self):
+		"""Bytes held per table (the Monte Carlo percentiles not included)."""
+		return self.times.nbytes + self.activity_m.nbytes + self.activity_g.nbytes
+
+	# === Derived columns, computed on access ===
+	@property
+	def hours(self):
+		return timepoints.elapsed_hours(self.times, self.measured_time)
+
+	@property
+	def total(self):
+		return self.activity_m + self.activity_g
+
+	@property
+	def pct_m(self):
+		return self.activity_m / self.total * 100
+
+	@property
+	def pct_g(self):
+		return self.activity_g / self.total * 100
+
+	@property
+	def decay_factor_m(self):
+		return self.activity_m / self.A0_m
+
+	@property
+	def decay_factor_g(self):
+		return self.activity_g / (self.A0_m + self.A0_g)
+
+	def result(self):
+		"""The table as a :class:`bateman.BatemanResult` (all columns materialized)."""
+		total = self.total
+		return bateman.BatemanResult(
+			hours=self.hours,
+			activity_m=self.activity_m,
+			activity_g=self.activity_g,
+			total=total,
+			pct_m=self.activity_m / total * 100,
+			pct_g=self.activity_g / total * 100,
+			decay_factor_m=self.decay_factor_m,
+			decay_factor_g=self.decay_factor_g,
+			lambda_m=self.lambda_m,
+			lambda_ITm=self.lambda_ITm,
+			lambda_g=self.lambda_g,
+		)
+
+	# === Display and export ===
+	def headers(self):
+		"""Column header of each output field, as in ``activities_df``."""
+		return {
+			"hours": "Hours Elapsed",
+			"activity_m": f"{self.isotope_m} ({self.activity_unit})",
+			"activity_g": f"{self.isotope_g} ({self.activity_unit})",
+			"pct_m": f"% {self.isotope_m}",
+			"pct_g": f"% {self.isotope_g}",
+			"decay_factor_m": "Decay Factor Hg-197m",
+			"decay_factor_g": "Decay Factor Hg-197g",
+		}
+
+	def time_labels(self, rows=slice(None)):
+		"""Display strings of the timepoints in ``rows`` (all by default)."""
+		return format_times(self.times[rows])
+
+	def to_frame(self):
+		"""
+		The ``activities_df`` layout for export: "Time Point" as ``datetime64``,
+		then the labelled numeric columns and any Monte Carlo percentiles.
+		"""
+		import pandas as pd
+
+		result = self.result()
+		columns = {"Time Point": self.times}
+		for name, header in self.headers().items():
+			columns[header] = getattr(result, name)
+		if self.percentiles is not None:
+			from uncertainty import percentile_columns
+
+			columns.update(percentile_columns(self.percentiles, self.spec, self.isotope_m, self.isotope_g, self.activity_unit))
+		return pd.DataFrame(columns)
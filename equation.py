@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Rendering of the Bateman equations shown next to the results.
+
+The image never changes between calculations, so it is rendered once per
+(equation text, font set, size, dpi) and served from memory afterwards, and
+optionally from a PNG cache on disk across sessions. Rendering goes through a
+standalone Figure inside ``rc_context`` so global matplotlib state is untouched.
+"""
+
+import hashlib
+import io
+import os
+import threading
+
+BATEMAN_EQUATION = (
+	r"$A_m(t) = A_{m0} \cdot e^{-\lambda_m t}$" "\n\n"
+	r"$A_g(t) = A_{g0} \cdot e^{-\lambda_g t} + \left("
+	r"\frac{\lambda_{ITm}}{\lambda_g - \lambda_{ITm}} \cdot \frac{\lambda_g}{\lambda_m} \cdot A_{m0} \cdot "
+	r"\left(e^{-\lambda_{ITm} t} - e^{-\lambda_g t}\right)"
+	r"\right)$"
+)
+
+_memory_cache = {}
+_lock = threading.Lock()
+
+
+def _cache_key(text, fontset, fontsize, dpi):
+	return (text, fontset, fontsize, dpi)
+
+
+def _disk_path(cache_dir, key):
+	digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+	return os.path.join(cache_dir, f"equation_{digest}.png")
+
+
+def render_png(text=BATEMAN_EQUATION, fontset="stix", fontsize=16, dpi=250):
+	"""Render mathtext ``text`` to PNG bytes without touching global rcParams."""
+	import matplotlib
+	from matplotlib.figure import Figure
+	from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+	with matplotlib.rc_context({"text.usetex": False, "font.size": fontsize, "mathtext.fontset": fontset}):
+		fig = Figure(figsize=(6, 2))
+		FigureCanvasAgg(fig)
+		ax = fig.add_subplot()
+		ax.text(0.5, 0.5, text, fontsize=fontsize, ha='center', va='center')
+		ax.axis("off")
+
+		buf = io.BytesIO()
+		fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight', transparent=True)
+	return buf.getvalue()
+
+
+def render_bateman_equation(text=BATEMAN_EQUATION, fontset="stix", fontsize=16, dpi=250, cache_dir=None):
+	"""
+	Return the equation as a PIL image, rendering it at most once per key.
+
+	With ``cache_dir`` the PNG is also read from / written to disk, so a new
+	session skips matplotlib entirely.
+	"""
+	key = _cache_key(text, fontset, fontsize, dpi)
+	with _lock:
+		image = _memory_cache.get(key)
+	if image is not None:
+		return image
+
+	image = None
+	path = _disk_path(cache_dir, key) if cache_dir else None
+	if path and os.path.exists(path):
+		try:
+			with open(path, "rb") as f:
+				image = _decode(f.read())
+		except (OSError, SyntaxError, ValueError):
+			image = None  # unreadable, truncated or corrupt: render again and overwrite it
+
+	if image is None:
+		png = render_png(text, fontset, fontsize, dpi)
+		if path:
+			try:
+				os.makedirs(cache_dir, exist_ok=True)
+				tmp = f"{path}.{os.getpid()}.tmp"
+				with open(tmp, "wb") as f:
+					f.write(png)
+				os.replace(tmp, path)
+			except OSError:
+				pass  # the disk cache is best effort
+		image = _decode(png)
+
+	with _lock:
+		_memory_cache[key] = image
+	return image
+
+
+def _decode(png):
+	from PIL import Image
+
+	image = Image.open(io.BytesIO(png))
+	image.load()
+	return image
+
+
+def clear_cache():
+	with _lock:
+		_memory_cache.clear()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Interactive parameter-sweep explorer for the ¹⁹⁷mHg/¹⁹⁷gHg percentage curves.
+
+Sliders set the initial activities and half-lives. The left panel is a heatmap
+of the ¹⁹⁷mHg percentage over elapsed time × initial activity ratio
+A0_g/A0_m (the percentages depend on the activities only through this
+ratio), evaluated as one broadcast ratio (P, 1) × hours (T,) grid; a line marks
+the current ratio. The right panel shows the percentage curves of the current
+activities.
+
+The figure is drawn once. The heatmap, marker and curves are animated artists
+redrawn with blitting over a cached background, so a slider drag only swaps
+array data instead of rebuilding the figure. Heatmaps are kept in a small LRU
+cache keyed by the half-lives, and the exponentials come from the engine's
+basis cache, so moving the activity sliders never recomputes the grid.
+
+Usage:
+	python explorer.py [--A0-m 100] [--A0-g 10] [--t-half-m 23.8] [--t-half-g 64.14]
+		[--hours 240] [--ratios 0.01:100]
+"""
+
+import argparse
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+import bateman
+
+# Grid resolution: timepoints along the heatmap and curves, activity ratios down the heatmap
+TIME_POINTS = 600
+RATIO_POINTS = 200
+DEFAULT_HOURS = 240.0
+DEFAULT_RATIOS = (1e-2, 1e2)
+# Heatmap grids kept for revisited half-life settings
+GRID_CACHE_SIZE = 64
+# Rendered heatmap images kept for revisited half-life settings (dropped on resize)
+LAYER_CACHE_SIZE = 16
+# Half-life sliders move in these steps (hours) and span this fraction either side of the start value
+HALF_LIFE_STEP = 0.1
+HALF_LIFE_SPAN = 0.5
+
+
+class SweepModel:
+	"""The time × activity-ratio grid and its cached percentage heatmaps."""
+
+	def __init__(self, hours=DEFAULT_HOURS, ratios=DEFAULT_RATIOS, branching=bateman.IT_BRANCHING,
+			time_points=TIME_POINTS, ratio_points=RATIO_POINTS, cache_size=GRID_CACHE_SIZE):
+		lo, hi = ratios
+		if not 0 < lo < hi:
+			raise ValueError("The activity ratio range must be positive and increasing")
+		if hours <= 0:
+			raise ValueError("The time range must be positive")
+		self.hours = np.linspace(0.0, float(hours), time_points)
+		self.ratios = np.logspace(np.log10(lo), np.log10(hi), ratio_points)
+		self.branching = branching
+		self.cache_size = cache_size
+		self._grids = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def grid(self, t_half_m, t_half_g):
+		"""¹⁹⁷mHg percentage, shape (ratios, hours), for A0_m = 1 and A0_g = each ratio."""
+		key = (float(t_half_m), float(t_half_g))
+		grid = self._grids.get(key)
+		if grid is not None:
+			self._grids.move_to_end(key)
+			self.hits += 1
+			return grid
+		self.misses += 1
+		grid = bateman.evaluate_cached(1.0, self.ratios[:, np.newaxis], t_half_m, t_half_g, self.hours, self.branching).pct_m
+		self._grids[key] = grid
+		if len(self._grids) > self.cache_size:
+			self._grids.popitem(last=False)
+		return grid
+
+	def curves(self, A0_m, A0_g, t_half_m, t_half_g):
+		"""(pct_m, pct_g) over the time grid for one set of parameters."""
+		result = bateman.evaluate_cached(A0_m, A0_g, t_half_m, t_half_g, self.hours, self.branching)
+		return result.pct_m, result.pct_g
+
+
+class ExplorerFigure:
+	"""
+	Sliders, heatmap and curves on a matplotlib ``Figure``, redrawn by blitting.
+
+	Works with any canvas that supports ``copy_from_bbox``/``blit`` (TkAgg
+	inside HgQuant, or a pyplot window from the command line).
+	"""
+
+	def __init__(self, figure, model, A0_m, A0_g, t_half_m, t_half_g, isotope_m="Hg197m", isotope_g="Hg197g",
+			activity_unit="KBq"):
+		from matplotlib.ticker import FuncFormatter, MaxNLocator
+		from matplotlib.widgets import Slider
+
+		if A0_m <= 0 or A0_g < 0:
+			raise ValueError(f"The explorer needs A0 of {isotope_m} > 0 and A0 of {isotope_g} >= 0")
+		self.figure = figure
+		self.model = model
+		self.background = None
+		self._ratio_range = np.log10(model.ratios[[0, -1]])
+
+		grid = figure.add_gridspec(2, 2, height_ratios=(1, 0.28), left=0.15, right=0.94, top=0.92, bottom=0.06, hspace=0.3)
+		self.ax_map = figure.add_subplot(grid[0, 0])
+		self.ax_curves = figure.add_subplot(grid[0, 1])
+		slider_grid = grid[1, :].subgridspec(4, 1, hspace=0.8)
+		slider_axes = [figure.add_subplot(slider_grid[i]) for i in range(4)]
+
+		t_max = model.hours[-1]
+		self.image = self.ax_map.imshow(
+			model.grid(t_half_m, t_half_g), origin="lower", aspect="auto", cmap="viridis", vmin=0, vmax=100,
+			extent=(0, t_max, *self._ratio_range), interpolation="nearest", animated=True,
+		)
+		self.marker = self.ax_map.axhline(self._ratio_range[0], color="white", lw=1.2, ls="--", animated=True)
+		self.ax_map.yaxis.set_major_locator(MaxNLocator(integer=True))  # whole decades of the ratio
+		self.ax_map.yaxis.set_major_formatter(FuncFormatter(lambda v, _: f"{10 ** v:g}"))
+		self.ax_map.set_xlabel("Hours Elapsed")
+		self.ax_map.set_ylabel(f"A0 {isotope_g} / A0 {isotope_m}")
+		self.ax_map.set_title(f"% {isotope_m}")
+		figure.colorbar(self.image, ax=self.ax_map, label="Percentage (%)")
+
+		self.line_m, = self.ax_curves.plot(model.hours, np.zeros_like(model.hours), label=f"% {isotope_m}", animated=True)
+		self.line_g, = self.ax_curves.plot(model.hours, np.zeros_like(model.hours), label=f"% {isotope_g}", animated=True)
+		self.ax_curves.set_xlim(0, t_max)
+		self.ax_curves.set_ylim(0, 100)
+		self.ax_curves.set_xlabel("Hours Elapsed")
+		self.ax_curves.set_ylabel("Percentage (%)")
+		self.ax_curves.set_title(f"Percentage of {isotope_m} and {isotope_g} Over Time")
+		self.ax_curves.legend(loc="center right")
+		self.ax_curves.grid()
+
+		# Sliders redraw through our blit, not through draw_idle
+		a_max = 10 * max(A0_m, A0_g)
+		self.slider_A0_m = Slider(slider_axes[0], f"A0 {isotope_m} ({activity_unit})", a_max / 1000, a_max, valinit=A0_m)
+		self.slider_A0_g = Slider(slider_axes[1], f"A0 {isotope_g} ({activity_unit})", 0.0, a_max, valinit=A0_g)
+		self.slider_t_m = self._half_life_slider(Slider, slider_axes[2], f"T½ {isotope_m} (h)", t_half_m)
+		self.slider_t_g = self._half_life_slider(Slider, slider_axes[3], f"T½ {isotope_g} (h)", t_half_g)
+		self.sliders = (self.slider_A0_m, self.slider_A0_g, self.slider_t_m, self.slider_t_g)
+		for slider in self.sliders:
+			slider.drawon = False
+			slider.on_changed(self._on_changed)
+
+		self.layers = OrderedDict()  # (t_half_m, t_half_g) -> rendered heatmap pixels
+		# Redrawn on every change; everything else stays in the cached background
+		self.overlay = [self.marker, self.line_m, self.line_g]
+		for slider in self.sliders:
+			# The filled bar, the value text and the lines of the slider axes (its handle and the initial-value mark)
+			for artist in (slider.poly, slider.valtext, *slider.ax.lines):
+				artist.set_animated(True)
+				self.overlay.append(artist)
+		figure.canvas.mpl_connect("draw_event", self._on_draw)
+		self.update(redraw=False)
+
+	@staticmethod
+	def _half_life_slider(Slider, ax, label, value):
+		lo = max(HALF_LIFE_STEP, round(value * (1 - HALF_LIFE_SPAN), 1))
+		hi = round(value * (1 + HALF_LIFE_SPAN), 1)
+		return Slider(ax, label, lo, hi, valinit=value, valstep=HALF_LIFE_STEP)
+
+	def values(self):
+		"""(A0_m, A0_g, t_half_m, t_half_g) of the sliders."""
+		return tuple(float(slider.val) for slider in self.sliders)
+
+	def update(self, redraw=True):
+		"""Refresh the animated artists from the sliders, then blit them."""
+		A0_m, A0_g, t_half_m, t_half_g = self.values()
+		self.image.set_data(self.model.grid(t_half_m, t_half_g))
+		ratio = np.log10(A0_g / A0_m) if A0_g > 0 else -np.inf
+		self.marker.set_ydata([np.clip(ratio, *self._ratio_range)] * 2)
+		pct_m, pct_g = self.model.curves(A0_m, A0_g, t_half_m, t_half_g)
+		self.line_m.set_ydata(pct_m)
+		self.line_g.set_ydata(pct_g)
+		if redraw:
+			self.blit()
+
+	def blit(self):
+		canvas = self.figure.canvas
+		if self.background is None:
+			canvas.draw_idle()  # the draw event captures the background and blits
+			return
+		canvas.restore_region(self.background)
+		self._draw_heatmap()
+		for artist in self.overlay:
+			self.figure.draw_artist(artist)
+		canvas.blit(self.figure.bbox)
+
+	def _draw_heatmap(self):
+		# Rendering the image is the one slow step, so its pixels are kept per half-life pair
+		key = self.values()[2:]
+		layer = self.layers.get(key)
+		if layer is not None:
+			self.layers.move_to_end(key)
+			self.figure.canvas.restore_region(layer)
+			return
+		self.figure.draw_artist(self.image)
+		self.layers[key] = self.figure.canvas.copy_from_bbox(self.ax_map.bbox)
+		if len(self.layers) > LAYER_CACHE_SIZE:
+			self.layers.popitem(last=False)
+
+	def _on_changed(self, _value):
+		self.update()
+
+	def _on_draw(self, event):
+		# A full draw (first show, resize) skips animated artists; keep it as the blit background
+		self.background = self.figure.canvas.copy_from_bbox(self.figure.bbox)
+		self.layers.clear()  # pixels of the old size
+		self.blit()
+
+
+def ratio_range(text):
+	try:
+		lo, hi = (float(v) for v in text.split(":"))
+	except ValueError:
+		raise argparse.ArgumentTypeError("expected LOW:HIGH, e.g. 0.01:100")
+	return lo, hi
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="explorer.py", description="Explore the percentage curves over initial activities and half-lives.")
+	parser.add_argument("--A0-m", type=float, default=100.0, help="initial activity of Hg197m")
+	parser.add_argument("--A0-g", type=float, default=10.0, help="initial activity of Hg197g")
+	parser.add_argument("--t-half-m", type=float, default=bateman.HALFLIFE_HG197M, help="half-life of Hg197m (h)")
+	parser.add_argument("--t-half-g", type=float, default=bateman.HALFLIFE_HG197G, help="half-life of Hg197g (h)")
+	parser.add_argument("--branching", type=float, default=bateman.IT_BRANCHING, help="isomeric-transition branching ratio")
+	parser.add_argument("--hours", type=float, default=DEFAULT_HOURS, help="time range of the plots (h)")
+	parser.add_argument("--ratios", type=ratio_range, default=DEFAULT_RATIOS, metavar="LOW:HIGH",
+		help="range of A0_g/A0_m on the heatmap (default: 0.01:100)")
+	return parser
+
+
+def main(argv=None):
+	args = build_parser().parse_args(argv)
+	import matplotlib.pyplot as plt
+
+	try:
+		model = SweepModel(args.hours, args.ratios, args.branching)
+		figure = plt.figure(figsize=(12, 6))
+		# Slider callbacks keep the explorer alive while the window is open
+		ExplorerFigure(figure, model, args.A0_m, args.A0_g, args.t_half_m, args.t_half_g)
+	except ValueError as e:
+		print(f"explorer.py: {e}", file=sys.stderr)
+		return 2
+	figure.canvas.manager.set_window_title("HgQuant Explorer")
+	plt.show()
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
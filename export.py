@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Report export shared by the GUI and the batch command line.
+"""
+
+import os
+from datetime import datetime
+
+import tracing
+
+APP_VERSION = "HgQuant v.2025.01"
+GITHUB_URL = "https://github.com/cristinarod2/HgQuant"
+
+INPUTS_SHEET = "Input and Decay Constants"
+TABLE_SHEET = "Decay Table"
+
+
+def report_frames(study):
+	"""Metadata, input and decay-constant tables for the first report sheet."""
+	import pandas as pd
+
+	lambda_m, lambda_ITm, lambda_g = study.decay_constants()
+
+	df_metadata = pd.DataFrame([
+		["Report generated by", APP_VERSION],
+		["on", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+		["User-defined Isotopes", f"{study.isotope_m} → {study.isotope_g}"],
+		["GitHub", GITHUB_URL]
+	], columns=["Report", "Value"])
+
+	df_inputs = pd.DataFrame({
+		"Parameter": [
+			f"Initial Activity ({study.isotope_m})",
+			f"Initial Activity ({study.isotope_g})",
+			f"Half-life ({study.isotope_m})",
+			f"Half-life ({study.isotope_g})",
+			"Activity Units",
+			"Measured Timestamp"
+		],
+		"Value": [
+			study.A0_m,
+			study.A0_g,
+			f"{study.t_half_m:.4f} h",
+			f"{study.t_half_g:.4f} h",
+			study.activity_unit,
+			study.measured_time.strftime("%Y-%m-%d %H:%M:%S")
+		]
+	})
+	df_constants = pd.DataFrame({
+		"Decay Constant": ["λm (Hg-197m)", "λ_ITm (Hg-197m → Hg-197g)", "λg (Hg-197g)"],
+		"Value (h⁻¹)": [
+			f"{lambda_m:.8f}",
+			f"{lambda_ITm:.8f}",
+			f"{lambda_g:.8f}"
+		]
+	})
+	spec = getattr(study, "uncertainty", None)
+	if spec is not None:
+		df_inputs = pd.concat([df_inputs, pd.DataFrame({
+			"Parameter": [
+				f"1σ Initial Activity ({study.isotope_m})",
+				f"1σ Initial Activity ({study.isotope_g})",
+				f"1σ Half-life ({study.isotope_m})",
+				f"1σ Half-life ({study.isotope_g})",
+				"1σ IT Branching Ratio",
+				"Monte Carlo Samples",
+				"Percentiles",
+			],
+			"Value": [
+				spec.sigma_A0_m,
+				spec.sigma_A0_g,
+				f"{spec.sigma_t_half_m:.4f} h",
+				f"{spec.sigma_t_half_g:.4f} h",
+				spec.sigma_branching,
+				int(spec.samples),
+				", ".join(f"{p:g}" for p in spec.percentiles),
+			]
+		})], ignore_index=True)
+	return df_metadata, df_inputs, df_constants
+
+
+# Display precision of the decay table in Excel; column widths follow from it
+TABLE_DECIMALS = {
+	"Hours Elapsed": 3,
+	"activity": 6,
+	"percentage": 4,
+	"Decay Factor Hg-197m": 8,
+	"Decay Factor Hg-197g": 8,
+}
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+DATETIME_WIDTH = 19
+
+# Rows handed to the Excel writer per block while streaming the decay table
+ROW_BLOCK = 10_000
+
+EXPORT_FORMATS = {
+	".xlsx": "Excel",
+	".csv": "CSV",
+	".parquet": "Parquet",
+}
+
+
+def _inputs_sheet_rows(study):
+	"""Yield (row index, values, style) for the first sheet; style is "bold", "regular" or "link"."""
+	df_metadata, df_inputs, df_constants = report_frames(study)
+
+	# Same layout as before: metadata, 1 blank row, inputs, 2 blank rows, constants
+	yield 0, list(df_metadata.columns), "bold"
+	for i, values in enumerate(df_metadata.itertuples(index=False), start=1):
+		yield i, list(values), "link" if values[0] == "GitHub" else "regular"
+
+	start = len(df_metadata) + 2
+	yield start, list(df_inputs.columns), "bold"
+	for i, values in enumerate(df_inputs.itertuples(index=False), start=start + 1):
+		yield i, list(values), None
+
+	start = len(df_metadata) + len(df_inputs) + 5
+	yield start, list(df_constants.columns), "bold"
+	for i, values in enumerate(df_constants.itertuples(index=False), start=start + 1):
+		yield i, list(values), None
+
+
+def _inputs_sheet_widths(rows):
+	widths = [0, 0]
+	for _, values, _ in rows:
+		for col, value in enumerate(values):
+			widths[col] = max(widths[col], len(str(value)))
+	return [w + 4 for w in widths]
+
+
+def _column_decimals(name, study):
+	# Percentile columns ("... P97.5") are shown like the column they summarize
+	base, _, suffix = name.rpartition(" P")
+	if base and suffix.replace(".", "", 1).isdigit():
+		name = base
+	if name in TABLE_DECIMALS:
+		return TABLE_DECIMALS[name]
+	if name.startswith("% "):
+		return TABLE_DECIMALS["percentage"]
+	if name.endswith(f"({study.activity_unit})"):
+		return TABLE_DECIMALS["activity"]
+	return None
+
+
+def _table_columns(study, activities_df):
+	"""
+	Describe each decay-table column as (name, values, number format, width).
+
+	Widths come from the number format and the largest magnitude in the column,
+	so the data never has to be converted to strings.
+	"""
+	import numpy as np
+
+	columns = []
+	for name in activities_df.columns:
+		values = activities_df[name].to_numpy()
+		header_len = len(str(name))
+		if np.issubdtype(values.dtype, np.datetime64):
+			columns.append((name, values.astype("datetime64[s]"), DATETIME_FORMAT, max(header_len, DATETIME_WIDTH) + 4))
+			continue
+		if values.dtype.kind in "fiu":
+			decimals = _column_decimals(str(name), study)
+			if decimals is None:
+				decimals = 6
+			finite = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+			largest = float(np.abs(finite).max()) if len(finite) else 0.0
+			int_digits = len(str(int(largest)))
+			sign = 1 if len(finite) and finite.min() < 0 else 0
+			number_format = "0." + "0" * decimals if decimals else "0"
+			content_len = sign + int_digits + (decimals + 1 if decimals else 0)
+			columns.append((name, values, number_format, max(header_len, content_len) + 4))
+			continue
+		content_len = max(map(len, map(str, values)), default=0)
+		columns.append((name, values, None, max(header_len, content_len) + 4))
+	return columns
+
+
+def _table_row_blocks(columns, progress=None):
+	"""
+	Yield rows of the decay table as tuples of plain Python values, one block at a time.
+
+	``progress(rows done, total rows)`` is called before each block is handed out.
+	"""
+	n_rows = len(columns[0][1]) if columns else 0
+	for start in range(0, n_rows, ROW_BLOCK):
+		if progress:
+			progress(start, n_rows)
+		block = []
+		for _, values, number_format, _ in columns:
+			chunk = values[start:start + ROW_BLOCK]
+			if number_format == DATETIME_FORMAT:
+				chunk = chunk.astype(object)  # datetime64[s] -> datetime.datetime
+			block.append(chunk.tolist() if hasattr(chunk, "tolist") else list(chunk))
+		yield zip(*block)
+
+
+def excel_engine():
+	"""Prefer xlsxwriter's constant-memory mode, fall back to openpyxl write-only."""
+	try:
+		import xlsxwriter  # noqa: F401
+		return "xlsxwriter"
+	except ImportError:
+		return "openpyxl"
+
+
+def write_excel_report(filepath, study, activities_df, engine=None, progress=None):
+	"""
+	Write the two-sheet Excel report for ``study`` and its ``activities_df``.
+
+	Rows are streamed to disk in constant-memory mode, so export time and
+	memory grow only with the number of rows actually written. ``progress``
+	is called as ``progress(rows written, total rows)`` between row blocks.
+	"""
+	engine = engine or excel_engine()
+	input_rows = list(_inputs_sheet_rows(study))
+	columns = _table_columns(study, activities_df)
+	if engine == "xlsxwriter":
+		_write_excel_xlsxwriter(filepath, input_rows, columns, progress)
+	elif engine == "openpyxl":
+		_write_excel_openpyxl(filepath, input_rows, columns, progress)
+	else:
+		raise ValueError(f"Unknown Excel engine: {engine}")
+
+
+def _write_excel_xlsxwriter(filepath, input_rows, columns, progress=None):
+	import xlsxwriter
+
+	workbook = xlsxwriter.Workbook(filepath, {"constant_memory": True, "nan_inf_to_errors": True})
+	try:
+		# === Sheet 1: report metadata, inputs and decay constants ===
+		ws = workbook.add_worksheet(INPUTS_SHEET)
+		styles = {
+			"bold": workbook.add_format({"font_name": "Calibri", "font_size": 16, "bold": True}),
+			"regular": workbook.add_format({"font_name": "Calibri", "font_size": 12}),
+			"link": workbook.add_format({"font_color": "blue", "underline": 1}),
+		}
+		for col, width in enumerate(_inputs_sheet_widths(input_rows)):
+			ws.set_column(col, col, width)
+		for row, values, style in input_rows:
+			if style == "link":
+				ws.write(row, 0, values[0])
+				ws.write_url(row, 1, GITHUB_URL, styles["link"], string=values[1])
+			else:
+				ws.write_row(row, 0, values, styles.get(style))
+
+		# === Sheet 2: decay table ===
+		ws = workbook.add_worksheet(TABLE_SHEET)
+		header = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+		for col, (name, _, number_format, width) in enumerate(columns):
+			cell_format = workbook.add_format({"num_format": number_format}) if number_format else None
+			ws.set_column(col, col, width, cell_format)
+			ws.write(0, col, name, header)
+
+		row = 1
+		for block in _table_row_blocks(columns, progress):
+			for values in block:
+				ws.write_row(row, 0, values)
+				row += 1
+	finally:
+		workbook.close()
+
+
+def _write_excel_openpyxl(filepath, input_rows, columns, progress=None):
+	from openpyxl import Workbook
+	from openpyxl.cell import WriteOnlyCell
+	from openpyxl.styles import Alignment, Border, Font, Side
+	from openpyxl.utils import get_column_letter
+
+	workbook = Workbook(write_only=True)
+
+	# === Sheet 1: report metadata, inputs and decay constants ===
+	ws = workbook.create_sheet(INPUTS_SHEET)
+	fonts = {
+		"bold": Font(name="Calibri", size=16, bold=True),
+		"regular": Font(name="Calibri", size=12),
+	}
+	for col, width in enumerate(_inputs_sheet_widths(input_rows), start=1):
+		ws.column_dimensions[get_column_letter(col)].width = width
+
+	next_row = 0
+	for row, values, style in input_rows:
+		while next_row < row:
+			ws.append([])
+			next_row += 1
+		cells = []
+		for col, value in enumerate(values):
+			cell = WriteOnlyCell(ws, value=value)
+			if style in fonts:
+				cell.font = fonts[style]
+			elif style == "link" and col == 1:
+				cell.hyperlink = GITHUB_URL
+				cell.style = "Hyperlink"
+			cells.append(cell)
+		ws.append(cells)
+		next_row += 1
+
+	# === Sheet 2: decay table ===
+	ws = workbook.create_sheet(TABLE_SHEET)
+	side = Side(style="thin")
+	header_font = Font(bold=True)
+	header_border = Border(left=side, right=side, top=side, bottom=side)
+	header_alignment = Alignment(horizontal="center")
+	header = []
+	for col, (name, _, number_format, width) in enumerate(columns, start=1):
+		ws.column_dimensions[get_column_letter(col)].width = width
+		cell = WriteOnlyCell(ws, value=name)
+		cell.font, cell.border, cell.alignment = header_font, header_border, header_alignment
+		header.append(cell)
+	ws.append(header)
+
+	formats = [number_format for _, _, number_format, _ in columns]
+	formatted = [i for i, number_format in enumerate(formats) if number_format]
+	for block in _table_row_blocks(columns, progress):
+		for values in block:
+			if formatted:
+				values = list(values)
+				for i in formatted:
+					cell = WriteOnlyCell(ws, value=values[i])
+					cell.number_format = formats[i]
+					values[i] = cell
+			ws.append(values)
+
+	workbook.save(filepath)
+
+
+def write_csv_table(filepath, activities_df):
+	activities_df.to_csv(filepath, index=False)
+
+
+def write_parquet_table(filepath, study, activities_df):
+	"""Write the decay table to Parquet, keeping the report inputs as file metadata."""
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+
+	lambda_m, lambda_ITm, lambda_g = study.decay_constants()
+	table = pa.Table.from_pandas(activities_df, preserve_index=False)
+	metadata = dict(table.schema.metadata or {})
+	metadata.update({
+		b"hgquant": APP_VERSION.encode(),
+		b"isotope_m": study.isotope_m.encode(),
+		b"isotope_g": study.isotope_g.encode(),
+		b"activity_unit": study.activity_unit.encode(),
+		b"A0_m": repr(study.A0_m).encode(),
+		b"A0_g": repr(study.A0_g).encode(),
+		b"t_half_m": repr(study.t_half_m).encode(),
+		b"t_half_g": repr(study.t_half_g).encode(),
+		b"measured_time": study.measured_time.strftime("%Y-%m-%d %H:%M:%S").encode(),
+		b"lambda_m": f"{lambda_m:.8f}".encode(),
+		b"lambda_ITm": f"{lambda_ITm:.8f}".encode(),
+		b"lambda_g": f"{lambda_g:.8f}".encode(),
+	})
+	pq.write_table(table.replace_schema_metadata(metadata), filepath, compression="zstd")
+
+
+def write_report(filepath, study, activities_df, progress=None):
+	"""
+	Export by file extension: .xlsx report, or the bare decay table as .csv/.parquet.
+
+	``progress(rows written, total rows)`` is reported for Excel reports, which
+	are written in row blocks; the other formats are written in one call.
+	"""
+	ext = os.path.splitext(filepath)[1].lower()
+	if ext not in EXPORT_FORMATS:
+		raise ValueError(f"Unsupported export format '{ext}' (use {', '.join(EXPORT_FORMATS)})")
+	with tracing.span(f"export {ext[1:]}", rows=len(activities_df)):
+		if ext == ".xlsx":
+			write_excel_report(filepath, study, activities_df, progress=progress)
+		elif ext == ".csv":
+			write_csv_table(filepath, activities_df)
+		else:
+			write_parquet_table(filepath, study, activities_df)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Recover initial ¹⁹⁷mHg/¹⁹⁷gHg activities from multi-timepoint measurements.
+
+The Bateman model is linear in (A0_m, A0_g): every observable is a fixed
+timepoint-dependent combination of the two, so fitting thousands of ROIs or
+voxels is one least-squares solve with many right-hand sides instead of a
+per-ROI optimizer loop.
+
+Observables:
+	"m"      measured ¹⁹⁷mHg activity
+	"g"      measured ¹⁹⁷gHg activity
+	"total"  measured ¹⁹⁷mHg + ¹⁹⁷gHg activity
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+import bateman
+
+OBSERVABLES = ("m", "g", "total")
+
+
+def design_rows(hours, t_half_m=bateman.HALFLIFE_HG197M, t_half_g=bateman.HALFLIFE_HG197G, branching=bateman.IT_BRANCHING):
+	"""
+	Model rows per observable: ``{name: (T, 2)}`` with activity = rows @ [A0_m, A0_g].
+
+	These are the Bateman activities for unit initial activities.
+	"""
+	hours = np.asarray(hours, dtype=float)
+	lambda_m, lambda_ITm, lambda_g = bateman.decay_constants(t_half_m, t_half_g, branching)
+	zero = np.zeros_like(hours)
+	rows = {
+		"m": np.stack([bateman.activity_Hg197m(1.0, lambda_m, hours), zero], axis=-1),
+		"g": np.stack([
+			bateman.activity_Hg197g(1.0, 0.0, lambda_ITm, lambda_m, lambda_g, hours),
+			bateman.activity_Hg197g(0.0, 1.0, lambda_ITm, lambda_m, lambda_g, hours),
+		], axis=-1),
+	}
+	rows["total"] = rows["m"] + rows["g"]
+	return rows
+
+
+@dataclass
+class FitResult:
+	A0_m: np.ndarray          # (R,)
+	A0_g: np.ndarray          # (R,)
+	residuals: np.ndarray     # (R, K): measured - fitted, for the K stacked measurements
+	rss: np.ndarray           # (R,) weighted residual sum of squares
+	stderr_m: np.ndarray      # (R,) standard errors from the residual variance
+	stderr_g: np.ndarray
+	dof: np.ndarray           # (R,) measurements used minus 2
+
+
+def fit_initial_activities(hours, measurements, sigma=None, t_half_m=bateman.HALFLIFE_HG197M,
+		t_half_g=bateman.HALFLIFE_HG197G, branching=bateman.IT_BRANCHING):
+	"""
+	Least-squares initial activities for every ROI.
+
+	``measurements`` maps an observable ("m", "g", "total") to an (R, T) array
+	(or (T,) for a single ROI) measured at ``hours`` after the reference time.
+	NaN marks a missing measurement. ``sigma`` optionally maps the same keys to
+	1σ uncertainties (broadcastable to (R, T)) for a weighted fit.
+
+	Without missing values or per-ROI weights all ROIs share one design matrix
+	and are solved with a single ``lstsq`` call; otherwise the 2×2 normal
+	equations are solved for all ROIs at once.
+	"""
+	unknown = set(measurements) - set(OBSERVABLES)
+	if unknown:
+		raise ValueError(f"Unknown observable(s): {', '.join(sorted(unknown))}")
+	rows = design_rows(hours, t_half_m, t_half_g, branching)
+
+	keys = [k for k in OBSERVABLES if k in measurements]
+	Y = np.concatenate([np.atleast_2d(np.asarray(measurements[k], dtype=float)) for k in keys], axis=1)   # (R, K)
+	X = np.concatenate([rows[k] for k in keys], axis=0)                                                    # (K, 2)
+	R, K = Y.shape
+	if X.shape[0] != K:
+		raise ValueError("Every measurement array must have one column per timepoint")
+
+	# Weights 1/σ, shared by all ROIs (1, K) unless some σ is given per ROI (R, K)
+	W = np.ones((1, K))
+	if sigma:
+		per_roi = any(np.ndim(sigma.get(k, 1.0)) > 1 for k in keys)
+		shape = (R, len(np.atleast_1d(hours))) if per_roi else (1, len(np.atleast_1d(hours)))
+		W = np.concatenate([np.broadcast_to(1.0 / np.asarray(sigma.get(k, 1.0), dtype=float), shape) for k in keys], axis=1)
+	missing = np.isnan(Y)
+
+	if not missing.any() and W.shape[0] == 1:
+		# One design matrix for every ROI: a single solve with R right-hand sides
+		Xw = X * W[0][:, np.newaxis]
+		coef, *_ = np.linalg.lstsq(Xw, (Y * W).T, rcond=None)
+		coef = coef.T                                                                                     # (R, 2)
+		xtx_inv = np.broadcast_to(np.linalg.pinv(Xw.T @ Xw), (R, 2, 2))
+		used = np.full(R, K)
+	else:
+		Wr = np.where(missing, 0.0, np.broadcast_to(W, (R, K)))
+		Yz = np.where(missing, 0.0, Y)
+		Xw = Wr[:, :, np.newaxis] * X[np.newaxis]                                                         # (R, K, 2)
+		xtx = np.einsum("rki,rkj->rij", Xw, Xw)
+		xty = np.einsum("rki,rk->ri", Xw, Wr * Yz)
+		xtx_inv = _inv2x2(xtx)
+		coef = np.einsum("rij,rj->ri", xtx_inv, xty)
+		used = (~missing).sum(axis=1)
+
+	fitted = coef @ X.T                                                                                   # (R, K)
+	residuals = Y - fitted
+	weighted = np.where(missing, 0.0, residuals * W)
+	rss = (weighted ** 2).sum(axis=1)
+	dof = used - 2
+	with np.errstate(divide="ignore", invalid="ignore"):
+		variance = np.where(dof > 0, rss / dof, np.nan)
+		stderr = np.sqrt(variance[:, np.newaxis] * np.diagonal(xtx_inv, axis1=1, axis2=2))
+	return FitResult(coef[:, 0], coef[:, 1], residuals, rss, stderr[:, 0], stderr[:, 1], dof)
+
+
+def _inv2x2(m):
+	"""Inverse of a stack of 2×2 matrices; singular ones (too few measurements) give NaN."""
+	a, b, c, d = m[:, 0, 0], m[:, 0, 1], m[:, 1, 0], m[:, 1, 1]
+	det = a * d - b * c
+	with np.errstate(divide="ignore", invalid="ignore"):
+		inv = np.stack([np.stack([d, -b], axis=-1), np.stack([-c, a], axis=-1)], axis=1) / det[:, np.newaxis, np.newaxis]
+	inv[det == 0] = np.nan
+	return inv
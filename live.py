@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Incremental recomputation of the decay table while the timepoint list is edited.
+
+:class:`LiveTimepoints` keeps the parsed time and every model output per line
+of the timepoint box. On each edit only the lines between the unchanged head
+and tail of the text are parsed and evaluated again and spliced into the
+per-line arrays, so a one-line edit costs the same for ten lines or a hundred
+thousand. Lines that are blank or do not parse (yet) are simply left out of
+the table instead of aborting the update.
+"""
+
+import numpy as np
+
+import bateman
+import timepoints
+
+# Per-line model outputs, named like the BatemanResult fields
+FIELDS = ("hours", "activity_m", "activity_g", "pct_m", "pct_g", "decay_factor_m", "decay_factor_g")
+
+
+class LiveTimepoints:
+	def __init__(self, A0_m, A0_g, t_half_m, t_half_g, measured_time, branching=bateman.IT_BRANCHING):
+		self.params = None
+		self.text = None                                            # UTF-8 contents of the box
+		self.labels = np.empty(0, dtype=object)                     # cleaned text, None for blank lines
+		self.times = np.empty(0, dtype=timepoints.DATETIME_UNIT)    # NaT for blank or invalid lines
+		self.values = {name: np.empty(0) for name in FIELDS}
+		self.fmt = None
+		self.changed_lines = None  # lines of the rows returned by the last update()
+		self.set_parameters(A0_m, A0_g, t_half_m, t_half_g, measured_time, branching)
+
+	def set_parameters(self, A0_m, A0_g, t_half_m, t_half_g, measured_time, branching=bateman.IT_BRANCHING):
+		"""Change the model inputs; every line is re-evaluated (not re-parsed). Returns whether anything changed."""
+		params = (float(A0_m), float(A0_g), float(t_half_m), float(t_half_g), measured_time, float(branching))
+		if params == self.params:
+			return False
+		self.params = params
+		self.values = self._evaluate(self.times)
+		return True
+
+	# === Parsing and evaluation of a run of lines ===
+	def _evaluate(self, times):
+		A0_m, A0_g, t_half_m, t_half_g, measured_time, branching = self.params
+		hours = timepoints.elapsed_hours(times, measured_time)
+		with np.errstate(divide="ignore", invalid="ignore"):
+			r = bateman.evaluate(A0_m, A0_g, t_half_m, t_half_g, hours, branching)
+		return {name: np.broadcast_to(getattr(r, name), hours.shape) for name in FIELDS}
+
+	def _parse(self, lines):
+		labels = np.full(len(lines), None, dtype=object)
+		times = np.full(len(lines), np.datetime64("NaT"), dtype=timepoints.DATETIME_UNIT)
+		cleaned, numbers = timepoints.clean_lines(lines)
+		if cleaned:
+			index = np.asarray(numbers) - 1
+			labels[index] = cleaned
+			times[index] = timepoints.parse_timepoints(cleaned, fmt=self.fmt).times
+		return labels, times
+
+	@staticmethod
+	def _first_label(lines):
+		for line in lines:
+			if line.strip():
+				return timepoints.clean_lines([line])[0][0]
+		return None
+
+	# === Edits ===
+	def _changed_span(self, new):
+		"""
+		Lines ``head`` and ``tail`` that are unchanged at both ends, found by a
+		byte comparison of the whole texts, plus the changed middle of ``new``.
+		"""
+		old = self.text
+		a = np.frombuffer(old, dtype=np.uint8)
+		b = np.frombuffer(new, dtype=np.uint8)
+		n = min(len(a), len(b))
+		mismatch = a[:n] != b[:n]
+		prefix = int(mismatch.argmax()) if mismatch.any() else n
+		head = old.count(b"\n", 0, prefix)
+		head_start = old.rfind(b"\n", 0, prefix) + 1
+
+		limit = n - head_start
+		mismatch = a[::-1][:limit] != b[::-1][:limit]
+		suffix = int(mismatch.argmax()) if mismatch.any() else limit
+		tail = old.count(b"\n", len(old) - suffix) if suffix else 0
+		middle_end = new.find(b"\n", len(new) - suffix) if tail else len(new)
+		return head, tail, new[head_start:middle_end].decode("utf-8").split("\n")
+
+	def update(self, text):
+		"""
+		Bring the table up to date with the new box contents.
+
+		Returns the indices of the table rows whose values changed when the
+		rows themselves stayed the same (an edit within existing timepoints),
+		or ``None`` when rows were added, removed or reordered. The lines of
+		those rows are kept in :attr:`changed_lines` for :meth:`result`.
+		"""
+		self.changed_lines = None
+		new = text.encode("utf-8")
+		if new == self.text:
+			self.changed_lines = np.empty(0, dtype=int)
+			return np.empty(0, dtype=int)
+
+		# The format is detected from the first timepoint, like a full parse;
+		# if that changes every line is parsed again
+		first = self._first_label(text.split("\n", 50))
+		fmt = timepoints.detect_format(first) if first else None
+		if fmt != self.fmt or self.text is None:
+			self.fmt = fmt
+			self.text = new
+			self.labels, self.times = self._parse(text.split("\n"))
+			self.values = self._evaluate(self.times)
+			return None
+
+		# Unchanged head and tail; only the middle is parsed and evaluated
+		head, tail, middle = self._changed_span(new)
+		old_stop = len(self.times) - tail
+		labels, times = self._parse(middle)
+		values = self._evaluate(times)
+		was_row = ~np.isnat(self.times[head:old_stop])
+		is_row = ~np.isnat(times)
+		first_row = int(np.count_nonzero(~np.isnat(self.times[:head])))
+
+		self.text = new
+		self.labels = np.concatenate([self.labels[:head], labels, self.labels[old_stop:]])
+		self.times = np.concatenate([self.times[:head], times, self.times[old_stop:]])
+		self.values = {
+			name: np.concatenate([self.values[name][:head], values[name], self.values[name][old_stop:]])
+			for name in FIELDS
+		}
+
+		if len(was_row) == len(is_row) and np.array_equal(was_row, is_row):
+			self.changed_lines = head + np.flatnonzero(is_row)
+			return first_row + np.arange(len(self.changed_lines))
+		return None
+
+	# === Current table ===
+	@property
+	def rows(self):
+		"""Mask of the lines that are table rows (parsed timepoints)."""
+		return ~np.isnat(self.times)
+
+	def invalid_lines(self):
+		"""(line number, text) of the non-blank lines that do not parse."""
+		bad = np.flatnonzero(np.isnat(self.times) & (self.labels != None))  # noqa: E711
+		return [(int(i) + 1, self.labels[i]) for i in bad]
+
+	def result(self, lines=None):
+		"""
+		Times and the :class:`bateman.BatemanResult` of the current rows, or
+		only of the given ``lines`` (e.g. :attr:`changed_lines`, to patch a table).
+		"""
+		rows = self.rows if lines is None else lines
+		A0_m, A0_g, t_half_m, t_half_g, measured_time, branching = self.params
+		lambda_m, lambda_ITm, lambda_g = bateman.decay_constants(t_half_m, t_half_g, branching)
+		values = {name: self.values[name][rows] for name in FIELDS}
+		result = bateman.BatemanResult(
+			total=values["activity_m"] + values["activity_g"],
+			lambda_m=lambda_m,
+			lambda_ITm=lambda_ITm,
+			lambda_g=lambda_g,
+			**values,
+		)
+		return self.times[rows], result
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Embedded activity and percentage plots for the HgQuant window.
+
+One figure lives for the whole session; a new calculation only swaps the line
+data. Series longer than the plot is wide in pixels are drawn through a
+shape-preserving decimation step, redone for the visible range on zoom/pan.
+"""
+
+import numpy as np
+
+import customtkinter as ctk
+
+# Points per pixel of axes width kept after decimation (min/max emits two per bin)
+POINTS_PER_PIXEL = 2
+# Below this many points the lines are drawn with markers, like the old plots
+MARKER_LIMIT = 200
+
+
+def minmax_decimate(x, y, n_bins):
+	"""
+	Keep the minimum and maximum of ``y`` in each of ``n_bins`` equal-count bins.
+
+	``x`` must be sorted. Returns indices into the input, in ascending order,
+	so several series sharing ``x`` can be decimated consistently.
+	"""
+	n = len(x)
+	if n <= 2 * n_bins:
+		return np.arange(n)
+	edges = np.linspace(0, n, n_bins + 1).astype(np.intp)
+	size = np.diff(edges).max()
+	# Pad every bin to the same length so argmin/argmax run as one 2-D reduction
+	padded_index = edges[:-1, np.newaxis] + np.arange(size)
+	valid = padded_index < edges[1:, np.newaxis]
+	padded_index = np.minimum(padded_index, n - 1)
+	values = y[padded_index]
+	lo = np.where(valid, values, np.inf).argmin(axis=1)
+	hi = np.where(valid, values, -np.inf).argmax(axis=1)
+	rows = np.arange(n_bins)
+	keep = np.concatenate([padded_index[rows, lo], padded_index[rows, hi], [0, n - 1]])
+	return np.unique(keep)
+
+
+def lttb(x, y, n_out):
+	"""Largest-Triangle-Three-Buckets downsampling; returns indices into the (sorted) input."""
+	n = len(x)
+	if n_out >= n or n_out < 3:
+		return np.arange(n)
+	edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+	keep = np.empty(n_out, dtype=np.intp)
+	keep[0], keep[-1] = 0, n - 1
+	a = 0
+	for i in range(n_out - 2):
+		start, end = edges[i], edges[i + 1]
+		next_end = edges[i + 2] if i + 2 < len(edges) else n
+		avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+		avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+		bx, by = x[start:end], y[start:end]
+		area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+		a = start + int(area.argmax())
+		keep[i + 1] = a
+	return keep
+
+
+def decimate(x, ys, max_points, method="minmax"):
+	"""Indices of ``x`` to draw so that every series in ``ys`` keeps its shape."""
+	if len(x) <= max_points:
+		return np.arange(len(x))
+	if method == "lttb":
+		keep = np.concatenate([lttb(x, y, max_points // len(ys)) for y in ys])
+	else:
+		keep = np.concatenate([minmax_decimate(x, y, max(1, max_points // (2 * len(ys)))) for y in ys])
+	return np.unique(keep)
+
+
+class DecayPlotCanvas(ctk.CTkFrame):
+	def __init__(self, master, method="minmax", **kwargs):
+		super().__init__(master, **kwargs)
+		from matplotlib.figure import Figure
+		from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+		self.method = method
+		self.x = np.empty(0)
+		self.series = []
+		self._positions = None
+
+		self.figure = Figure(figsize=(10, 4), dpi=100, layout="constrained")
+		self.ax_activity = self.figure.add_subplot(1, 2, 1)
+		self.ax_percent = self.figure.add_subplot(1, 2, 2)
+
+		self.line_m, = self.ax_activity.plot([], [], 'o-')
+		self.line_g, = self.ax_activity.plot([], [], 's-')
+		self.line_m_pct, = self.ax_percent.plot([], [], 'o-')
+		self.line_g_pct, = self.ax_percent.plot([], [], 's-')
+		self.lines = [self.line_m, self.line_g, self.line_m_pct, self.line_g_pct]
+		# Axes -> (its two lines, indices into self.series)
+		self.axes_lines = {
+			self.ax_activity: ((self.line_m, self.line_g), (0, 1)),
+			self.ax_percent: ((self.line_m_pct, self.line_g_pct), (2, 3)),
+		}
+
+		for ax in self.axes_lines:
+			ax.set_xlabel('Hours Elapsed')
+			ax.grid()
+			ax.callbacks.connect("xlim_changed", self._on_xlim_changed)
+		self.ax_activity.set_title('Radioactive Decay')
+		self.ax_percent.set_ylabel('Percentage (%)')
+
+		self.canvas = FigureCanvasTkAgg(self.figure, master=self)
+		toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+		toolbar.update()
+		toolbar.pack(side="bottom", fill="x")
+		self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
+		self._updating = False
+
+	def max_points(self, ax):
+		width = ax.get_window_extent().width
+		return max(100, int(width * POINTS_PER_PIXEL))
+
+	def update_data(self, hours, activity_m, activity_g, pct_m, pct_g, isotope_m, isotope_g, activity_unit):
+		"""Swap in new series; the figure, axes and lines are reused."""
+		order = np.argsort(hours, kind="stable")
+		self.x = np.asarray(hours, dtype=float)[order]
+		self.series = [np.asarray(s, dtype=float)[order] for s in (activity_m, activity_g, pct_m, pct_g)]
+		self._positions = np.empty_like(order)  # input row -> index in the sorted series
+		self._positions[order] = np.arange(len(order))
+
+		for line, label in zip(self.lines, (isotope_m, isotope_g, f"% {isotope_m}", f"% {isotope_g}")):
+			line.set_label(label)
+		self.ax_activity.set_ylabel(f'Activity ({activity_unit})')
+		self.ax_percent.set_title(f'Percentage of {isotope_m} and {isotope_g} Over Time')
+		self.ax_activity.legend()
+		self.ax_percent.legend()
+
+		self._redraw()
+
+	def patch(self, rows, hours, activity_m, activity_g, pct_m, pct_g):
+		"""
+		Overwrite input ``rows`` of the last :meth:`update_data` in place and redraw.
+
+		Returns False when the new hours moved a row out of its place in the
+		sorted series; the caller must then pass the full data to :meth:`update_data`.
+		"""
+		if self._positions is None or len(self._positions) != len(self.x):
+			return False
+		positions = self._positions[rows]
+		self.x[positions] = hours
+		for series, values in zip(self.series, (activity_m, activity_g, pct_m, pct_g)):
+			series[positions] = values
+		last = len(self.x) - 1
+		here = self.x[positions]
+		if not np.all((self.x[np.maximum(positions - 1, 0)] <= here) & (here <= self.x[np.minimum(positions + 1, last)])):
+			return False
+		self._redraw()
+		return True
+
+	def _redraw(self):
+		self._updating = True
+		try:
+			for ax in self.axes_lines:
+				self._set_lines(ax, 0, len(self.x))
+				ax.relim()
+				ax.autoscale_view()
+		finally:
+			self._updating = False
+		self.canvas.draw_idle()
+
+	def _set_lines(self, ax, start, stop):
+		lines, series = self.axes_lines[ax]
+		x = self.x[start:stop]
+		ys = [self.series[i][start:stop] for i in series]
+		keep = decimate(x, ys, self.max_points(ax), self.method)
+		with_markers = len(keep) <= MARKER_LIMIT
+		for line, y, marker in zip(lines, ys, ('o', 's')):
+			line.set_data(x[keep], y[keep])
+			line.set_marker(marker if with_markers else "")
+
+	def _on_xlim_changed(self, ax):
+		# Re-decimate the visible range so zooming in reveals full detail
+		if self._updating or not len(self.x):
+			return
+		lo, hi = ax.get_xlim()
+		start = max(0, np.searchsorted(self.x, lo) - 1)
+		stop = min(len(self.x), np.searchsorted(self.x, hi) + 1)
+		self._updating = True
+		try:
+			self._set_lines(ax, start, stop)
+		finally:
+			self._updating = False
+		self.canvas.draw_idle()
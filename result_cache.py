@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Persistent, content-addressed cache of computed decay tables.
+
+A study's entry is keyed by a SHA-256 of its normalized inputs: initial
+activities, half-lives, branching ratio, measurement timestamp, timepoint
+lines and the uncertainty settings. Isotope names and the activity unit only
+label the output, so they are not part of the key and renaming an isotope
+still hits the cache. Each entry is an uncompressed ``.npz`` holding the
+:class:`decay_table.DecayTable` columns (timestamps, activities, decay
+constants and any Monte Carlo percentiles); a hit rebuilds the table without
+parsing or evaluating anything.
+
+Monte Carlo results are only cached when the study fixes a random seed. The
+directory is kept under a size limit by deleting the least recently used
+entries. Like the equation cache, the disk cache is best effort: I/O errors
+turn into misses.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+from decay_table import DecayTable
+
+# Bump when the entry layout or the computation changes, so old entries stop matching
+FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 512 * 2**20
+SUFFIX = ".npz"
+
+
+def study_key(study):
+	"""Hex digest of the inputs that determine ``study``'s results, or None if they are not reproducible."""
+	spec = study.uncertainty
+	if spec is not None and spec.seed is None:
+		return None
+	header = {
+		"format": FORMAT_VERSION,
+		"A0_m": repr(float(study.A0_m)),
+		"A0_g": repr(float(study.A0_g)),
+		"t_half_m": repr(float(study.t_half_m)),
+		"t_half_g": repr(float(study.t_half_g)),
+		"branching": repr(float(study.branching)),
+		# elapsed hours are computed from whole seconds
+		"measured_time": str(np.datetime64(study.measured_time, "s")),
+		"uncertainty": spec.to_dict() if spec is not None else None,
+	}
+	digest = hashlib.sha256(json.dumps(header, sort_keys=True, default=repr).encode("utf-8"))
+	lines = study.timepoints.splitlines() if isinstance(study.timepoints, str) else study.timepoints
+	digest.update(b"\0")
+	digest.update("\n".join(lines).encode("utf-8"))
+	return digest.hexdigest()
+
+
+class ResultCache:
+	def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+		self.directory = directory
+		self.max_bytes = int(max_bytes)
+		self.hits = 0
+		self.misses = 0
+		self._bytes = None  # total size of the entries, scanned on first store
+		self._lock = threading.Lock()
+
+	def _path(self, key):
+		return os.path.join(self.directory, key + SUFFIX)
+
+	def get(self, study):
+		"""The cached :class:`DecayTable` of ``study`` (labelled with its isotope names and unit), or None."""
+		key = study_key(study)
+		if key is None:
+			return None
+		path = self._path(key)
+		try:
+			with np.load(path, allow_pickle=False) as entry:
+				arrays = {name: entry[name] for name in entry.files}
+			os.utime(path)  # mark as recently used
+		except FileNotFoundError:
+			self._count(hit=False)
+			return None
+		except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+			self._count(hit=False)
+			self._remove(path)
+			return None
+		self._count(hit=True)
+
+		percentiles = {
+			name[len("pct_"):]: values for name, values in arrays.items() if name.startswith("pct_")
+		} or None
+		lambda_m, lambda_ITm, lambda_g = arrays["lambdas"]
+		return DecayTable(
+			times=arrays["times"],
+			activity_m=arrays["activity_m"],
+			activity_g=arrays["activity_g"],
+			A0_m=float(study.A0_m),
+			A0_g=float(study.A0_g),
+			measured_time=study.measured_time,
+			lambda_m=float(lambda_m),
+			lambda_ITm=float(lambda_ITm),
+			lambda_g=float(lambda_g),
+			isotope_m=study.isotope_m,
+			isotope_g=study.isotope_g,
+			activity_unit=study.activity_unit,
+			percentiles=percentiles,
+			spec=study.uncertainty,
+		)
+
+	def put(self, study, table):
+		"""Store ``table`` as the result of ``study``; returns whether it was written."""
+		key = study_key(study)
+		if key is None:
+			return False
+		arrays = {
+			"times": table.times,
+			"activity_m": table.activity_m,
+			"activity_g": table.activity_g,
+			"lambdas": np.array([table.lambda_m, table.lambda_ITm, table.lambda_g]),
+		}
+		for name, values in (table.percentiles or {}).items():
+			arrays[f"pct_{name}"] = values
+
+		path = self._path(key)
+		tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		try:
+			os.makedirs(self.directory, exist_ok=True)
+			with open(tmp, "wb") as f:
+				np.savez(f, **arrays)
+			size = os.path.getsize(tmp)
+			if size > self.max_bytes:
+				self._remove(tmp)
+				return False  # would evict everything, itself included
+			os.replace(tmp, path)
+		except OSError:
+			self._remove(tmp)
+			return False  # the disk cache is best effort
+
+		with self._lock:
+			if self._bytes is None:
+				self._bytes = self._scan_bytes()
+			else:
+				self._bytes += size
+			over = self._bytes > self.max_bytes
+		if over:
+			self.evict()
+		return True
+
+	def evict(self, max_bytes=None):
+		"""Delete least recently used entries until the directory fits in ``max_bytes``."""
+		limit = self.max_bytes if max_bytes is None else max_bytes
+		entries = []
+		for item in self._entries():
+			try:
+				stat = item.stat()
+			except OSError:
+				continue
+			entries.append((stat.st_mtime, stat.st_size, item.path))
+		total = sum(size for _, size, _ in entries)
+		for _, size, path in sorted(entries):
+			if total <= limit:
+				break
+			if self._remove(path):
+				total -= size
+		with self._lock:
+			self._bytes = total
+
+	def clear(self):
+		self.evict(max_bytes=0)
+
+	def info(self):
+		with self._lock:
+			return {
+				"directory": self.directory,
+				"bytes": self._scan_bytes(),
+				"max_bytes": self.max_bytes,
+				"hits": self.hits,
+				"misses": self.misses,
+			}
+
+	def _entries(self):
+		try:
+			return [item for item in os.scandir(self.directory) if item.name.endswith(SUFFIX) and item.is_file()]
+		except OSError:
+			return []
+
+	def _scan_bytes(self):
+		total = 0
+		for item in self._entries():
+			try:
+				total += item.stat().st_size
+			except OSError:
+				pass
+		return total
+
+	def _count(self, hit):
+		with self._lock:
+			if hit:
+				self.hits += 1
+			else:
+				self.misses += 1
+
+	@staticmethod
+	def _remove(path):
+		try:
+			os.remove(path)
+			return True
+		except OSError:
+			return False
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Virtualized results table for the HgQuant window.
+
+Only the rows that fit in the viewport are formatted and drawn, straight from
+the underlying arrays, so opening, scrolling and sorting cost the same for ten
+rows or a million.
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+from dataclasses import dataclass
+
+import customtkinter as ctk
+import numpy as np
+
+
+@dataclass
+class TableColumn:
+	header: str
+	values: object        # NumPy array or sequence, one entry per row
+	spec: str             # format spec for one cell, e.g. ">12.3f"
+	width: int            # column width in characters
+	sort_key: object = None  # optional array to sort by instead of ``values``
+	display: object = None   # optional value -> str, e.g. for datetime64 values
+
+	def cell(self, row):
+		value = self.values[row]
+		if self.display is not None:
+			value = self.display(value)
+		return format(value, self.spec)
+
+
+class VirtualTable(ctk.CTkFrame):
+	def __init__(self, master, font=("Courier New", 11), locate=None, **kwargs):
+		super().__init__(master, **kwargs)
+		self.font = tkfont.Font(font=font)
+		self.row_height = self.font.metrics("linespace") + 2
+		self.char_width = self.font.measure("0")
+
+		self.columns = []
+		self.n_rows = 0
+		self.order = None         # display position -> data row
+		self._positions = None    # data row -> display position, when sorted
+		self.top = 0              # first visible display position
+		self.selected = None      # highlighted data row
+		self.sort_column = None
+		self.sort_descending = False
+		self.locate = locate      # query string -> data row (or None)
+		self._items = []
+
+		# --- Toolbar: jump to a timepoint, row count ---
+		toolbar = ctk.CTkFrame(self, fg_color="transparent")
+		toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 4))
+		self.jump_entry = ctk.CTkEntry(toolbar, width=220, placeholder_text="Jump to time point or hours")
+		self.jump_entry.pack(side="left", padx=(0, 5))
+		self.jump_entry.bind("<Return>", lambda event: self.jump())
+		ctk.CTkButton(toolbar, text="Go", width=40, command=self.jump).pack(side="left")
+		self.count_label = ctk.CTkLabel(toolbar, text="")
+		self.count_label.pack(side="right", padx=5)
+
+		# --- Header and body canvases with scrollbars ---
+		self.header = tk.Canvas(self, height=self.row_height + 4, bg="#e5e5e5", highlightthickness=0)
+		self.header.grid(row=1, column=0, sticky="ew")
+		self.body = tk.Canvas(self, bg="white", highlightthickness=0, xscrollcommand=self._on_xscroll)
+		self.body.grid(row=2, column=0, sticky="nsew")
+		self.vscroll = ctk.CTkScrollbar(self, orientation="vertical", command=self.yview)
+		self.vscroll.grid(row=2, column=1, sticky="ns")
+		self.hscroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self.xview)
+		self.hscroll.grid(row=3, column=0, sticky="ew")
+		self.grid_rowconfigure(2, weight=1)
+		self.grid_columnconfigure(0, weight=1)
+
+		self._highlight = self.body.create_rectangle(0, 0, 0, 0, fill="#dbe4ff", outline="", state="hidden")
+
+		self.body.bind("<Configure>", lambda event: self.redraw())
+		self.body.bind("<MouseWheel>", self._on_mousewheel)
+		self.body.bind("<Button-4>", lambda event: self.yview("scroll", -3, "units"))
+		self.body.bind("<Button-5>", lambda event: self.yview("scroll", 3, "units"))
+		self.body.bind("<Button-1>", self._on_click)
+		self.header.bind("<Button-1>", self._on_header_click)
+		for key, delta, what in (("<Up>", -1, "units"), ("<Down>", 1, "units"), ("<Prior>", -1, "pages"), ("<Next>", 1, "pages")):
+			self.body.bind(key, lambda event, d=delta, w=what: self.yview("scroll", d, w))
+
+	# === Data ===
+	def set_data(self, columns):
+		"""Show ``columns`` (a list of :class:`TableColumn`), keeping the current sort if possible."""
+		self.columns = list(columns)
+		self.n_rows = len(self.columns[0].values) if self.columns else 0
+		self.selected = None
+		if self.sort_column is not None and self.sort_column < len(self.columns):
+			self._sort(self.sort_column, self.sort_descending)
+		else:
+			self.sort_column = None
+			self.order = np.arange(self.n_rows)
+		self.top = min(self.top, max(0, self.n_rows - 1))
+		self.count_label.configure(text=f"{self.n_rows:,} rows")
+		self._draw_header()
+		self.redraw()
+
+	def patch_rows(self, rows, columns):
+		"""
+		Overwrite data ``rows`` with ``columns`` (the same columns, holding only
+		those rows) and redraw; the sort order is rebuilt only if it broke.
+		"""
+		for column, new in zip(self.columns, columns):
+			column.values[rows] = new.values
+			if column.sort_key is not None:
+				column.sort_key[rows] = new.sort_key
+		if self.sort_column is not None and not self._order_holds(rows):
+			self._sort(self.sort_column, self.sort_descending)
+		self.redraw()
+
+	def _order_holds(self, rows):
+		# Each patched row must still fit between its neighbours in display order
+		column = self.columns[self.sort_column]
+		key = np.asarray(column.sort_key if column.sort_key is not None else column.values)
+		positions = self._positions[rows]
+		last = len(self.order) - 1
+		lower = key[self.order[np.maximum(positions - 1, 0)]]
+		upper = key[self.order[np.minimum(positions + 1, last)]]
+		if self.sort_descending:
+			lower, upper = upper, lower
+		here = key[rows]
+		return bool(np.all((lower <= here) & (here <= upper)))
+
+	def _line(self, row):
+		return " ".join(column.cell(row) for column in self.columns)
+
+	def _line_width(self):
+		return (sum(column.width for column in self.columns) + len(self.columns)) * self.char_width
+
+	# === Sorting ===
+	def _sort(self, index, descending):
+		column = self.columns[index]
+		key = column.sort_key if column.sort_key is not None else column.values
+		order = np.argsort(np.asarray(key), kind="stable")
+		self.order = order[::-1] if descending else order
+		self._positions = np.empty_like(self.order)
+		self._positions[self.order] = np.arange(len(self.order))
+		self.sort_column = index
+		self.sort_descending = descending
+
+	def sort_by(self, index, descending=None):
+		if descending is None:
+			descending = self.sort_column == index and not self.sort_descending
+		self._sort(index, descending)
+		self._draw_header()
+		self.redraw()
+
+	def _on_header_click(self, event):
+		x = self.header.canvasx(event.x) / self.char_width
+		edge = 0
+		for index, column in enumerate(self.columns):
+			edge += column.width + 1
+			if x < edge:
+				self.sort_by(index)
+				return
+
+	def _draw_header(self):
+		self.header.delete("all")
+		cells = []
+		for index, column in enumerate(self.columns):
+			text = column.header
+			if index == self.sort_column:
+				text += " ▼" if self.sort_descending else " ▲"
+			align = "<" if column.spec.startswith("<") else ">"
+			cells.append(format(text, f"{align}{column.width}"))
+		self.header.create_text(0, 2, text=" ".join(cells), anchor="nw", font=self.font)
+		self.header.configure(scrollregion=(0, 0, self._line_width(), self.row_height))
+
+	# === Viewport ===
+	def visible_rows(self):
+		return max(1, self.body.winfo_height() // self.row_height)
+
+	def redraw(self):
+		visible = self.visible_rows()
+		self.top = max(0, min(self.top, self.n_rows - visible))
+		end = min(self.n_rows, self.top + visible)
+
+		while len(self._items) < visible:
+			y = len(self._items) * self.row_height
+			self._items.append(self.body.create_text(0, y, anchor="nw", font=self.font))
+		for slot, item in enumerate(self._items):
+			position = self.top + slot
+			text = self._line(self.order[position]) if position < end else ""
+			self.body.itemconfigure(item, text=text)
+
+		self.body.configure(scrollregion=(0, 0, self._line_width(), visible * self.row_height))
+		self._draw_highlight()
+		if self.n_rows:
+			self.vscroll.set(self.top / self.n_rows, end / self.n_rows)
+		else:
+			self.vscroll.set(0, 1)
+
+	def _draw_highlight(self):
+		if self.selected is None:
+			self.body.itemconfigure(self._highlight, state="hidden")
+			return
+		slot = self._position_of(self.selected) - self.top
+		if 0 <= slot < self.visible_rows():
+			y = slot * self.row_height
+			self.body.coords(self._highlight, 0, y, self._line_width(), y + self.row_height)
+			self.body.itemconfigure(self._highlight, state="normal")
+			self.body.tag_lower(self._highlight)
+		else:
+			self.body.itemconfigure(self._highlight, state="hidden")
+
+	def _position_of(self, row):
+		if self.sort_column is None:
+			return row
+		return int(self._positions[row])
+
+	def yview(self, *args):
+		visible = self.visible_rows()
+		if args[0] == "moveto":
+			self.top = int(float(args[1]) * self.n_rows)
+		elif args[0] == "scroll":
+			step = visible if args[2] == "pages" else 1
+			self.top += int(args[1]) * step
+		self.redraw()
+
+	def xview(self, *args):
+		self.body.xview(*args)
+		self.header.xview(*args)
+
+	def _on_xscroll(self, first, last):
+		self.hscroll.set(first, last)
+
+	def _on_mousewheel(self, event):
+		# Windows reports multiples of 120, macOS small deltas
+		delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+		self.yview("scroll", -delta * 3, "units")
+
+	def _on_click(self, event):
+		self.body.focus_set()
+		position = self.top + int(event.y // self.row_height)
+		if position < self.n_rows:
+			self.selected = int(self.order[position])
+			self._draw_highlight()
+
+	# === Jump to timepoint ===
+	def show_row(self, row):
+		"""Scroll so data row ``row`` is centred and highlight it."""
+		self.selected = row
+		self.top = self._position_of(row) - self.visible_rows() // 2
+		self.redraw()
+
+	def jump(self):
+		query = self.jump_entry.get().strip()
+		if not query or self.locate is None or not self.n_rows:
+			return
+		row = self.locate(query)
+		if row is not None:
+			self.show_row(row)
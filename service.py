@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service: the HgQuant decay calculation as a JSON endpoint.
+
+One long-running process keeps NumPy, pandas and the engine imported and its
+decay-constant/exponential caches warm, and serves concurrent clients from a
+thread per connection (HTTP/1.1 keep-alive), so other lab tools get decay
+factors without starting an interpreter per call.
+
+Usage:
+	python service.py [--host 127.0.0.1] [--port 8765] [--cache CACHE_DIR] [--verbose]
+
+``POST /evaluate`` takes ``{"studies": [study, ...], "columns": [...]}``. Each
+study is an object with the fields of a study file (see ``study.py``), the
+timepoints given inline; ``columns`` optionally restricts the output to some
+of ``hours``, ``activity_m``, ``activity_g``, ``pct_m``, ``pct_g``,
+``decay_factor_m`` and ``decay_factor_g``. The reply holds one entry per study,
+in order: ``{"name", "status": "ok", "time_points", <columns>, "decay_constants"}``
+(plus ``percentiles`` when the study has uncertainties), or
+``{"name", "status": "error", "error"}`` for a study that could not be evaluated.
+Values that are not finite numbers (e.g. decay factors of a zero activity)
+are sent as ``null``, so the reply is strict JSON. Monte Carlo work is capped
+per request (:data:`MAX_SAMPLES` samples per study, :data:`MAX_SAMPLE_CELLS`
+samples × timepoints in total); larger requests are refused with 400.
+
+``GET /health`` reports the version and the engine cache statistics. With
+``--cache`` computed tables are also kept on disk (see ``result_cache.py``)
+and repeated studies are answered from there.
+"""
+
+import argparse
+import json
+import sys
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import bateman
+import export
+import tracing
+import uncertainty
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from study import Study
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Larger request bodies are refused (413)
+MAX_BODY_BYTES = 64 * 2**20
+
+# Monte Carlo work a request may ask for: samples per study, and samples × timepoints
+# summed over its studies (larger requests are refused with 400)
+MAX_SAMPLES = 1_000_000
+MAX_SAMPLE_CELLS = 100_000_000
+
+COLUMNS = ("hours", "activity_m", "activity_g", "pct_m", "pct_g", "decay_factor_m", "decay_factor_g")
+
+
+class RequestError(ValueError):
+	"""A malformed request; reported to the client with an HTTP error status."""
+
+	def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+		super().__init__(message)
+		self.status = status
+
+
+def json_values(values):
+	"""``values`` as a JSON-ready list, with NaN and ±inf (e.g. decay factors of A0 = 0) as null."""
+	values = np.asarray(values)
+	return np.where(np.isfinite(values), values, None).tolist()
+
+
+def evaluate_study(data, columns=COLUMNS, cache=None):
+	"""Evaluate one study object and return its reply entry."""
+	if not isinstance(data, dict):
+		raise ValueError("A study must be a JSON object")
+	if "timepoints_file" in data:
+		raise ValueError("timepoints_file is not accepted by the service; give the timepoints inline")
+	study = Study.from_dict(data)
+	table = study.run(cache).table
+
+	reply = {"name": study.name, "status": "ok", "time_points": table.time_labels().tolist()}
+	result = table.result()
+	for name in columns:
+		reply[name] = json_values(getattr(result, name))
+	reply["decay_constants"] = {"lambda_m": table.lambda_m, "lambda_ITm": table.lambda_ITm, "lambda_g": table.lambda_g}
+	if table.percentiles is not None:
+		reply["percentiles"] = {
+			q: {uncertainty.percentile_label(p): json_values(values[i]) for i, p in enumerate(study.uncertainty.percentiles)}
+			for q, values in table.percentiles.items()
+		}
+	return reply
+
+
+def check_limits(studies):
+	"""Refuse a request whose Monte Carlo work is over the server's limits, before any of it runs."""
+	cells = 0
+	for i, data in enumerate(studies, start=1):
+		spec = data.get("uncertainty") if isinstance(data, dict) else None
+		if not isinstance(spec, dict):
+			continue
+		try:
+			samples = int(spec.get("samples", uncertainty.DEFAULT_SAMPLES))
+		except (TypeError, ValueError, OverflowError):
+			continue  # not a number: reported as that study's error
+		if samples > MAX_SAMPLES:
+			raise RequestError(f"Study {i} asks for {samples} Monte Carlo samples; the limit is {MAX_SAMPLES}")
+		points = data.get("timepoints")
+		if isinstance(points, str):
+			points = points.splitlines()
+		cells += max(samples, 0) * (len(points) if isinstance(points, list) else 0)
+	if cells > MAX_SAMPLE_CELLS:
+		raise RequestError(f"The request asks for {cells} Monte Carlo samples x timepoints; the limit is {MAX_SAMPLE_CELLS}")
+
+
+def evaluate_request(payload, cache=None):
+	"""Evaluate every study of a decoded ``/evaluate`` request."""
+	if not isinstance(payload, dict) or not isinstance(payload.get("studies"), list):
+		raise RequestError('Expected a JSON object with a "studies" list')
+	columns = payload.get("columns", COLUMNS)
+	if not isinstance(columns, (list, tuple)) or not all(isinstance(c, str) for c in columns):
+		raise RequestError('"columns" must be a list of column names')
+	unknown = set(columns) - set(COLUMNS)
+	if unknown:
+		raise RequestError(f"Unknown column(s): {', '.join(sorted(map(str, unknown)))}")
+
+	check_limits(payload["studies"])
+
+	results = []
+	for i, data in enumerate(payload["studies"], start=1):
+		name = data.get("name", "") if isinstance(data, dict) else ""
+		try:
+			with tracing.span("service study", index=i):
+				results.append(evaluate_study(data, columns, cache))
+		except Exception as e:
+			results.append({"name": name or f"study_{i}", "status": "error", "error": f"{type(e).__name__}: {e}"})
+	return {"results": results}
+
+
+def health(cache=None):
+	reply = {"status": "ok", "version": export.APP_VERSION, "basis_cache": bateman.BASIS_CACHE.info()}
+	if cache is not None:
+		reply["result_cache"] = cache.info()
+	return reply
+
+
+def warm_up():
+	"""Import the lazily loaded modules and run one study, so the first client is not slower."""
+	evaluate_request({"studies": [{
+		"A0_m": 100.0,
+		"A0_g": 10.0,
+		"measured_time": "2025-01-01 08:00",
+		"timepoints": ["2025-01-01 09:00", "2025-01-02 09:00"],
+	}]})
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+	server_version = "HgQuant/" + export.APP_VERSION.rsplit("v.", 1)[-1]
+	verbose = False
+	cache = None
+
+	def do_GET(self):
+		if self.path.rstrip("/") == "/health":
+			self._reply(HTTPStatus.OK, health(self.cache))
+		else:
+			self._reply(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint: GET {self.path}"})
+
+	def do_POST(self):
+		if self.path.rstrip("/") != "/evaluate":
+			self._discard_body()
+			self._reply(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint: POST {self.path}"})
+			return
+		try:
+			payload = self._read_json()
+			with tracing.span("service request"):
+				reply = evaluate_request(payload, self.cache)
+		except RequestError as e:
+			self._reply(e.status, {"error": str(e)})
+			return
+		self._reply(HTTPStatus.OK, reply)
+
+	def _read_json(self):
+		try:
+			length = int(self.headers.get("Content-Length", ""))
+		except ValueError:
+			raise RequestError("A Content-Length header is required", HTTPStatus.LENGTH_REQUIRED)
+		if length < 0:
+			# rfile.read(-1) would block until the client hangs up
+			self.close_connection = True
+			raise RequestError("Content-Length must not be negative")
+		if length > MAX_BODY_BYTES:
+			self.close_connection = True
+			raise RequestError(f"Request body over {MAX_BODY_BYTES} bytes", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+		try:
+			return json.loads(self.rfile.read(length))
+		except (UnicodeDecodeError, json.JSONDecodeError) as e:
+			raise RequestError(f"Invalid JSON: {e}")
+
+	def _discard_body(self):
+		try:
+			length = int(self.headers.get("Content-Length") or 0)
+		except ValueError:
+			length = -1
+		if 0 < length <= MAX_BODY_BYTES:
+			self.rfile.read(length)
+		elif length:
+			self.close_connection = True
+
+	def _reply(self, status, body):
+		data = json.dumps(body, allow_nan=False).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	def log_message(self, format, *args):
+		if self.verbose:
+			super().log_message(format, *args)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False, cache=None):
+	"""A ready-to-serve :class:`ThreadingHTTPServer` (port 0 picks a free port), optionally with a result cache."""
+	handler = type("Handler", (ServiceHandler,), {"verbose": verbose, "cache": cache})
+	server = ThreadingHTTPServer((host, port), handler)
+	server.daemon_threads = True
+	return server
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="service.py", description="Serve HgQuant decay calculations as JSON over HTTP.")
+	parser.add_argument("--host", default=DEFAULT_HOST, help="interface to listen on (default: localhost only)")
+	parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+	parser.add_argument("--cache", metavar="DIR", help="reuse and store computed tables in this result cache folder")
+	parser.add_argument("--cache-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, help="result cache size limit in MiB")
+	parser.add_argument("--verbose", action="store_true", help="log every request")
+	return parser
+
+
+def main(argv=None):
+	args = build_parser().parse_args(argv)
+	start = time.perf_counter()
+	warm_up()
+	cache = ResultCache(args.cache, int(args.cache_mb * 2**20)) if args.cache else None
+	server = make_server(args.host, args.port, args.verbose, cache)
+	host, port = server.server_address[:2]
+	print(f"HgQuant service ready in {time.perf_counter() - start:.2f} s on http://{host}:{port}/ (Ctrl+C to stop)")
+	sys.stdout.flush()
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Streaming decay tables for timepoint series too long to hold in memory.
+
+Timepoints are read from CSV in fixed-size chunks; each chunk is parsed,
+evaluated and appended to a Parquet or Arrow IPC file before the next one is
+read, so peak memory depends on the chunk size and not on the input length.
+
+Usage:
+	python streaming.py TIMEPOINTS.csv OUTPUT.parquet --A0-m 100 --A0-g 10 \\
+		--measured-time "2025-01-01 08:00" [--column NAME] [--chunksize N]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import bateman
+import timepoints
+from study import Study
+
+DEFAULT_CHUNKSIZE = 100_000
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+
+def output_schema(study):
+	import pyarrow as pa
+
+	return pa.schema([
+		("Time Point", pa.timestamp("s")),
+		("Hours Elapsed", pa.float64()),
+		(f"{study.isotope_m} ({study.activity_unit})", pa.float64()),
+		(f"{study.isotope_g} ({study.activity_unit})", pa.float64()),
+		(f"% {study.isotope_m}", pa.float64()),
+		(f"% {study.isotope_g}", pa.float64()),
+		("Decay Factor Hg-197m", pa.float64()),
+		("Decay Factor Hg-197g", pa.float64()),
+	], metadata={
+		"isotope_m": study.isotope_m,
+		"isotope_g": study.isotope_g,
+		"activity_unit": study.activity_unit,
+		"measured_time": study.measured_time.strftime("%Y-%m-%d %H:%M:%S"),
+	})
+
+
+def _open_writer(dest, schema, fmt):
+	import pyarrow as pa
+
+	if fmt == "parquet":
+		import pyarrow.parquet as pq
+		return pq.ParquetWriter(dest, schema, compression="zstd")
+	return pa.ipc.new_file(dest, schema)
+
+
+def _infer_format(dest):
+	ext = os.path.splitext(dest)[1].lower()
+	if ext in PARQUET_EXTENSIONS:
+		return "parquet"
+	if ext in ARROW_EXTENSIONS:
+		return "arrow"
+	raise ValueError(f"Cannot infer output format from '{dest}'; use .parquet or .arrow")
+
+
+def read_timepoint_chunks(source, column=None, chunksize=DEFAULT_CHUNKSIZE):
+	"""
+	Yield (first data row number, list of strings) chunks from a timepoint CSV.
+
+	Without ``column`` the file has no header and the first column is used.
+	"""
+	import pandas as pd
+
+	reader = pd.read_csv(
+		source,
+		header=0 if column else None,
+		usecols=[column if column else 0],
+		dtype=str,
+		keep_default_na=False,
+		skip_blank_lines=False,
+		chunksize=chunksize,
+	)
+	row = 1
+	for chunk in reader:
+		values = chunk.iloc[:, 0].tolist()
+		yield row, values
+		row += len(values)
+
+
+def stream_decay_table(source, dest, study, column=None, chunksize=DEFAULT_CHUNKSIZE, fmt=None, on_invalid="raise"):
+	"""
+	Compute the decay table for the timepoints in ``source`` chunk by chunk.
+
+	``study`` supplies the initial activities, half-lives, measurement time and
+	labels (its own ``timepoints`` are ignored). Invalid timepoints either
+	abort the run (``on_invalid="raise"``) or are dropped and reported
+	(``"skip"``). Returns ``{"rows": written, "invalid": [(row, text), ...]}``.
+	"""
+	if on_invalid not in ("raise", "skip"):
+		raise ValueError("on_invalid must be 'raise' or 'skip'")
+	fmt = fmt or _infer_format(dest)
+	schema = output_schema(study)
+
+	# Written next to ``dest`` and moved into place only once complete, so a
+	# failed run never leaves a truncated file that looks like a finished export
+	tmp = f"{dest}.{os.getpid()}.tmp"
+	try:
+		result = _stream(source, tmp, study, schema, fmt, column, chunksize, on_invalid)
+		os.replace(tmp, dest)
+	except BaseException:
+		try:
+			os.remove(tmp)
+		except OSError:
+			pass
+		raise
+	return result
+
+
+def _stream(source, dest, study, schema, fmt, column, chunksize, on_invalid):
+	import pyarrow as pa
+
+	detected = None
+	written = 0
+	invalid = []
+	buffers = None  # output columns, reused from chunk to chunk
+	with _open_writer(dest, schema, fmt) as writer:
+		for first_row, values in read_timepoint_chunks(source, column, chunksize):
+			parsed = timepoints.parse_timepoints(values, fmt=detected)
+			detected = detected or parsed.detected_format
+
+			if parsed.invalid:
+				bad = [(first_row + n - 1, text) for n, text in parsed.invalid]
+				if on_invalid == "raise":
+					raise ValueError(f"Invalid timepoint on row {bad[0][0]}: {bad[0][1]!r}")
+				invalid.extend(bad)
+
+			times = parsed.times
+			keep = ~np.isnat(times)
+			if not keep.all():
+				times = times[keep]
+			if not len(times):
+				continue
+
+			hours = timepoints.elapsed_hours(times, study.measured_time)
+			if buffers is None or len(buffers.hours) != len(hours):
+				buffers = bateman.allocate_result(len(hours))
+			r = bateman.evaluate_into(study.A0_m, study.A0_g, study.t_half_m, study.t_half_g, hours, study.branching, out=buffers)
+			columns = [r.hours, r.activity_m, r.activity_g, r.pct_m, r.pct_g, r.decay_factor_m, r.decay_factor_g]
+			arrays = [pa.array(times, type=pa.timestamp("s"))] + [pa.array(c) for c in columns]
+			writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+			written += len(times)
+
+	return {"rows": written, "invalid": invalid}
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="streaming.py", description="Stream a long timepoint CSV into a columnar decay table.")
+	parser.add_argument("source", help="CSV file with one timepoint per row")
+	parser.add_argument("dest", help="output .parquet or .arrow file")
+	parser.add_argument("--A0-m", type=float, required=True, help="initial Hg197m activity")
+	parser.add_argument("--A0-g", type=float, required=True, help="initial Hg197g activity")
+	parser.add_argument("--measured-time", required=True, help="measurement timestamp")
+	parser.add_argument("--t-half-m", type=float, default=bateman.HALFLIFE_HG197M)
+	parser.add_argument("--t-half-g", type=float, default=bateman.HALFLIFE_HG197G)
+	parser.add_argument("--activity-unit", default="KBq")
+	parser.add_argument("--column", default=None, help="timepoint column name (file has a header); default: first column, no header")
+	parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+	parser.add_argument("--skip-invalid", action="store_true", help="drop invalid timepoints instead of aborting")
+	return parser
+
+
+def main(argv=None):
+	args = build_parser().parse_args(argv)
+	study = Study.from_dict({
+		"A0_m": args.A0_m,
+		"A0_g": args.A0_g,
+		"measured_time": args.measured_time,
+		"timepoints": [],
+		"t_half_m": args.t_half_m,
+		"t_half_g": args.t_half_g,
+		"activity_unit": args.activity_unit,
+	})
+	try:
+		summary = stream_decay_table(
+			args.source, args.dest, study, column=args.column, chunksize=args.chunksize,
+			on_invalid="skip" if args.skip_invalid else "raise",
+		)
+	except ValueError as e:
+		print(f"Error: {e}", file=sys.stderr)
+		return 1
+	print(f"Wrote {summary['rows']} rows to {args.dest}")
+	for row, text in summary["invalid"][:20]:
+		print(f"Skipped invalid timepoint on row {row}: {text!r}", file=sys.stderr)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
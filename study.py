@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Study inputs and their evaluation, independent of the GUI.
+
+A study is what the HgQuant window collects: initial activities, half-lives,
+the measurement timestamp and the timepoint list, plus display settings.
+Study files are JSON objects using the field names of :class:`Study`; the
+timepoints are given inline as a list or in a text file via ``timepoints_file``
+(one per line, relative to the study file).
+"""
+
+import json
+import os
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+
+import bateman
+import timepoints
+import tracing
+from decay_table import DecayTable
+from uncertainty import UncertaintySpec, monte_carlo
+
+
+@dataclass
+class Study:
+	A0_m: float
+	A0_g: float
+	measured_time: datetime
+	timepoints: list
+	t_half_m: float = bateman.HALFLIFE_HG197M
+	t_half_g: float = bateman.HALFLIFE_HG197G
+	branching: float = bateman.IT_BRANCHING
+	activity_unit: str = "KBq"
+	isotope_m: str = "Hg197m"
+	isotope_g: str = "Hg197g"
+	name: str = ""
+	uncertainty: UncertaintySpec = None  # enables Monte Carlo percentiles
+
+	@classmethod
+	def from_dict(cls, data, base_dir="."):
+		data = dict(data)
+		if "timepoints_file" in data:
+			path = os.path.join(base_dir, data.pop("timepoints_file"))
+			with open(path, encoding="utf-8") as f:
+				data["timepoints"] = f.read().splitlines()
+		elif isinstance(data.get("timepoints"), str):
+			data["timepoints"] = data["timepoints"].splitlines()
+
+		measured = data.get("measured_time")
+		if isinstance(measured, str):
+			from dateutil import parser
+			data["measured_time"] = parser.parse(measured)
+
+		if isinstance(data.get("uncertainty"), dict):
+			data["uncertainty"] = UncertaintySpec.from_dict(data["uncertainty"])
+
+		known = {f.name for f in fields(cls)}
+		unknown = set(data) - known
+		if unknown:
+			raise ValueError(f"Unknown study field(s): {', '.join(sorted(unknown))}")
+		for key in ("A0_m", "A0_g", "t_half_m", "t_half_g", "branching"):
+			if key in data:
+				data[key] = float(data[key])
+		return cls(**data)
+
+	@classmethod
+	def from_file(cls, path):
+		with open(path, encoding="utf-8") as f:
+			data = json.load(f)
+		data.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+		return cls.from_dict(data, base_dir=os.path.dirname(os.path.abspath(path)))
+
+	def decay_constants(self):
+		return tuple(float(x) for x in bateman.decay_constants(self.t_half_m, self.t_half_g, self.branching))
+
+	def run(self, cache=None):
+		"""
+		Parse the timepoints and evaluate the chain; raises ValueError on invalid lines.
+
+		With a :class:`result_cache.ResultCache` an identical earlier run is
+		loaded instead of computed, and a new result is stored in it.
+		"""
+		if cache is not None:
+			with tracing.span("cache lookup"):
+				table = cache.get(self)
+			if table is not None:
+				return StudyResult(self, None, table.result(), table.percentiles, table)
+
+		with tracing.span("parse timepoints", lines=len(self.timepoints)):
+			parsed = timepoints.parse_timepoints(self.timepoints)
+		if not parsed.ok:
+			shown = ", ".join(f"line {n}: {tp!r}" for n, tp in parsed.invalid[:5])
+			raise ValueError(f"{len(parsed.invalid)} invalid timepoint(s) ({shown})")
+		with tracing.span("evaluate", rows=len(parsed.labels)):
+			hours = parsed.elapsed_hours(self.measured_time)
+			result = bateman.evaluate_cached(self.A0_m, self.A0_g, self.t_half_m, self.t_half_g, hours, self.branching)
+		mc = None
+		if self.uncertainty is not None:
+			with tracing.span("monte carlo", samples=self.uncertainty.samples):
+				mc = monte_carlo(self.uncertainty, self.A0_m, self.A0_g, self.t_half_m, self.t_half_g, hours, self.branching)
+		run = StudyResult(self, parsed, result, mc)
+		if cache is not None:
+			with tracing.span("cache store"):
+				cache.put(self, run.table)
+		return run
+
+
+@dataclass
+class StudyResult:
+	study: Study
+	parsed: timepoints.ParsedTimepoints  # None when loaded from a result cache
+	result: bateman.BatemanResult
+	percentiles: dict = None   # monte_carlo() output, if uncertainties were given
+	_table: object = field(default=None, repr=False)
+
+	@property
+	def table(self):
+		"""The compact :class:`DecayTable`, built on first access."""
+		if self._table is None:
+			s = self.study
+			self._table = DecayTable.from_result(
+				self.parsed.times, self.result, s.A0_m, s.A0_g, s.measured_time,
+				s.isotope_m, s.isotope_g, s.activity_unit, self.percentiles, s.uncertainty,
+			)
+		return self._table
+
+	@property
+	def frame(self):
+		"""The ``activities_df`` layout of :attr:`table`, built on each access (for export)."""
+		with tracing.span("build table", rows=len(self.table)):
+			return self.table.to_frame()
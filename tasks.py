@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Background work for the HgQuant window.
+
+Long calculations and exports run on a worker thread so the Tk event loop keeps
+running. The worker reports progress and checks for cancellation through its
+:class:`BackgroundTask`; the window polls the task with ``after`` and all
+callbacks run on the Tk main thread, the only thread allowed to touch widgets.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# One worker: tasks started while another runs wait their turn
+EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hgquant-task")
+
+POLL_MS = 50
+
+
+class Cancelled(Exception):
+	"""Raised inside the worker when the user cancelled the task."""
+
+
+class BackgroundTask:
+	def __init__(self, widget, work, on_done, on_error=None, on_progress=None, on_cancelled=None, poll_ms=POLL_MS):
+		"""
+		``work(task)`` runs on the worker thread and may call :meth:`report` and
+		:meth:`check`. ``on_done(result)``, ``on_error(exception)``,
+		``on_progress(fraction, message)`` and ``on_cancelled()`` run on the Tk
+		thread of ``widget``.
+		"""
+		self.widget = widget
+		self.work = work
+		self.on_done = on_done
+		self.on_error = on_error
+		self.on_progress = on_progress
+		self.on_cancelled = on_cancelled
+		self.poll_ms = poll_ms
+		self._cancel = threading.Event()
+		self._progress = (0.0, "")
+		self._shown = None
+		self._future = None
+
+	# === Worker side ===
+	def report(self, fraction, message=""):
+		"""Record progress (0..1); only the latest value is shown. Also a cancellation point."""
+		self._progress = (min(max(float(fraction), 0.0), 1.0), message)
+		self.check()
+
+	def check(self):
+		if self._cancel.is_set():
+			raise Cancelled()
+
+	def progress_callback(self, start, stop, message=""):
+		"""A ``progress(done, total)`` callback that maps onto the ``start``..``stop`` range."""
+		def callback(done, total):
+			self.report(start + (stop - start) * (done / total if total else 1.0), message)
+		return callback
+
+	# === Tk side ===
+	def start(self):
+		self._future = EXECUTOR.submit(self.work, self)
+		self.widget.after(self.poll_ms, self._poll)
+		return self
+
+	def cancel(self):
+		self._cancel.set()
+
+	@property
+	def cancelled(self):
+		return self._cancel.is_set()
+
+	@property
+	def running(self):
+		return self._future is not None and not self._future.done()
+
+	def _poll(self):
+		try:
+			if not self.widget.winfo_exists():
+				self.cancel()
+				return
+		except Exception:
+			self.cancel()
+			return
+
+		if self.on_progress and self._progress != self._shown:
+			self._shown = self._progress
+			self.on_progress(*self._progress)
+
+		if not self._future.done():
+			self.widget.after(self.poll_ms, self._poll)
+			return
+
+		# Only a worker that stopped at a checkpoint was cancelled; one that finished
+		# before noticing a late Cancel completed its work, so it counts as done
+		error = self._future.exception()
+		if isinstance(error, Cancelled):
+			if self.on_cancelled:
+				self.on_cancelled()
+		elif error is not None:
+			if self.on_error:
+				self.on_error(error)
+		else:
+			self.on_done(self._future.result())
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Threshold-crossing times and imaging windows, solved from the Bateman model.
+
+Answers questions like "when does ¹⁹⁷mHg fall below 50 % of the total
+activity" or "when does the total activity drop to 5 MBq" for many scenarios
+at once. Every argument may be an array (one entry per scenario, broadcast
+together). Each scenario is sampled on a coarse time grid to bracket the first
+crossing, then all brackets are refined together with a vectorized Illinois
+(safeguarded false position) iteration to ``tol`` hours.
+
+Quantities are the :class:`bateman.BatemanResult` columns: ``activity_m``,
+``activity_g``, ``total``, ``pct_m``, ``pct_g``, ``decay_factor_m`` and
+``decay_factor_g`` (percentages in %). Two crossings closer together than
+the grid spacing can be missed; raise ``grid`` for such curves.
+
+Usage:
+	python thresholds.py pct_m --below 50 --A0-m 100 --A0-g 10 [--measured-time "2025-01-01 08:00"]
+	python thresholds.py total --below 5 --scenarios cohort.csv -o schedule.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+import bateman
+
+QUANTITIES = ("activity_m", "activity_g", "total", "pct_m", "pct_g", "decay_factor_m", "decay_factor_g")
+DIRECTIONS = ("any", "down", "up")
+
+# Search horizon, in multiples of the longer half-life, when no t_max is given
+HORIZON_HALF_LIVES = 20
+GRID_POINTS = 512
+TOLERANCE_H = 1e-9
+MAX_ITER = 100
+# Bytes of grid values held at once; scenarios are processed in chunks of this size
+CHUNK_BYTES = 64 * 2**20
+_ARRAYS_PER_CELL = 12
+
+
+def _values(quantity, hours, A0_m, A0_g, t_half_m, t_half_g, branching):
+	"""One output column of :func:`bateman.evaluate`, computing only what it needs."""
+	lambda_m, lambda_ITm, lambda_g = bateman.decay_constants(t_half_m, t_half_g, branching)
+	with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+		if quantity in ("activity_m", "decay_factor_m"):
+			activity_m = bateman.activity_Hg197m(A0_m, lambda_m, hours)
+			return activity_m if quantity == "activity_m" else activity_m / A0_m
+		activity_g = bateman.activity_Hg197g(A0_m, A0_g, lambda_ITm, lambda_m, lambda_g, hours)
+		if quantity == "activity_g":
+			return activity_g
+		if quantity == "decay_factor_g":
+			return activity_g / (A0_m + A0_g)
+		activity_m = bateman.activity_Hg197m(A0_m, lambda_m, hours)
+		total = activity_m + activity_g
+		if quantity == "total":
+			return total
+		return (activity_m if quantity == "pct_m" else activity_g) / total * 100
+
+
+def _refine(quantity, params, target, a, b, f_a, f_b, tol, max_iter):
+	"""Illinois iteration on brackets [a, b] whose ends lie on opposite sides of ``target``."""
+	g_a = f_a - target
+	g_b = f_b - target
+	for _ in range(max_iter):
+		active = (np.abs(b - a) > tol) & (g_b != 0)
+		if not active.any():
+			break
+		with np.errstate(divide="ignore", invalid="ignore"):
+			c = b - g_b * (b - a) / (g_b - g_a)
+		# Bisect where the secant step leaves the bracket
+		c = np.where(np.isfinite(c) & (c > np.minimum(a, b)) & (c < np.maximum(a, b)), c, 0.5 * (a + b))
+		g_c = _values(quantity, c, *params) - target
+
+		# Root between b and c: the old b becomes the other end; otherwise
+		# the kept end's value is halved (the Illinois modification)
+		flip = np.sign(g_c) != np.sign(g_b)
+		a, g_a = np.where(active & flip, b, a), np.where(active, np.where(flip, g_b, 0.5 * g_a), g_a)
+		b, g_b = np.where(active, c, b), np.where(active, g_c, g_b)
+	return b
+
+
+def _refine_at(quantity, params, rows, cols, times, values, target, tol, max_iter):
+	"""Refine the crossings between grid samples ``cols - 1`` and ``cols`` of ``rows``."""
+	return _refine(
+		quantity, tuple(p[rows] for p in params), target,
+		times[rows, cols - 1], times[rows, cols], values[rows, cols - 1], values[rows, cols], tol, max_iter,
+	)
+
+
+def _scenarios(A0_m, A0_g, t_half_m, t_half_g, branching, extra):
+	"""Broadcast the scenario parameters (and ``extra`` arrays) to flat float arrays."""
+	arrays = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (A0_m, A0_g, t_half_m, t_half_g, branching, *extra)))
+	shape = arrays[0].shape
+	return shape, [a.ravel() for a in arrays]
+
+
+def _horizon(t_half_m, t_half_g, t_max):
+	if t_max is None:
+		return HORIZON_HALF_LIVES * np.maximum(t_half_m, t_half_g)
+	return t_max
+
+
+def _chunks(n, grid):
+	step = max(1, int(CHUNK_BYTES // (grid * 8 * _ARRAYS_PER_CELL)))
+	for start in range(0, n, step):
+		yield slice(start, min(start + step, n))
+
+
+def _grid(quantity, params, start, stop, grid):
+	"""Sample times (S, grid) from ``start`` to ``stop`` and the quantity on them."""
+	fractions = np.linspace(0.0, 1.0, grid)
+	times = start[:, np.newaxis] + (stop - start)[:, np.newaxis] * fractions
+	values = _values(quantity, times, *(p[:, np.newaxis] for p in params))
+	return times, values
+
+
+def _first(mask):
+	"""Index of the first True per row, -1 where there is none."""
+	index = mask.argmax(axis=1)
+	return np.where(mask[np.arange(len(mask)), index], index, -1)
+
+
+def _check(quantity, direction="any"):
+	if quantity not in QUANTITIES:
+		raise ValueError(f"quantity must be one of {', '.join(QUANTITIES)}")
+	if direction not in DIRECTIONS:
+		raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+
+
+def crossing_time(quantity, target, A0_m, A0_g, t_half_m=bateman.HALFLIFE_HG197M, t_half_g=bateman.HALFLIFE_HG197G,
+		branching=bateman.IT_BRANCHING, direction="any", start=0.0, t_max=None, grid=GRID_POINTS,
+		tol=TOLERANCE_H, max_iter=MAX_ITER):
+	"""
+	Hours after the measurement at which ``quantity`` first reaches ``target``.
+
+	``direction`` is ``"down"`` (first time at or below the target), ``"up"``
+	(at or above it) or ``"any"`` (first time it is crossed). The search runs
+	from ``start`` to ``t_max`` hours (default: 20 of the longer half-life).
+	Returns an array of the broadcast scenario shape, NaN where the target is
+	not reached; scenarios already there at ``start`` return ``start``.
+	"""
+	_check(quantity, direction)
+	shape, (A0_m, A0_g, t_half_m, t_half_g, branching, target, start, t_max) = _scenarios(
+		A0_m, A0_g, t_half_m, t_half_g, branching, (target, start, _horizon(t_half_m, t_half_g, t_max))
+	)
+	out = np.full(len(target), np.nan)
+	for chunk in _chunks(len(target), grid):
+		params = (A0_m[chunk], A0_g[chunk], t_half_m[chunk], t_half_g[chunk], branching[chunk])
+		times, values = _grid(quantity, params, start[chunk], t_max[chunk], grid)
+		g = values - target[chunk][:, np.newaxis]
+		before, after = g[:, :-1], g[:, 1:]
+		if direction == "down":
+			crossed = (before > 0) & (after <= 0)
+		elif direction == "up":
+			crossed = (before < 0) & (after >= 0)
+		else:
+			crossed = ((before > 0) & (after <= 0)) | ((before < 0) & (after >= 0))
+		index = _first(crossed)
+		if direction == "down":
+			at_start = g[:, 0] <= 0
+		elif direction == "up":
+			at_start = g[:, 0] >= 0
+		else:
+			at_start = g[:, 0] == 0
+
+		result = np.full(len(g), np.nan)
+		result[at_start] = times[at_start, 0]
+		rows = np.flatnonzero((index >= 0) & ~at_start)
+		if len(rows):
+			result[rows] = _refine_at(quantity, params, rows, index[rows] + 1, times, values, target[chunk][rows], tol, max_iter)
+		out[chunk] = result
+	return out.reshape(shape)
+
+
+def imaging_window(quantity, low, high, A0_m, A0_g, t_half_m=bateman.HALFLIFE_HG197M, t_half_g=bateman.HALFLIFE_HG197G,
+		branching=bateman.IT_BRANCHING, start=0.0, t_max=None, grid=GRID_POINTS, tol=TOLERANCE_H, max_iter=MAX_ITER):
+	"""
+	First interval in which ``low <= quantity <= high``, as (start hours, end hours).
+
+	Either bound may be ``-inf``/``inf``. The start is NaN where the quantity
+	never enters the band before ``t_max``; the end is NaN where it is still
+	inside at ``t_max``.
+	"""
+	_check(quantity)
+	shape, (A0_m, A0_g, t_half_m, t_half_g, branching, low, high, start, t_max) = _scenarios(
+		A0_m, A0_g, t_half_m, t_half_g, branching, (low, high, start, _horizon(t_half_m, t_half_g, t_max))
+	)
+	if np.any(low > high):
+		raise ValueError("low must not exceed high")
+	opens = np.full(len(low), np.nan)
+	closes = np.full(len(low), np.nan)
+	for chunk in _chunks(len(low), grid):
+		params = (A0_m[chunk], A0_g[chunk], t_half_m[chunk], t_half_g[chunk], branching[chunk])
+		lo, hi = low[chunk][:, np.newaxis], high[chunk][:, np.newaxis]
+		times, values = _grid(quantity, params, start[chunk], t_max[chunk], grid)
+		below, above = values < lo, values > hi
+		inside = ~below & ~above
+		# First grid step that touches the band: inside at either end, or jumping across it
+		touches = inside[:, :-1] | inside[:, 1:] | (below[:, :-1] & above[:, 1:]) | (above[:, :-1] & below[:, 1:])
+		step = _first(touches)
+		chunk_low, chunk_high = low[chunk], high[chunk]
+		chunk_open = np.full(len(values), np.nan)
+		chunk_close = np.full(len(values), np.nan)
+
+		# Entering: already inside at the start, or crossing the bound the step starts beyond
+		rows = np.flatnonzero(step >= 0)
+		starts_inside = inside[rows, step[rows]]
+		chunk_open[rows[starts_inside]] = times[rows[starts_inside], step[rows[starts_inside]]]
+		rows = rows[~starts_inside]
+		open_bound = np.full(len(values), np.nan)
+		if len(rows):
+			cols = step[rows]
+			open_bound[rows] = np.where(above[rows, cols], chunk_high[rows], chunk_low[rows])
+			chunk_open[rows] = _refine(
+				quantity, tuple(p[rows] for p in params), open_bound[rows],
+				times[rows, cols], times[rows, cols + 1], values[rows, cols], values[rows, cols + 1], tol, max_iter,
+			)
+
+		# Leaving: first sample outside after the step, bracketed from the entry
+		# point when the band is crossed within a single step
+		later = np.arange(grid)[np.newaxis, :] > step[:, np.newaxis]
+		out_at = np.where(step >= 0, _first(~inside & later), -1)
+		rows = np.flatnonzero(out_at >= 0)
+		if len(rows):
+			cols = out_at[rows]
+			from_entry = (cols - 1 == step[rows]) & ~np.isnan(open_bound[rows])
+			left = np.where(from_entry, chunk_open[rows], times[rows, cols - 1])
+			f_left = np.where(from_entry, open_bound[rows], values[rows, cols - 1])
+			close_bound = np.where(above[rows, cols], chunk_high[rows], chunk_low[rows])
+			chunk_close[rows] = _refine(
+				quantity, tuple(p[rows] for p in params), close_bound,
+				left, times[rows, cols], f_left, values[rows, cols], tol, max_iter,
+			)
+		opens[chunk] = chunk_open
+		closes[chunk] = chunk_close
+	return opens.reshape(shape), closes.reshape(shape)
+
+
+# === Command line ===
+def build_parser():
+	parser = argparse.ArgumentParser(prog="thresholds.py", description="Find when a decay quantity crosses a threshold.")
+	parser.add_argument("quantity", choices=QUANTITIES)
+	group = parser.add_mutually_exclusive_group(required=True)
+	group.add_argument("--below", type=float, help="first time the quantity falls to this value")
+	group.add_argument("--above", type=float, help="first time the quantity rises to this value")
+	group.add_argument("--between", type=float, nargs=2, metavar=("LOW", "HIGH"), help="window with LOW <= quantity <= HIGH")
+	parser.add_argument("--A0-m", type=float, help="initial Hg197m activity")
+	parser.add_argument("--A0-g", type=float, help="initial Hg197g activity")
+	parser.add_argument("--t-half-m", type=float, default=bateman.HALFLIFE_HG197M)
+	parser.add_argument("--t-half-g", type=float, default=bateman.HALFLIFE_HG197G)
+	parser.add_argument("--scenarios", help="CSV with one scenario per row (A0_m, A0_g and optionally t_half_m, t_half_g, branching, name)")
+	parser.add_argument("--measured-time", help="also report clock times relative to this timestamp")
+	parser.add_argument("--t-max", type=float, help="search horizon in hours")
+	parser.add_argument("-o", "--output", help="write the results to this CSV file")
+	return parser
+
+
+def main(argv=None):
+	import pandas as pd
+
+	parser = build_parser()
+	args = parser.parse_args(argv)
+	if args.scenarios:
+		frame = pd.read_csv(args.scenarios)
+	elif args.A0_m is not None and args.A0_g is not None:
+		frame = pd.DataFrame({"A0_m": [args.A0_m], "A0_g": [args.A0_g]})
+	else:
+		parser.error("give --A0-m and --A0-g, or --scenarios")
+	for column, default in (("t_half_m", args.t_half_m), ("t_half_g", args.t_half_g), ("branching", bateman.IT_BRANCHING)):
+		if column not in frame:
+			frame[column] = default
+
+	params = [frame[c].to_numpy(dtype=float) for c in ("A0_m", "A0_g", "t_half_m", "t_half_g", "branching")]
+	if args.between:
+		frame["start_h"], frame["end_h"] = imaging_window(args.quantity, *args.between, *params, t_max=args.t_max)
+		columns = ["start_h", "end_h"]
+	else:
+		direction, target = ("down", args.below) if args.below is not None else ("up", args.above)
+		frame["hours"] = crossing_time(args.quantity, target, *params, direction=direction, t_max=args.t_max)
+		columns = ["hours"]
+	if args.measured_time:
+		from dateutil import parser as date_parser
+		measured = np.datetime64(date_parser.parse(args.measured_time), "s")
+		clock_columns = {"hours": "time", "start_h": "start_time", "end_h": "end_time"}
+		for column in columns:
+			hours = frame[column].to_numpy()
+			clock = measured + np.round(np.nan_to_num(hours) * 3600).astype("timedelta64[s]")
+			frame[clock_columns[column]] = np.where(np.isnan(hours), np.datetime64("NaT"), clock)
+
+	if args.output:
+		frame.to_csv(args.output, index=False)
+		print(f"Written {len(frame)} scenario(s) to {args.output}")
+	else:
+		print(frame.to_string(index=False))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
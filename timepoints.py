@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Bulk parsing of the timepoint list into ``datetime64`` values.
+
+The format is detected once from the first line and the whole column is then
+converted in a single vectorized pass; only lines that do not match the detected
+format go through dateutil one at a time.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+
+# Tried in order against the first line. Slash dates are month-first, which is
+# what dateutil assumes for ambiguous input.
+TIMESTAMP_FORMATS = [
+	"%Y-%m-%d %H:%M:%S",
+	"%Y-%m-%d %H:%M",
+	"%Y-%m-%dT%H:%M:%S",
+	"%Y-%m-%dT%H:%M",
+	"%Y-%m-%d",
+	"%Y/%m/%d %H:%M:%S",
+	"%Y/%m/%d %H:%M",
+	"%Y/%m/%d",
+	"%m/%d/%Y %H:%M:%S",
+	"%m/%d/%Y %H:%M",
+	"%m/%d/%Y",
+	"%d.%m.%Y %H:%M:%S",
+	"%d.%m.%Y %H:%M",
+]
+
+# Precision of the parsed timestamps (sub-second digits are dropped, as before)
+DATETIME_UNIT = "datetime64[s]"
+
+
+@dataclass
+class ParsedTimepoints:
+	"""Cleaned labels, parsed times and the lines that could not be parsed."""
+	labels: list
+	times: np.ndarray
+	detected_format: str = None
+	invalid: list = field(default_factory=list)  # (line number, raw text)
+
+	@property
+	def ok(self):
+		return not self.invalid
+
+	def elapsed_hours(self, reference):
+		return elapsed_hours(self.times, reference)
+
+
+def clean_lines(lines):
+	"""Strip blank lines and truncate fractional seconds, keeping 1-based line numbers."""
+	if isinstance(lines, str):
+		lines = lines.split("\n")
+	cleaned, line_numbers = [], []
+	for number, line in enumerate(lines, start=1):
+		line = line.strip()
+		if line:
+			cleaned.append(line.split('.')[0] if _has_fractional_seconds(line) else line)
+			line_numbers.append(number)
+	return cleaned, line_numbers
+
+
+def _has_fractional_seconds(line):
+	# Dotted dates ("31.01.2025 10:00") must survive the legacy split('.')[0]
+	head = line.split('.')[0]
+	return ":" in head
+
+
+def detect_format(sample):
+	for fmt in TIMESTAMP_FORMATS:
+		try:
+			datetime.strptime(sample, fmt)
+			return fmt
+		except ValueError:
+			continue
+	return None
+
+
+def parse_timepoints(lines, fmt=None):
+	"""
+	Parse the timepoint list (text or iterable of lines) in bulk.
+
+	``fmt`` skips detection when the format is already known (e.g. from an
+	earlier chunk of the same file). Returns a :class:`ParsedTimepoints`;
+	unparseable lines, and lines with a UTC offset or time zone, are reported
+	in ``invalid`` with their line number and their time set to ``NaT``.
+	"""
+	import pandas as pd
+
+	labels, line_numbers = clean_lines(lines)
+	times = np.full(len(labels), np.datetime64("NaT"), dtype=DATETIME_UNIT)
+	if not labels:
+		return ParsedTimepoints(labels, times)
+
+	if fmt is None:
+		fmt = detect_format(labels[0])
+	if fmt is not None:
+		parsed = pd.to_datetime(pd.Series(labels, dtype=object), format=fmt, errors="coerce")
+		# Straight to seconds: going through nanoseconds wraps dates outside 1677-2262
+		times = parsed.dt.as_unit("s").to_numpy(dtype=DATETIME_UNIT, copy=True)
+
+	invalid = []
+	unmatched = np.flatnonzero(np.isnat(times))
+	if len(unmatched):
+		from dateutil import parser
+
+		for i in unmatched:
+			try:
+				value = parser.parse(labels[i])
+			except (ValueError, OverflowError):
+				invalid.append((line_numbers[i], labels[i]))
+				continue
+			if value.tzinfo is not None:
+				# The measurement time has no zone, so an offset cannot be honoured
+				invalid.append((line_numbers[i], labels[i]))
+				continue
+			times[i] = np.datetime64(value, "s")
+
+	return ParsedTimepoints(labels, times, fmt, invalid)
+
+
+def elapsed_hours(times, reference):
+	"""Hours between ``reference`` (datetime or datetime64) and each parsed time."""
+	reference = np.datetime64(reference, "s")
+	return (np.asarray(times, dtype=DATETIME_UNIT) - reference) / np.timedelta64(1, "h")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Named timing spans for the calculation and export stages.
+
+Wrap a stage in ``with tracing.span("evaluate"):``. While tracing is off (the
+default) ``span`` returns one shared no-op context manager, so instrumented
+code pays a single flag check. When it is on, every span records its start,
+duration, process and thread; the spans can be summarized per name or written
+as Chrome trace-event JSON (open in chrome://tracing or ui.perfetto.dev).
+
+Tracing is switched on with :func:`enable`, or for a whole process by setting
+the ``HGQUANT_TRACE`` environment variable to 1.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+_enabled = os.environ.get("HGQUANT_TRACE", "") not in ("", "0")
+_spans = []
+_lock = threading.Lock()
+_NULL_SPAN = contextlib.nullcontext()
+
+
+@dataclass
+class Span:
+	name: str
+	start_ns: int        # time.perf_counter_ns(); a system-wide monotonic clock on Linux and Windows
+	duration_ns: int
+	pid: int
+	tid: int
+	args: dict = field(default_factory=dict)
+
+
+class _ActiveSpan:
+	__slots__ = ("name", "args", "start")
+
+	def __init__(self, name, args):
+		self.name = name
+		self.args = args
+
+	def __enter__(self):
+		self.start = time.perf_counter_ns()
+		return self
+
+	def __exit__(self, *exc):
+		end = time.perf_counter_ns()
+		record = Span(self.name, self.start, end - self.start, os.getpid(), threading.get_ident(), self.args)
+		with _lock:
+			_spans.append(record)
+		return False
+
+
+def span(name, /, **args):
+	"""Context manager timing one stage; ``args`` are attached to the trace event."""
+	if not _enabled:
+		return _NULL_SPAN
+	return _ActiveSpan(name, args)
+
+
+def enabled():
+	return _enabled
+
+
+def enable(on=True):
+	global _enabled
+	_enabled = bool(on)
+
+
+def spans():
+	with _lock:
+		return list(_spans)
+
+
+def clear():
+	with _lock:
+		_spans.clear()
+
+
+def take():
+	"""Return the recorded spans and forget them (e.g. to ship them out of a worker process)."""
+	with _lock:
+		taken = list(_spans)
+		_spans.clear()
+	return taken
+
+
+def extend(records):
+	"""Add spans recorded elsewhere, e.g. in worker processes."""
+	with _lock:
+		_spans.extend(records)
+
+
+# === Reports ===
+def summary(records=None):
+	"""Per-name totals as dicts (name, count, total_s, mean_s, max_s), slowest first."""
+	totals = {}
+	for s in spans() if records is None else records:
+		count, total, longest = totals.get(s.name, (0, 0, 0))
+		totals[s.name] = (count + 1, total + s.duration_ns, max(longest, s.duration_ns))
+	rows = [
+		{"name": name, "count": count, "total_s": total / 1e9, "mean_s": total / count / 1e9, "max_s": longest / 1e9}
+		for name, (count, total, longest) in totals.items()
+	]
+	return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+
+def format_summary(records=None):
+	rows = summary(records)
+	if not rows:
+		return "No spans recorded."
+	width = max(len("Stage"), max(len(row["name"]) for row in rows))
+	lines = [f"{'Stage':<{width}} {'Count':>6} {'Total (ms)':>11} {'Mean (ms)':>10} {'Max (ms)':>10}"]
+	for row in rows:
+		lines.append(f"{row['name']:<{width}} {row['count']:>6} {row['total_s'] * 1e3:>11.2f} "
+			f"{row['mean_s'] * 1e3:>10.2f} {row['max_s'] * 1e3:>10.2f}")
+	return "\n".join(lines)
+
+
+def chrome_trace(records=None):
+	"""The spans as a Chrome trace-event document (complete "X" events, microseconds)."""
+	records = spans() if records is None else records
+	origin = min((s.start_ns for s in records), default=0)
+	events = [
+		{
+			"name": s.name,
+			"ph": "X",
+			"ts": (s.start_ns - origin) / 1e3,
+			"dur": s.duration_ns / 1e3,
+			"pid": s.pid,
+			"tid": s.tid,
+			"args": {key: value if isinstance(value, (int, float, str, bool)) else str(value) for key, value in s.args.items()},
+		}
+		for s in records
+	]
+	return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path, records=None):
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump(chrome_trace(records), f)
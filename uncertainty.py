@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo uncertainty propagation for the Bateman outputs.
+
+Half-lives, the IT branching ratio and the initial activities are drawn from
+independent normal distributions (1σ given in the same units as the inputs)
+and pushed through :func:`bateman.evaluate`. Timepoints are processed in chunks
+spread over a thread pool (NumPy releases the GIL in the heavy kernels), and
+each chunk is evaluated in blocks of samples, so the samples kept for the
+percentiles plus the evaluation temporaries of every worker together stay
+under a memory budget. The floor is one timepoint per worker: the percentiles
+need all of its samples at once.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+import bateman
+
+DEFAULT_SAMPLES = 100_000
+DEFAULT_PERCENTILES = (2.5, 50.0, 97.5)
+# Memory budget of a run, shared by all workers
+CHUNK_BYTES = 64 * 2**20
+# Float64 arrays alive per sample × timepoint while a block is evaluated
+_ARRAYS_PER_CELL = 10
+
+# Output columns of bateman.BatemanResult that get percentiles
+QUANTITIES = ("activity_m", "activity_g", "pct_m", "pct_g", "decay_factor_m", "decay_factor_g")
+
+
+@dataclass
+class UncertaintySpec:
+	"""1σ uncertainties of the inputs and how many samples to draw."""
+	sigma_A0_m: float = 0.0
+	sigma_A0_g: float = 0.0
+	sigma_t_half_m: float = 0.0
+	sigma_t_half_g: float = 0.0
+	sigma_branching: float = 0.0
+	samples: int = DEFAULT_SAMPLES
+	percentiles: tuple = DEFAULT_PERCENTILES
+	seed: int = None
+
+	@classmethod
+	def from_dict(cls, data):
+		data = dict(data)
+		if "percentiles" in data:
+			data["percentiles"] = tuple(float(p) for p in data["percentiles"])
+		return cls(**data)
+
+	def to_dict(self):
+		return asdict(self)
+
+
+def draw_parameters(spec, A0_m, A0_g, t_half_m, t_half_g, branching=bateman.IT_BRANCHING):
+	"""Draw ``spec.samples`` parameter sets; physically impossible draws are clipped."""
+	rng = np.random.default_rng(spec.seed)
+	n = int(spec.samples)
+
+	def normal(mean, sigma, low=0.0, high=np.inf):
+		if not sigma:
+			return np.full(n, float(mean))
+		return np.clip(rng.normal(mean, sigma, n), low, high)
+
+	tiny = np.finfo(float).tiny
+	return {
+		"A0_m": normal(A0_m, spec.sigma_A0_m),
+		"A0_g": normal(A0_g, spec.sigma_A0_g),
+		"t_half_m": normal(t_half_m, spec.sigma_t_half_m, low=tiny),
+		"t_half_g": normal(t_half_g, spec.sigma_t_half_g, low=tiny),
+		"branching": normal(branching, spec.sigma_branching, high=1.0),
+	}
+
+
+def _chunk_percentiles(params, hours, percentiles, block):
+	n = len(params["A0_m"])
+	values = {q: np.empty((n, len(hours))) for q in QUANTITIES}
+	for start in range(0, n, block):
+		column = {key: value[start:start + block, np.newaxis] for key, value in params.items()}
+		result = bateman.evaluate(
+			column["A0_m"], column["A0_g"], column["t_half_m"], column["t_half_g"],
+			hours[np.newaxis, :], column["branching"],
+		)
+		for q in QUANTITIES:
+			values[q][start:start + block] = getattr(result, q)
+	# One quantity at a time, releasing its samples once reduced
+	return {q: np.nanpercentile(values.pop(q), percentiles, axis=0) for q in QUANTITIES}
+
+
+def monte_carlo(spec, A0_m, A0_g, t_half_m, t_half_g, hours, branching=bateman.IT_BRANCHING, workers=None,
+		chunk_bytes=CHUNK_BYTES, progress=None):
+	"""
+	Percentiles of every output column over the sampled parameters.
+
+	Returns ``{quantity: array (len(spec.percentiles), T)}`` for each name in
+	:data:`QUANTITIES`. ``progress(done, total)`` is called as timepoint chunks
+	finish; if it raises, the remaining chunks are dropped and the error propagates.
+	"""
+	hours = np.asarray(hours, dtype=float).ravel()
+	params = draw_parameters(spec, A0_m, A0_g, t_half_m, t_half_g, branching)
+	percentiles = list(spec.percentiles)
+
+	# Per timepoint: the samples of every quantity, plus the copy nanpercentile sorts.
+	# Half of each worker's share holds those, half the temporaries of a sample block.
+	samples = int(spec.samples)
+	kept_per_timepoint = samples * 8 * (len(QUANTITIES) + 1)
+	workers = workers or os.cpu_count() or 1
+	workers = max(1, min(workers, int(chunk_bytes // (2 * kept_per_timepoint))))
+	share = chunk_bytes // workers
+	chunk = max(1, int(share // 2 // kept_per_timepoint))
+	block = max(1, min(samples, int(share // 2 // (chunk * 8 * _ARRAYS_PER_CELL))))
+	starts = range(0, len(hours), chunk)
+
+	out = {q: np.empty((len(percentiles), len(hours))) for q in QUANTITIES}
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		futures = {
+			start: pool.submit(_chunk_percentiles, params, hours[start:start + chunk], percentiles, block)
+			for start in starts
+		}
+		try:
+			for done, (start, future) in enumerate(futures.items(), start=1):
+				for q, values in future.result().items():
+					out[q][:, start:start + chunk] = values
+				if progress:
+					progress(done, len(futures))
+		except BaseException:
+			for future in futures.values():
+				future.cancel()
+			raise
+	return out
+
+
+def percentile_label(p):
+	return f"P{p:g}"
+
+
+def percentile_columns(mc, spec, isotope_m="Hg197m", isotope_g="Hg197g", activity_unit="KBq"):
+	"""Flatten :func:`monte_carlo` output into ``activities_df``-style named columns."""
+	names = {
+		"activity_m": f"{isotope_m} ({activity_unit})",
+		"activity_g": f"{isotope_g} ({activity_unit})",
+		"pct_m": f"% {isotope_m}",
+		"pct_g": f"% {isotope_g}",
+		"decay_factor_m": "Decay Factor Hg-197m",
+		"decay_factor_g": "Decay Factor Hg-197g",
+	}
+	columns = {}
+	for q in QUANTITIES:
+		for i, p in enumerate(spec.percentiles):
+			columns[f"{names[q]} {percentile_label(p)}"] = mc[q][i]
+	return columns
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Voxel-wise decay correction of dynamic SPECT image volumes.
+
+Volumes are memory-mapped, never loaded whole: ``.npy`` files through their
+header, raw files given a dtype and a shape. The first axis is the frame axis
+and every frame has one acquisition timestamp; each frame is divided by the
+HgQuant decay factor of its timestamp (``Decay Factor Hg-197m`` for ¹⁹⁷mHg
+photopeak images, ``Decay Factor Hg-197g`` for ¹⁹⁷gHg ones).
+
+The voxels are processed in tiles spread over a thread pool (NumPy releases
+the GIL while it multiplies), so peak memory is a few tiles per worker and
+multi-gigabyte series are corrected at disk speed.
+
+Usage:
+	python volumes.py SERIES.npy FRAME_TIMES.txt -o CORRECTED.npy --A0-m 100 --A0-g 10 \\
+		--measured-time "2025-01-01 08:00" [--isotope m|g] [--in-place]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import bateman
+import timepoints
+from study import Study
+
+# Bytes of one tile; each worker holds roughly one input and one output tile
+TILE_BYTES = 16 * 2**20
+
+ISOTOPES = ("m", "g")
+
+
+def open_volume(path, dtype=None, shape=None, mode="r"):
+	"""
+	Memory-map an image series with frames along the first axis.
+
+	``.npy`` files carry their own dtype and shape; raw files need both.
+	"""
+	if path.lower().endswith(".npy"):
+		return np.load(path, mmap_mode=mode)
+	if dtype is None or shape is None:
+		raise ValueError(f"Raw volume '{path}' needs a dtype and a shape")
+	return np.memmap(path, dtype=dtype, mode=mode, shape=tuple(shape))
+
+
+def create_volume(path, dtype, shape):
+	"""Create a memory-mapped output volume (``.npy`` with a header, otherwise raw)."""
+	if path.lower().endswith(".npy"):
+		return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+	return np.memmap(path, dtype=dtype, mode="w+", shape=tuple(shape))
+
+
+def frame_decay_factors(study, frame_times, isotope="m"):
+	"""
+	Decay factor of every frame, as in the HgQuant table.
+
+	``frame_times`` are the frame acquisition timestamps (strings in any
+	format HgQuant accepts, or datetimes).
+	"""
+	if isotope not in ISOTOPES:
+		raise ValueError(f"isotope must be one of {', '.join(ISOTOPES)}")
+	parsed = timepoints.parse_timepoints([str(t) for t in frame_times])
+	if not parsed.ok:
+		n, text = parsed.invalid[0]
+		raise ValueError(f"Invalid frame time on line {n}: {text!r}")
+	hours = parsed.elapsed_hours(study.measured_time)
+	r = bateman.evaluate(study.A0_m, study.A0_g, study.t_half_m, study.t_half_g, hours, study.branching)
+	return r.decay_factor_m if isotope == "m" else r.decay_factor_g
+
+
+def _tiles(frames, voxels, itemsize, tile_bytes):
+	step = max(1, int(tile_bytes // itemsize))
+	for f in range(frames):
+		for start in range(0, voxels, step):
+			yield f, start, min(start + step, voxels)
+
+
+def decay_correct(volume, factors, out=None, tile_bytes=TILE_BYTES, workers=None):
+	"""
+	Divide frame ``i`` of ``volume`` by ``factors[i]``, tile by tile.
+
+	``volume`` is any array with frames along the first axis, usually a memmap
+	from :func:`open_volume`. Without ``out`` the volume is corrected in place
+	(it must be writable and floating point); otherwise ``out`` is an array of
+	the same shape, e.g. from :func:`create_volume`. Returns the corrected array.
+	"""
+	factors = np.asarray(factors, dtype=float).ravel()
+	if len(factors) != volume.shape[0]:
+		raise ValueError(f"{volume.shape[0]} frames but {len(factors)} decay factors")
+	if not np.all(np.isfinite(factors) & (factors > 0)):
+		raise ValueError("Decay factors must be finite and positive")
+	if out is None:
+		if not np.issubdtype(volume.dtype, np.floating):
+			raise ValueError(f"Cannot correct a {volume.dtype} volume in place; write to a floating point output")
+		out = volume
+	elif out.shape != volume.shape:
+		raise ValueError(f"Output shape {out.shape} does not match the volume {volume.shape}")
+
+	if not (volume.flags.c_contiguous and out.flags.c_contiguous):
+		raise ValueError("Volumes must be stored in C order")
+
+	# Flat (frames, voxels) views; memmaps stay memmaps
+	src = volume.reshape(volume.shape[0], -1)
+	dst = out.reshape(out.shape[0], -1)
+	scale = 1.0 / factors
+
+	def correct(tile):
+		f, start, stop = tile
+		np.multiply(src[f, start:stop], scale[f], out=dst[f, start:stop], casting="unsafe")
+
+	tiles = _tiles(src.shape[0], src.shape[1], max(src.itemsize, dst.itemsize), tile_bytes)
+	workers = workers or os.cpu_count() or 1
+	with ThreadPoolExecutor(max_workers=workers) as pool:
+		for _ in pool.map(correct, tiles):
+			pass
+	if isinstance(out, np.memmap):
+		out.flush()
+	return out
+
+
+def correct_volume_file(source, study, frame_times, dest=None, isotope="m", dtype=None, shape=None,
+		out_dtype=np.float32, tile_bytes=TILE_BYTES, workers=None):
+	"""
+	Decay-correct the series in ``source`` into ``dest`` (or in place without ``dest``).
+
+	Returns the decay factors that were applied.
+	"""
+	factors = frame_decay_factors(study, frame_times, isotope)
+	if dest is None:
+		volume = open_volume(source, dtype, shape, mode="r+")
+		decay_correct(volume, factors, tile_bytes=tile_bytes, workers=workers)
+	else:
+		volume = open_volume(source, dtype, shape, mode="r")
+		out = create_volume(dest, out_dtype, volume.shape)
+		decay_correct(volume, factors, out, tile_bytes=tile_bytes, workers=workers)
+	return factors
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="volumes.py", description="Decay-correct a dynamic SPECT series frame by frame.")
+	parser.add_argument("source", help=".npy volume or raw file with frames along the first axis")
+	parser.add_argument("frame_times", help="text file with one acquisition timestamp per frame")
+	parser.add_argument("-o", "--output", help="corrected .npy or raw output file")
+	parser.add_argument("--in-place", action="store_true", help="overwrite the source volume (floating point only)")
+	parser.add_argument("--A0-m", type=float, required=True, help="initial Hg197m activity")
+	parser.add_argument("--A0-g", type=float, required=True, help="initial Hg197g activity")
+	parser.add_argument("--measured-time", required=True, help="measurement timestamp")
+	parser.add_argument("--t-half-m", type=float, default=bateman.HALFLIFE_HG197M)
+	parser.add_argument("--t-half-g", type=float, default=bateman.HALFLIFE_HG197G)
+	parser.add_argument("--isotope", choices=ISOTOPES, default="m", help="photopeak the images were reconstructed from")
+	parser.add_argument("--dtype", help="raw input dtype, e.g. float32 or uint16")
+	parser.add_argument("--shape", help="raw input shape, e.g. 24,128,128,128")
+	parser.add_argument("--out-dtype", default="float32", help="output dtype")
+	parser.add_argument("--tile-mb", type=float, default=TILE_BYTES / 2**20, help="tile size in MiB")
+	parser.add_argument("--workers", type=int, default=None, help="threads (default: all cores)")
+	return parser
+
+
+def main(argv=None):
+	parser = build_parser()
+	args = parser.parse_args(argv)
+	if bool(args.output) == args.in_place:
+		parser.error("give either --output or --in-place")
+
+	study = Study.from_dict({
+		"A0_m": args.A0_m,
+		"A0_g": args.A0_g,
+		"measured_time": args.measured_time,
+		"timepoints": [],
+		"t_half_m": args.t_half_m,
+		"t_half_g": args.t_half_g,
+	})
+	with open(args.frame_times, encoding="utf-8") as f:
+		frame_times = [line for line in f.read().splitlines() if line.strip()]
+	shape = [int(n) for n in args.shape.split(",")] if args.shape else None
+	try:
+		factors = correct_volume_file(
+			args.source, study, frame_times, dest=args.output, isotope=args.isotope,
+			dtype=args.dtype, shape=shape, out_dtype=args.out_dtype,
+			tile_bytes=int(args.tile_mb * 2**20), workers=args.workers,
+		)
+	except ValueError as e:
+		print(f"Error: {e}", file=sys.stderr)
+		return 1
+	print(f"Corrected {len(factors)} frames (decay factors {factors.min():.4g} to {factors.max():.4g})"
+		f" into {args.output or args.source}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())